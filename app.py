@@ -17,6 +17,13 @@ sys.path.append(str(Path(__file__).parent))
 
 from netsuite_connector import NetSuiteConnector
 from data_processor import DataProcessor
+from master_data import (
+    create_item_master_cache, create_customer_master_cache, create_cost_retail_cache
+)
+from daily_cube import create_daily_cube
+from warehouse import ParquetWarehouse
+from prefetch import DrilldownPrefetcher, create_prefetch_executor
+from singleflight import SingleFlight
 from utils import format_currency, format_number, format_percentage
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -45,6 +52,8 @@ if 'drilldown_data' not in st.session_state:
     st.session_state.drilldown_data = None
 if 'drilldown_type' not in st.session_state:
     st.session_state.drilldown_type = None
+if 'prefetcher' not in st.session_state:
+    st.session_state.prefetcher = None
 
 # ──────────────────────────────────────────────────────────────────────────────
 # SIDEBAR - SETTINGS & CONNECTION
@@ -52,22 +61,115 @@ if 'drilldown_type' not in st.session_state:
 
 st.sidebar.header("⚙️ Settings")
 
+@st.cache_resource(show_spinner=False)
+def get_netsuite_connector(account_id, consumer_key, consumer_secret, token_id, token_secret,
+                           restlet_url=None, pool_connections=10, pool_maxsize=10, max_concurrency=3):
+    """Create a connector once per credential set so every session shares its pooled session and limiter"""
+    return NetSuiteConnector(
+        account_id=account_id,
+        consumer_key=consumer_key,
+        consumer_secret=consumer_secret,
+        token_id=token_id,
+        token_secret=token_secret,
+        restlet_url=restlet_url,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_concurrency=max_concurrency
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_item_master_cache(_connector, account_id, cache_dir):
+    """Load (and refresh if stale) the persisted item master cache once per process"""
+    return create_item_master_cache(_connector, cache_dir)
+
+@st.cache_resource(show_spinner=False)
+def get_customer_master_cache(_connector, account_id, cache_dir):
+    """Load (and refresh if stale) the persisted customer master cache once per process"""
+    return create_customer_master_cache(_connector, cache_dir)
+
+@st.cache_resource(show_spinner=False)
+def get_cost_retail_cache(_connector, account_id, cache_dir):
+    """Load the persisted cost/retail cache once per process"""
+    return create_cost_retail_cache(_connector, cache_dir)
+
+@st.cache_resource(show_spinner=False)
+def get_daily_cube(_connector, account_id, cache_dir, history_start):
+    """Load the persisted daily sales cube once per process"""
+    return create_daily_cube(_connector, history_start, cache_dir)
+
+@st.cache_resource(show_spinner=False)
+def get_warehouse(root):
+    """Open the local Parquet warehouse once per process"""
+    return ParquetWarehouse(root)
+
+@st.cache_resource(show_spinner=False)
+def get_prefetch_executor(max_workers):
+    """Process-wide prefetch pool so concurrent sessions share one bounded set of workers"""
+    return create_prefetch_executor(max_workers)
+
+@st.cache_resource(show_spinner=False)
+def get_singleflight():
+    """Process-wide singleflight group so concurrent sessions share fact table builds"""
+    return SingleFlight()
+
+def create_data_processor(connector):
+    """Create a data processor configured from the optional [features] secrets"""
+    features = st.secrets.get("features", {})
+    
+    item_cache = None
+    customer_cache = None
+    cost_cache = None
+    if features.get("local_master_cache", False):
+        cache_dir = features.get("master_cache_dir", ".cache")
+        item_cache = get_item_master_cache(connector, connector.account_id, cache_dir)
+        customer_cache = get_customer_master_cache(connector, connector.account_id, cache_dir)
+        cost_cache = get_cost_retail_cache(connector, connector.account_id, cache_dir)
+    
+    daily_cube = None
+    if features.get("daily_cube", False):
+        history_start = datetime.strptime(features.get("daily_cube_start", "2024-01-01"), "%Y-%m-%d").date()
+        daily_cube = get_daily_cube(connector, connector.account_id,
+                                    features.get("master_cache_dir", ".cache"), history_start)
+    
+    warehouse = None
+    if features.get("warehouse", False):
+        warehouse = get_warehouse(features.get("warehouse_dir", "data/warehouse"))
+    
+    return DataProcessor(
+        connector,
+        aggregation=features.get("aggregation", "client"),
+        engine=features.get("engine", "pandas"),
+        compact_dtypes=features.get("compact_dtypes", False),
+        range_partitions=features.get("range_partitions", False),
+        cache_ttl_seconds=features.get("cache_ttl_seconds", 3600),
+        item_cache=item_cache,
+        customer_cache=customer_cache,
+        cost_cache=cost_cache,
+        daily_cube=daily_cube,
+        warehouse=warehouse,
+        singleflight=get_singleflight()
+    )
+
 def initialize_connection():
     """Initialize NetSuite connection"""
     
     # Try to use secrets first (for Streamlit Cloud)
     if 'netsuite' in st.secrets:
         try:
-            connector = NetSuiteConnector(
+            connector = get_netsuite_connector(
                 account_id=st.secrets["netsuite"]["account_id"],
                 consumer_key=st.secrets["netsuite"]["consumer_key"],
                 consumer_secret=st.secrets["netsuite"]["consumer_secret"],
                 token_id=st.secrets["netsuite"]["token_id"],
                 token_secret=st.secrets["netsuite"]["token_secret"],
-                restlet_url=st.secrets["netsuite"]["restlet_url"]
+                restlet_url=st.secrets["netsuite"]["restlet_url"],
+                pool_connections=st.secrets["netsuite"].get("pool_connections", 10),
+                pool_maxsize=st.secrets["netsuite"].get("pool_maxsize", 10),
+                max_concurrency=st.secrets["netsuite"].get("max_concurrency", 3)
             )
-            st.session_state.netsuite_connector = connector
-            st.session_state.data_processor = DataProcessor(connector)
+            if st.session_state.netsuite_connector is not connector:
+                st.session_state.netsuite_connector = connector
+                st.session_state.data_processor = create_data_processor(connector)
             st.sidebar.success("✅ Connected to NetSuite")
             return True
         except Exception as e:
@@ -87,7 +189,7 @@ def initialize_connection():
         if st.button("Connect"):
             if all([account_id, consumer_key, consumer_secret, token_id, token_secret]):
                 try:
-                    connector = NetSuiteConnector(
+                    connector = get_netsuite_connector(
                         account_id=account_id,
                         consumer_key=consumer_key,
                         consumer_secret=consumer_secret,
@@ -95,7 +197,7 @@ def initialize_connection():
                         token_secret=token_secret
                     )
                     st.session_state.netsuite_connector = connector
-                    st.session_state.data_processor = DataProcessor(connector)
+                    st.session_state.data_processor = create_data_processor(connector)
                     st.success("✅ Connected!")
                     st.rerun()
                 except Exception as e:
@@ -111,7 +213,10 @@ is_connected = initialize_connection()
 # Refresh button
 st.sidebar.markdown("---")
 if st.sidebar.button("🔄 Refresh Data", type="primary", use_container_width=True):
-    st.cache_data.clear()
+    if st.session_state.data_processor is not None:
+        st.session_state.data_processor.clear_cache()
+    if st.session_state.prefetcher is not None:
+        st.session_state.prefetcher.cancel()
     st.session_state.styles_data = None
     st.session_state.customers_data = None
     st.session_state.drilldown_data = None
@@ -121,6 +226,16 @@ if st.sidebar.button("🔄 Refresh Data", type="primary", use_container_width=Tr
 st.sidebar.markdown("---")
 show_debug = st.sidebar.checkbox("🔧 Developer Mode", value=False)
 
+if show_debug and st.session_state.netsuite_connector is not None:
+    with st.sidebar.expander("🔌 Connection Pool"):
+        st.json(st.session_state.netsuite_connector.get_pool_stats())
+
+if show_debug and st.session_state.data_processor is not None:
+    with st.sidebar.expander("🗄️ Cache Statistics"):
+        st.json(st.session_state.data_processor.get_cache_stats())
+        if st.session_state.prefetcher is not None:
+            st.json(st.session_state.prefetcher.stats())
+
 st.sidebar.markdown("---")
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -232,6 +347,30 @@ filters = {
 # MAIN CONTENT - TABS
 # ──────────────────────────────────────────────────────────────────────────────
 
+# Pick up a new cost/retail version (throttled); cached views are recomputed
+# from the already-loaded fact tables without re-pulling transactions
+st.session_state.data_processor.sync_cost_retail()
+
+# Extend the daily cube with new invoice lines (at most once per sync interval)
+st.session_state.data_processor.sync_daily_cube()
+
+# Ranking settings shared by both Top N views
+features = st.secrets.get("features", {})
+top_n = features.get("max_results", 40)
+rank_by = features.get("rank_by", "sales_units")
+
+# Background drilldown prefetch for the top rows of each view (jobs per session, workers per process)
+prefetcher = None
+if features.get("prefetch_drilldowns", False):
+    prefetcher = st.session_state.prefetcher
+    if prefetcher is None or prefetcher.processor is not st.session_state.data_processor:
+        if prefetcher is not None:
+            prefetcher.shutdown()
+        prefetcher = DrilldownPrefetcher(st.session_state.data_processor,
+                                         top_k=features.get("prefetch_top_k", 5),
+                                         executor=get_prefetch_executor(features.get("prefetch_workers", 2)))
+        st.session_state.prefetcher = prefetcher
+
 tab1, tab2 = st.tabs(["👟 Top 40 Styles", "🏢 Top 40 Customers"])
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -241,23 +380,24 @@ tab1, tab2 = st.tabs(["👟 Top 40 Styles", "🏢 Top 40 Customers"])
 with tab1:
     st.markdown("---")
     
-    # Load data
-    if st.session_state.styles_data is None:
-        with st.spinner("📡 Fetching Top 40 Styles data from NetSuite..."):
-            try:
-                processor = st.session_state.data_processor
-                st.session_state.styles_data = processor.get_top_40_styles(
-                    start_date=filters['start_date'],
-                    end_date=filters['end_date'],
-                    category=filters['category'],
-                    vendor=filters['vendor'],
-                    brand=filters['brand']
-                )
-            except Exception as e:
-                st.error(f"❌ Error loading styles data: {str(e)}")
-                if show_debug:
-                    st.exception(e)
-                st.stop()
+    # Load data (memoized per filter signature, so unchanged filters are instant)
+    with st.spinner("📡 Fetching Top 40 Styles data from NetSuite..."):
+        try:
+            processor = st.session_state.data_processor
+            st.session_state.styles_data = processor.get_top_40_styles(
+                start_date=filters['start_date'],
+                end_date=filters['end_date'],
+                category=filters['category'],
+                vendor=filters['vendor'],
+                brand=filters['brand'],
+                top_n=top_n,
+                rank_by=rank_by
+            )
+        except Exception as e:
+            st.error(f"❌ Error loading styles data: {str(e)}")
+            if show_debug:
+                st.exception(e)
+            st.stop()
     
     data = st.session_state.styles_data
     
@@ -311,6 +451,11 @@ with tab1:
             hide_index=True
         )
         
+        # Warm the likely drilldowns while the table is being read (a changed
+        # selection replaces the previous prefetch)
+        if prefetcher is not None:
+            prefetcher.schedule('style', data['style'].tolist(), filters['start_date'], filters['end_date'])
+        
         st.metric("Total Styles", len(data))
         
         # Download button
@@ -336,11 +481,18 @@ with tab1:
             with st.spinner(f"Loading customers for {selected_style}..."):
                 try:
                     processor = st.session_state.data_processor
-                    drilldown = processor.get_customers_by_style(
-                        style=selected_style,
-                        start_date=filters['start_date'],
-                        end_date=filters['end_date']
-                    )
+                    drilldown = None
+                    if prefetcher is not None:
+                        drilldown = prefetcher.get('style', selected_style,
+                                                   filters['start_date'], filters['end_date'])
+                    if drilldown is None:
+                        # Load every listed style in one fetch; later picks are served from memory
+                        drilldowns = processor.get_customers_by_styles(
+                            styles=list(data['style'].unique()),
+                            start_date=filters['start_date'],
+                            end_date=filters['end_date']
+                        )
+                        drilldown = drilldowns[selected_style]
                     st.session_state.drilldown_data = drilldown
                     st.session_state.drilldown_type = "style"
                     st.rerun()
@@ -386,24 +538,25 @@ with tab1:
 with tab2:
     st.markdown("---")
     
-    # Load data
-    if st.session_state.customers_data is None:
-        with st.spinner("📡 Fetching Top 40 Customers data from NetSuite..."):
-            try:
-                processor = st.session_state.data_processor
-                st.session_state.customers_data = processor.get_top_40_customers(
-                    start_date=filters['start_date'],
-                    end_date=filters['end_date'],
-                    category=filters['category'],
-                    vendor=filters['vendor'],
-                    brand=filters['brand'],
-                    territory=filters['territory']
-                )
-            except Exception as e:
-                st.error(f"❌ Error loading customers data: {str(e)}")
-                if show_debug:
-                    st.exception(e)
-                st.stop()
+    # Load data (memoized per filter signature, so unchanged filters are instant)
+    with st.spinner("📡 Fetching Top 40 Customers data from NetSuite..."):
+        try:
+            processor = st.session_state.data_processor
+            st.session_state.customers_data = processor.get_top_40_customers(
+                start_date=filters['start_date'],
+                end_date=filters['end_date'],
+                category=filters['category'],
+                vendor=filters['vendor'],
+                brand=filters['brand'],
+                territory=filters['territory'],
+                top_n=top_n,
+                rank_by=rank_by
+            )
+        except Exception as e:
+            st.error(f"❌ Error loading customers data: {str(e)}")
+            if show_debug:
+                st.exception(e)
+            st.stop()
     
     data = st.session_state.customers_data
     
@@ -457,6 +610,9 @@ with tab2:
             hide_index=True
         )
         
+        if prefetcher is not None:
+            prefetcher.schedule('customer', data['customer'].tolist(), filters['start_date'], filters['end_date'])
+        
         st.metric("Total Customers", len(data))
         
         # Download button
@@ -482,11 +638,18 @@ with tab2:
             with st.spinner(f"Loading styles for {selected_customer}..."):
                 try:
                     processor = st.session_state.data_processor
-                    drilldown = processor.get_styles_by_customer(
-                        customer=selected_customer,
-                        start_date=filters['start_date'],
-                        end_date=filters['end_date']
-                    )
+                    drilldown = None
+                    if prefetcher is not None:
+                        drilldown = prefetcher.get('customer', selected_customer,
+                                                   filters['start_date'], filters['end_date'])
+                    if drilldown is None:
+                        # Load every listed customer in one fetch; later picks are served from memory
+                        drilldowns = processor.get_styles_by_customers(
+                            customers=list(data['customer'].unique()),
+                            start_date=filters['start_date'],
+                            end_date=filters['end_date']
+                        )
+                        drilldown = drilldowns[selected_customer]
                     st.session_state.drilldown_data = drilldown
                     st.session_state.drilldown_type = "customer"
                     st.rerun()
@@ -0,0 +1,378 @@
+"""
+Daily Cube
+Pre-aggregated date x item x customer sales with prefix sums for date-range totals
+"""
+
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from data_processor import TransactionAggregator
+from master_data import account_cache_path
+
+
+class DailyCube:
+    """
+    Local daily sales cube answering any date range without re-reading lines
+    
+    Transaction lines are folded to one row per (day, item_id, customer_id)
+    and kept sorted by item/customer pair, then day. Running totals over that
+    order make each pair's total for start..end the difference of two prefix
+    snapshots, located by binary search, so a range query costs
+    O(pairs * log(rows)) instead of a scan of every line in the range.
+    
+    The cube is seeded from history_start on the first sync and then extended
+    incrementally; each sync re-pulls the last overlap_days so late edits and
+    back-dated invoices are picked up.
+    """
+    
+    KEYS = ['item_id', 'customer_id']
+    SUM_FIELDS = ['sales_units', 'sales_dollars', 'returns']
+    MEASURES = SUM_FIELDS + ['line_count']
+    
+    def __init__(self, fetch_lines: Callable[[str, str], Iterable[List[Dict]]],
+                 history_start: date,
+                 path: Optional[str] = None,
+                 overlap_days: int = 3,
+                 sync_interval_seconds: float = 3600,
+                 date_format: Optional[str] = None):
+        """
+        Initialize daily cube
+        
+        Args:
+            fetch_lines: Function returning pages of sales transaction lines for
+                         a (start, end) pair of YYYY-MM-DD dates
+            history_start: First day kept in the cube
+            path: Optional pickle file used to persist the cube
+            overlap_days: Trailing days re-pulled on every incremental sync
+            sync_interval_seconds: Age after which sync_if_stale() syncs
+            date_format: strftime format of transaction_date (None infers it)
+        """
+        self.name = 'daily_cube'
+        self.fetch_lines = fetch_lines
+        self.history_start = history_start
+        self.path = Path(path) if path else None
+        self.overlap_days = overlap_days
+        self.sync_interval_seconds = sync_interval_seconds
+        self.date_format = date_format
+        
+        self._rows = pd.DataFrame()
+        self._covered_end: Optional[date] = None
+        self._synced_at: Optional[datetime] = None
+        self._lock = threading.RLock()
+        # Serializes syncs so concurrent sessions never pull the same lines twice
+        self._sync_lock = threading.RLock()
+        # Bumped whenever the rows change, so holders of derived data can tell
+        # they are behind
+        self.generation = 0
+        
+        # Prefix structures rebuilt after every sync
+        self._pairs = pd.DataFrame(columns=self.KEYS)
+        self._keys = np.empty(0, dtype=np.int64)
+        self._prefix = np.zeros((1, len(self.MEASURES)))
+        self._first = np.full(1, np.inf)
+        
+        # Monitoring counters
+        self.sync_count = 0
+        self.sync_failures = 0
+        self.last_sync_seconds: Optional[float] = None
+        self.last_sync_lines = 0
+        self.last_sync_type: Optional[str] = None
+        self.range_queries = 0
+    
+    @staticmethod
+    def _day_number(value: date) -> int:
+        """Days since the Unix epoch"""
+        return int(np.datetime64(value, 'D').astype(np.int64))
+    
+    def load(self) -> bool:
+        """
+        Load the cube from disk
+        
+        A cube seeded from a later day than history_start (the configured
+        start was moved earlier) is not loaded: incremental syncs only re-pull
+        the overlap, so the missing days would never be filled. The next sync
+        re-seeds it instead.
+        
+        Returns:
+            True if a persisted cube was loaded, False otherwise
+        """
+        if self.path is None or not self.path.exists():
+            return False
+        
+        try:
+            state = pd.read_pickle(self.path)
+        except Exception as e:
+            print(f"Could not load {self.name}: {str(e)}")
+            return False
+        
+        seeded_from = state.get('history_start')
+        if seeded_from is None or seeded_from > self.history_start:
+            print(f"{self.name} was seeded from {seeded_from}, after history start "
+                  f"{self.history_start}; re-seeding on the next sync")
+            return False
+        
+        with self._lock:
+            self._rows = state['rows']
+            self._covered_end = state['covered_end']
+            self._synced_at = state['synced_at']
+            self._build_prefix()
+            self.generation += 1
+        return True
+    
+    def save(self):
+        """Persist the cube to disk (atomically replaces the previous file)"""
+        if self.path is None:
+            return
+        
+        with self._lock:
+            state = {'rows': self._rows, 'covered_end': self._covered_end, 'synced_at': self._synced_at,
+                     'history_start': self.history_start}
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        pd.to_pickle(state, tmp_path)
+        os.replace(tmp_path, self.path)
+    
+    def _daily_rows(self, pages: Iterable[List[Dict]]) -> pd.DataFrame:
+        """
+        Fold pages of transaction lines to the daily grain
+        
+        Args:
+            pages: Iterable of transaction record lists
+        
+        Returns:
+            DataFrame with one row per (day, item_id, customer_id)
+        """
+        aggregator = TransactionAggregator(keys=['day'] + self.KEYS)
+        
+        for page in pages:
+            if len(page) == 0:
+                continue
+            
+            df = pd.DataFrame(page, columns=['transaction_id', 'transaction_date'] + self.KEYS + self.SUM_FIELDS)
+            df[self.SUM_FIELDS] = df[self.SUM_FIELDS].fillna(0)
+            df['line_count'] = 1
+            df['first_seen'] = pd.to_numeric(df['transaction_id'], errors='coerce').fillna(np.inf)
+            dates = pd.to_datetime(df['transaction_date'], format=self.date_format, errors='coerce')
+            df['day'] = dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+            aggregator.add_lines(df[dates.notna().to_numpy()].drop(columns=['transaction_id', 'transaction_date']))
+        
+        self.last_sync_lines = aggregator.lines_seen
+        return aggregator.result().rename(columns={'first_seen': 'first_line_id'})
+    
+    def _build_prefix(self):
+        """Sort rows by pair then day and rebuild the prefix sums (lock must be held)"""
+        rows = self._rows
+        
+        if rows.empty:
+            self._pairs = pd.DataFrame(columns=self.KEYS)
+            self._keys = np.empty(0, dtype=np.int64)
+            self._prefix = np.zeros((1, len(self.MEASURES)))
+            self._first = np.full(1, np.inf)
+            return
+        
+        pair_codes = rows.groupby(self.KEYS, sort=False, dropna=False).ngroup().to_numpy(np.int64)
+        days = rows['day'].to_numpy(np.int64)
+        order = np.lexsort((days, pair_codes))
+        
+        self._pairs = rows[self.KEYS].drop_duplicates().reset_index(drop=True)
+        self._keys = (pair_codes[order] << 32) | days[order]
+        
+        measures = rows[self.MEASURES].to_numpy(np.float64)[order]
+        self._prefix = np.vstack([np.zeros((1, len(self.MEASURES))), np.cumsum(measures, axis=0)])
+        
+        # Trailing sentinel so reduceat can take a segment ending at the last row
+        self._first = np.append(rows['first_line_id'].to_numpy(np.float64)[order], np.inf)
+    
+    def sync(self, through: Optional[date] = None) -> int:
+        """
+        Pull new transaction lines from NetSuite and persist the cube
+        
+        The first sync loads history_start through today; later syncs re-pull
+        only the trailing overlap_days before the covered end.
+        
+        Args:
+            through: Last day to load (defaults to today)
+        
+        Returns:
+            Number of transaction lines received
+        """
+        with self._sync_lock:
+            return self._sync(through or date.today())
+    
+    def _sync(self, through: date) -> int:
+        """Run one sync (sync lock must be held)"""
+        timer_start = time.perf_counter()
+        
+        with self._lock:
+            covered_end = self._covered_end
+        
+        if covered_end is None:
+            fetch_start = self.history_start
+        else:
+            fetch_start = max(self.history_start, covered_end - timedelta(days=self.overlap_days))
+        
+        try:
+            pages = self.fetch_lines(fetch_start.strftime("%Y-%m-%d"), through.strftime("%Y-%m-%d"))
+            fresh = self._daily_rows(pages)
+        except Exception:
+            self.sync_failures += 1
+            raise
+        
+        with self._lock:
+            kept = self._rows
+            if not kept.empty:
+                kept = kept[kept['day'] < self._day_number(fetch_start)]
+            frames = [frame for frame in (kept, fresh) if not frame.empty]
+            self._rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            self._covered_end = through
+            self._synced_at = datetime.now(timezone.utc)
+            self._build_prefix()
+            self.generation += 1
+        
+        self.save()
+        
+        self.sync_count += 1
+        self.last_sync_seconds = time.perf_counter() - timer_start
+        self.last_sync_type = 'full' if covered_end is None else 'incremental'
+        return self.last_sync_lines
+    
+    def is_stale(self) -> bool:
+        """Check whether the cube is behind today or older than the sync interval"""
+        with self._lock:
+            covered_end = self._covered_end
+            synced_at = self._synced_at
+        
+        if covered_end is None or covered_end < date.today():
+            return True
+        
+        age = (datetime.now(timezone.utc) - synced_at).total_seconds()
+        return age > self.sync_interval_seconds
+    
+    def sync_if_stale(self) -> bool:
+        """
+        Sync the cube if it is stale
+        
+        Callers arriving while another sync runs wait for it and then find the
+        cube fresh, so concurrent sessions trigger a single pull.
+        
+        Returns:
+            True if a sync ran
+        """
+        if not self.is_stale():
+            return False
+        
+        with self._sync_lock:
+            if not self.is_stale():
+                return False
+            
+            self._sync(date.today())
+            return True
+    
+    def covers(self, start_date: date, end_date: date) -> bool:
+        """Check whether every day of a date range is loaded in the cube"""
+        with self._lock:
+            covered_end = self._covered_end
+        
+        return covered_end is not None and self.history_start <= start_date and end_date <= covered_end
+    
+    def range_totals(self, start_date: date, end_date: date) -> pd.DataFrame:
+        """
+        Get item/customer totals for a date range from the prefix sums
+        
+        Args:
+            start_date: First day (inclusive)
+            end_date: Last day (inclusive)
+        
+        Returns:
+            DataFrame with one row per (item_id, customer_id) that sold in the
+            range, ordered by first_seen (the pair's lowest transaction ID)
+        """
+        self.range_queries += 1
+        start_day = self._day_number(start_date)
+        end_day = self._day_number(end_date)
+        
+        with self._lock:
+            pairs, keys, prefix, first = self._pairs, self._keys, self._prefix, self._first
+        
+        pair_keys = np.arange(len(pairs), dtype=np.int64) << 32
+        lo = np.searchsorted(keys, pair_keys | start_day, side='left')
+        hi = np.searchsorted(keys, pair_keys | end_day, side='right')
+        
+        active = hi > lo
+        if not active.any():
+            return pd.DataFrame()
+        
+        lo, hi = lo[active], hi[active]
+        
+        df = pairs[active].reset_index(drop=True)
+        df[self.MEASURES] = prefix[hi] - prefix[lo]
+        df['line_count'] = df['line_count'].round().astype(np.int64)
+        
+        # Segment minimums of the first transaction ID of each day in the range
+        df['first_seen'] = np.minimum.reduceat(first, np.column_stack([lo, hi]).ravel())[::2]
+        
+        return df.sort_values('first_seen', kind='stable').reset_index(drop=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cube metrics for monitoring
+        
+        Returns:
+            Dictionary with size, coverage, sync and query counters
+        """
+        with self._lock:
+            rows = len(self._rows)
+            pairs = len(self._pairs)
+            covered_end = self._covered_end
+            synced_at = self._synced_at
+        
+        return {
+            'rows': rows,
+            'pairs': pairs,
+            'history_start': self.history_start.isoformat(),
+            'covered_end': covered_end.isoformat() if covered_end else None,
+            'last_sync': synced_at.isoformat() if synced_at else None,
+            'generation': self.generation,
+            'sync_count': self.sync_count,
+            'sync_failures': self.sync_failures,
+            'last_sync_type': self.last_sync_type,
+            'last_sync_seconds': self.last_sync_seconds,
+            'last_sync_lines': self.last_sync_lines,
+            'range_queries': self.range_queries
+        }
+
+
+def create_daily_cube(connector, history_start: date, cache_dir: Optional[str] = None,
+                      sync_interval_seconds: float = 3600) -> DailyCube:
+    """
+    Create a daily sales cube backed by a NetSuite connector
+    
+    Args:
+        connector: NetSuiteConnector instance
+        history_start: First day kept in the cube
+        cache_dir: Directory for the persisted cube file, one subdirectory per
+                   account (None keeps it in memory)
+        sync_interval_seconds: Age after which the cube is synced incrementally
+    
+    Returns:
+        DailyCube, loaded from disk if available
+    """
+    def fetch_lines(start_date: str, end_date: str):
+        return connector.iter_sales_transactions(start_date, end_date, {'transaction_type': 'sales'})
+    
+    cube = DailyCube(
+        fetch_lines=fetch_lines,
+        history_start=history_start,
+        path=account_cache_path(cache_dir, connector.account_id, 'daily_cube.pkl'),
+        sync_interval_seconds=sync_interval_seconds
+    )
+    cube.load()
+    return cube
@@ -5,23 +5,525 @@ Handles data transformations, calculations, and business logic
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Any
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
+from netsuite_connector import AsyncNetSuiteConnector
+from result_cache import ResultCache, normalize_filter_value
+from singleflight import SingleFlight
+from master_data import cost_retail_frame
+from query_planner import FilterPlan, TopNQuery, VIEW_PUSHDOWN_FILTERS, date_partitions
+from query_engine import LINE_TOTALS, create_engine
+
+
+class TransactionAggregator:
+    """
+    Fold pages of transaction lines into running partial sums
+    
+    Lines are collapsed to one row per (item_id, customer_id) pair as pages
+    arrive, so peak memory scales with the number of distinct item/customer
+    combinations instead of the number of transaction lines. The pair grain
+    keeps every view answerable: style and customer totals are sums over
+    pairs, per-line cost/retail totals use line_count, and "first" attributes
+    follow first_seen (the position of the pair's first line in the stream).
+    """
+    
+    KEYS = ['item_id', 'customer_id']
+    SUM_FIELDS = ['sales_units', 'sales_dollars', 'returns']
+    
+    def __init__(self, consolidate_rows: int = 50_000, keys: Optional[List[str]] = None):
+        """
+        Initialize aggregator
+        
+        Args:
+            consolidate_rows: Pending partial rows buffered before they are
+                              merged into the running totals
+            keys: Columns lines are folded by (defaults to KEYS; the daily
+                  cube folds by day as well)
+        """
+        self.consolidate_rows = consolidate_rows
+        self.keys = list(keys or self.KEYS)
+        self.lines_seen = 0
+        self._totals: Optional[pd.DataFrame] = None
+        self._pending: List[pd.DataFrame] = []
+        self._pending_rows = 0
+    
+    def _fold(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Collapse rows sharing the same keys"""
+        agg_dict = {field: 'sum' for field in self.SUM_FIELDS}
+        agg_dict['line_count'] = 'sum'
+        agg_dict['first_seen'] = 'min'
+        return df.groupby(self.keys, sort=False, dropna=False).agg(agg_dict).reset_index()
+    
+    def _consolidate(self):
+        """Merge buffered page partials into the running totals"""
+        if not self._pending:
+            return
+        
+        frames = self._pending if self._totals is None else [self._totals] + self._pending
+        self._totals = self._fold(pd.concat(frames, ignore_index=True))
+        self._pending = []
+        self._pending_rows = 0
+    
+    def add_page(self, transactions: List[Dict]):
+        """
+        Fold one page of transaction records into the running totals
+        
+        Args:
+            transactions: Transaction records for a single page
+        """
+        if len(transactions) == 0:
+            return
+        
+        page = pd.DataFrame(transactions, columns=self.keys + self.SUM_FIELDS)
+        page[self.SUM_FIELDS] = page[self.SUM_FIELDS].fillna(0)
+        page['line_count'] = 1
+        page['first_seen'] = np.arange(self.lines_seen, self.lines_seen + len(page))
+        self.add_lines(page)
+    
+    def add_lines(self, lines: pd.DataFrame):
+        """
+        Fold prepared lines into the running totals
+        
+        Args:
+            lines: Lines with the key columns, SUM_FIELDS, line_count and
+                   first_seen (any orderable position, e.g. a line ID)
+        """
+        if lines.empty:
+            return
+        
+        self.lines_seen += len(lines)
+        
+        partial = self._fold(lines)
+        self._pending.append(partial)
+        self._pending_rows += len(partial)
+        
+        # Merge geometrically so the running totals are not re-grouped on every page
+        totals_rows = 0 if self._totals is None else len(self._totals)
+        if self._pending_rows >= max(self.consolidate_rows, totals_rows):
+            self._consolidate()
+    
+    def consume(self, pages) -> 'TransactionAggregator':
+        """
+        Fold every page produced by an iterable/generator of pages
+        
+        Args:
+            pages: Iterable of transaction record lists
+        
+        Returns:
+            self, for chaining
+        """
+        for page in pages:
+            self.add_page(page)
+        return self
+    
+    @classmethod
+    def combine(cls, partials: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Merge partial sums of consecutive line streams (e.g. date partitions)
+        
+        Args:
+            partials: Partial sums in stream order, each ordered by first_seen
+        
+        Returns:
+            DataFrame with one row per (item_id, customer_id), ordered by first_seen
+        """
+        partials = [partial for partial in partials if not partial.empty]
+        if not partials:
+            return pd.DataFrame()
+        
+        # Renumber across partials so a pair's first_seen is its earliest row overall
+        df = pd.concat(partials, ignore_index=True)
+        df['first_seen'] = np.arange(len(df))
+        
+        return cls()._fold(df).sort_values('first_seen', kind='stable').reset_index(drop=True)
+    
+    def result(self) -> pd.DataFrame:
+        """
+        Get the aggregated item/customer partial sums
+        
+        Returns:
+            DataFrame with one row per key combination, ordered by first_seen
+        """
+        self._consolidate()
+        
+        if self._totals is None:
+            return pd.DataFrame()
+        
+        return self._totals.sort_values('first_seen', kind='stable').reset_index(drop=True)
+
 
 class DataProcessor:
     """
     Process and transform NetSuite data according to business rules
     """
     
-    def __init__(self, netsuite_connector):
+    AGGREGATION_MODES = ('client', 'server')
+    RANK_METRICS = ('sales_units', 'sales_dollars', 'net_units', 'returns', 'gross_profit', 'gm_percent')
+    
+    # Fact table columns stored dictionary-encoded (categorical): the item and
+    # customer IDs, whose integer codes act as surrogate keys, and every
+    # descriptive attribute repeated across pairs
+    CATEGORICAL_COLUMNS = ['item_id', 'customer_id', 'style', 'material_desc', 'color_desc', 'category',
+                           'vendor', 'brand', 'customer', 'territory', 'customer_category']
+    
+    # Fact measures stored as integers when compact_dtypes is on
+    UNIT_COLUMNS = ['sales_units', 'returns']
+    CENTS_COLUMNS = ['sales_dollars', 'unit_cost', 'unit_retail']
+    
+    # View aggregations: output column -> (function, fact column). Style views
+    # take the first unit cost/retail; customer views sum them over every line.
+    STYLE_AGGREGATES = {
+        'sales_units': ('sum', 'sales_units'),
+        'sales_dollars': ('sum', 'sales_dollars'),
+        'returns': ('sum', 'returns'),
+        'cost': ('first', 'unit_cost'),
+        'retail': ('first', 'unit_retail'),
+        'material_desc': ('first', 'material_desc'),
+        'color_desc': ('first', 'color_desc'),
+        'category': ('first', 'category'),
+        'vendor': ('first', 'vendor')
+    }
+    CUSTOMER_AGGREGATES = {
+        'sales_units': ('sum', 'sales_units'),
+        'sales_dollars': ('sum', 'sales_dollars'),
+        'returns': ('sum', 'returns'),
+        'cost': ('sum', 'line_cost'),
+        'retail': ('sum', 'line_retail'),
+        'territory': ('first', 'territory'),
+        'customer_category': ('first', 'customer_category'),
+        'category': ('first', 'category'),
+        'vendor': ('first', 'vendor')
+    }
+    CUSTOMER_DRILLDOWN_AGGREGATES = {
+        'sales_units': ('sum', 'sales_units'),
+        'sales_dollars': ('sum', 'sales_dollars'),
+        'returns': ('sum', 'returns'),
+        'cost': ('sum', 'line_cost'),
+        'retail': ('sum', 'line_retail'),
+        'territory': ('first', 'territory')
+    }
+    
+    def __init__(self, netsuite_connector, max_concurrency: int = 3, aggregation: str = 'client',
+                 cache_ttl_seconds: Optional[float] = 3600,
+                 result_cache_bytes: int = 64 * 1024 * 1024,
+                 fact_cache_bytes: int = 512 * 1024 * 1024,
+                 item_cache=None, customer_cache=None, cost_cache=None,
+                 pushdown_filters: Tuple[str, ...] = VIEW_PUSHDOWN_FILTERS,
+                 daily_cube=None, warehouse=None,
+                 engine: str = 'pandas', engine_options: Optional[Dict[str, Any]] = None,
+                 compact_dtypes: bool = False, range_partitions: bool = False,
+                 partition_cache_bytes: int = 256 * 1024 * 1024, singleflight: Optional[SingleFlight] = None):
         """
         Initialize data processor
         
         Args:
             netsuite_connector: NetSuiteConnector instance
+            max_concurrency: Worker threads fanning out independent fetches (the
+                             connector's shared limiter caps the RESTlet
+                             requests actually in flight)
+            aggregation: 'client' streams transaction lines and folds them locally,
+                         'server' asks the RESTlet for item/customer totals
+            cache_ttl_seconds: Seconds cached fact tables and results stay valid
+            result_cache_bytes: Size budget for memoized view results
+            fact_cache_bytes: Size budget for cached fact tables
+            item_cache: Optional MasterDataCache serving item attributes locally
+            customer_cache: Optional MasterDataCache serving customer attributes locally
+            cost_cache: Optional CostRetailCache serving versioned cost/retail values
+            pushdown_filters: Filters evaluated by the RESTlet search (the rest
+                              are applied locally before grouping); batched
+                              drilldowns also push their style/customer list
+            daily_cube: Optional DailyCube answering date ranges it covers
+                        without pulling transaction lines
+            warehouse: Optional ParquetWarehouse read instead of the RESTlet
+                       for date ranges it covers
+            engine: Query engine running the view aggregations ('pandas', 'duckdb'
+                    or 'polars')
+            engine_options: Engine-specific options (e.g. threads, memory_limit)
+            compact_dtypes: Store units as int32 and money as int64 cents in fact
+                            tables (for whole-unit quantities); views convert
+                            back to dollars
+            range_partitions: Fetch NetSuite date ranges as calendar month/week/day
+                              partitions cached individually, so overlapping
+                              ranges only fetch the partitions they do not share
+            partition_cache_bytes: Size budget for cached partition partial sums
+            singleflight: SingleFlight shared by processors in the process, so
+                          concurrent identical fact table builds (e.g. every
+                          session opening the default view) run once
         """
+        if aggregation not in self.AGGREGATION_MODES:
+            raise ValueError(f"Unsupported aggregation mode: {aggregation}")
+        
         self.ns = netsuite_connector
+        self.aggregation = aggregation
+        self.item_cache = item_cache
+        self.customer_cache = customer_cache
+        self.cost_cache = cost_cache
+        # Cost/retail generation joined onto the cached fact tables
+        self._applied_cost_generation = cost_cache.generation if cost_cache is not None else None
+        self.pushdown_filters = pushdown_filters
+        self.daily_cube = daily_cube
+        # Cube generation the cached fact tables and views were built from
+        self._cube_generation = daily_cube.generation if daily_cube is not None else None
+        self.warehouse = warehouse
+        self.engine = create_engine(engine, **(engine_options or {}))
+        self.compact_dtypes = compact_dtypes
+        self.range_partitions = range_partitions
+        self.singleflight = singleflight if singleflight is not None else SingleFlight()
+        # Everything besides the date range and filters that shapes a built fact
+        # table; only processors agreeing on all of it share a build
+        self._build_settings = (
+            id(netsuite_connector), aggregation, compact_dtypes, range_partitions, tuple(pushdown_filters),
+            self.engine.name, id(item_cache), id(customer_cache), id(cost_cache), id(daily_cube), id(warehouse)
+        )
+        
+        # Enriched fact tables per date range, and memoized view results keyed
+        # by a normalized filter signature
+        self.fact_cache = ResultCache(max_bytes=fact_cache_bytes, ttl_seconds=cache_ttl_seconds)
+        self.result_cache = ResultCache(max_bytes=result_cache_bytes, ttl_seconds=cache_ttl_seconds)
+        self.partition_cache = ResultCache(max_bytes=partition_cache_bytes, ttl_seconds=cache_ttl_seconds)
+        self.max_concurrency = max_concurrency
+        self.async_ns = AsyncNetSuiteConnector(netsuite_connector)
+    
+    def _run_async(self, coro):
+        """
+        Run a coroutine to completion from synchronous code
+        
+        Args:
+            coro: Coroutine to run
+        
+        Returns:
+            Result of the coroutine
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        
+        # Already inside an event loop (e.g. a notebook) - run on a helper thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+    
+    def _lookup_master(self, cache, ids: List[str]) -> pd.DataFrame:
+        """
+        Serve master records from a local cache, delta-refreshing it when stale
+        
+        Args:
+            cache: MasterDataCache instance
+            ids: Record IDs to look up
+        
+        Returns:
+            DataFrame of matching records
+        """
+        try:
+            cache.refresh_if_stale()
+        except Exception as e:
+            print(f"{cache.name} refresh failed, serving cached records: {str(e)}")
+        
+        return cache.lookup(ids)
+    
+    async def _gather_master_data(self, item_ids: List[str],
+                                  customer_ids: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Fire the independent master data lookups concurrently"""
+        async def fetch_items():
+            if self.item_cache is not None:
+                return await asyncio.to_thread(self._lookup_master, self.item_cache, item_ids)
+            return pd.DataFrame(await self.async_ns.get_item_master(item_ids))
+        
+        async def fetch_customers():
+            if self.customer_cache is not None:
+                return await asyncio.to_thread(self._lookup_master, self.customer_cache, customer_ids)
+            return pd.DataFrame(await self.async_ns.get_customer_master(customer_ids))
+        
+        async def fetch_cost_retail():
+            if self.cost_cache is not None:
+                return self.cost_cache.frame()
+            return cost_retail_frame(await self.async_ns.get_cost_retail_data(item_ids))
+        
+        return await asyncio.gather(
+            fetch_items(),
+            fetch_customers(),
+            fetch_cost_retail()
+        )
+    
+    def _fetch_master_data(self, item_ids: List[str],
+                           customer_ids: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Fetch item, customer and cost/retail master data concurrently
+        
+        The lookups only depend on the transaction list, so they are issued
+        together and take roughly as long as the slowest one. Item and customer
+        attributes come from the local master caches when they are configured.
+        
+        Args:
+            item_ids: Item IDs present in the transactions
+            customer_ids: Customer IDs present in the transactions
+        
+        Returns:
+            Tuple of (items_df, customers_df, cost_retail) where cost_retail is
+            an item-indexed cost/retail frame
+        """
+        return tuple(self._run_async(self._gather_master_data(item_ids, customer_ids)))
+    
+    def _aggregate_transactions(self, start_str: str, end_str: str, filters: Dict) -> pd.DataFrame:
+        """
+        Get item/customer partial sums for a date range
+        
+        Ranges held locally are answered from the daily cube's prefix sums or
+        from warehouse lines. Otherwise the range is fetched from NetSuite,
+        whole or as cached calendar partitions (see range_partitions).
+        
+        Args:
+            start_str: Start date (YYYY-MM-DD)
+            end_str: End date (YYYY-MM-DD)
+            filters: RESTlet filters
+        
+        Returns:
+            DataFrame with one row per (item_id, customer_id) pair
+        """
+        source = self._local_source(start_str, end_str, filters)
+        
+        if source is not None and source is self.daily_cube:
+            start_date = datetime.strptime(start_str, "%Y-%m-%d").date()
+            end_date = datetime.strptime(end_str, "%Y-%m-%d").date()
+            return source.range_totals(start_date, end_date)
+        
+        if source is not None and self.engine.scans_parquet:
+            files = source.partition_files(start_date=datetime.strptime(start_str, "%Y-%m-%d").date(),
+                                           end_date=datetime.strptime(end_str, "%Y-%m-%d").date())
+            return self.engine.fold_parquet(files, start_str, end_str)
+        
+        if source is not None:
+            pages = source.iter_sales_transactions(start_str, end_str, filters)
+            return TransactionAggregator().consume(pages).result()
+        
+        if self.range_partitions:
+            return self._aggregate_partitions(start_str, end_str, filters)
+        
+        return self._fetch_totals(start_str, end_str, filters)
+    
+    def _fetch_totals(self, start_str: str, end_str: str, filters: Dict) -> pd.DataFrame:
+        """
+        Fetch item/customer partial sums for a date range from NetSuite
+        
+        In 'client' mode transaction pages are streamed and folded locally; in
+        'server' mode the RESTlet returns the totals directly.
+        
+        Args:
+            start_str: Start date (YYYY-MM-DD)
+            end_str: End date (YYYY-MM-DD)
+            filters: RESTlet filters
+        
+        Returns:
+            DataFrame with one row per (item_id, customer_id) pair
+        """
+        if self.aggregation == 'server':
+            summary = self.ns.get_sales_summary(start_str, end_str, filters)
+            if not summary:
+                return pd.DataFrame()
+            
+            df = pd.DataFrame(summary).rename(columns={'first_line_id': 'first_seen'})
+            return df.sort_values('first_seen', kind='stable').reset_index(drop=True)
+        
+        pages = self.ns.iter_sales_transactions(start_str, end_str, filters)
+        return TransactionAggregator().consume(pages).result()
+    
+    def _aggregate_partitions(self, start_str: str, end_str: str, filters: Dict) -> pd.DataFrame:
+        """
+        Compose a date range's partial sums from calendar partitions
+        
+        Partitions already cached are reused; missing ones are fetched
+        concurrently and cached, so a shifted or overlapping range only
+        fetches its new edge partitions. A cold range runs one search per
+        partition (a year can be ~23); every fetch goes through the
+        connector's shared limiter, so they queue behind requests from other
+        sessions rather than adding to them. "First" attributes follow the
+        partitions' chronological order.
+        
+        Args:
+            start_str: Start date (YYYY-MM-DD)
+            end_str: End date (YYYY-MM-DD)
+            filters: RESTlet filters
+        
+        Returns:
+            DataFrame with one row per (item_id, customer_id) pair
+        """
+        filters_key = tuple(sorted((name, normalize_filter_value(value)) for name, value in filters.items()))
+        
+        keys = [(start.isoformat(), end.isoformat(), filters_key)
+                for start, end in date_partitions(datetime.strptime(start_str, "%Y-%m-%d").date(),
+                                                  datetime.strptime(end_str, "%Y-%m-%d").date())]
+        partials = {key: self.partition_cache.get(key) for key in keys}
+        missing = [key for key in keys if partials[key] is None]
+        
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                fetched = executor.map(lambda key: self._fetch_totals(key[0], key[1], filters), missing)
+                for key, partial in zip(missing, fetched):
+                    self.partition_cache.put(key, partial)
+                    partials[key] = partial
+        
+        return TransactionAggregator.combine([partials[key] for key in keys])
+    
+    def _local_source(self, start_str: str, end_str: str, filters: Optional[Dict] = None):
+        """
+        Pick a local transaction source covering a date range
+        
+        The daily cube and the warehouse hold every sales line without item or
+        customer attributes, so they only serve unfiltered requests; predicates
+        are applied to their fact rows locally.
+        
+        Args:
+            start_str: Start date (YYYY-MM-DD)
+            end_str: End date (YYYY-MM-DD)
+            filters: RESTlet filters of the request, if already planned
+        
+        Returns:
+            The daily cube or warehouse covering the range, or None
+        """
+        if filters and any(name != 'transaction_type' for name in filters):
+            return None
+        
+        start_date = datetime.strptime(start_str, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end_str, "%Y-%m-%d").date()
+        
+        for source in (self.daily_cube, self.warehouse):
+            if source is not None and source.covers(start_date, end_date):
+                return source
+        
+        return None
+    
+    def sync_daily_cube(self) -> bool:
+        """
+        Extend the daily cube with new transaction lines when it is stale
+        
+        Cached fact tables and views may include re-pulled days, so both are
+        dropped once the cube changes (see _check_cube_generation).
+        
+        Returns:
+            True if the cube was synced
+        """
+        if self.daily_cube is None:
+            return False
+        
+        try:
+            synced = self.daily_cube.sync_if_stale()
+        except Exception as e:
+            print(f"daily_cube sync failed, serving the loaded days: {str(e)}")
+            return False
+        
+        self._check_cube_generation()
+        return synced
+    
+    def _check_cube_generation(self):
+        """Drop cached results built before the shared cube last changed, whichever session synced it"""
+        if self.daily_cube is None or self.daily_cube.generation == self._cube_generation:
+            return
+        
+        self._cube_generation = self.daily_cube.generation
+        self.clear_cache()
     
     def _handle_nulls(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -29,7 +531,7 @@ class DataProcessor:
         
         Args:
             df: Input dataframe
-            
+        
         Returns:
             Dataframe with nulls handled
         """
@@ -58,7 +560,7 @@ class DataProcessor:
         
         Args:
             df: Input dataframe with base metrics
-            
+        
         Returns:
             Dataframe with derived metrics added
         """
@@ -79,295 +581,451 @@ class DataProcessor:
         
         return df
     
-    def _apply_filters(self, df: pd.DataFrame, category: List[str], vendor: List[str], 
-                      brand: Optional[List[str]] = None, 
-                      territory: Optional[List[str]] = None) -> pd.DataFrame:
+    @staticmethod
+    def _attach_cost_retail(df: pd.DataFrame, cost_retail: pd.DataFrame) -> pd.DataFrame:
         """
-        Apply user-selected filters to dataframe
+        Set corrected per-unit cost/retail columns on fact rows
+        
+        A single vectorized reindex against the item-indexed cost/retail frame
+        replaces a per-row dictionary lookup; items without corrected values
+        get 0, as before.
         
         Args:
-            df: Input dataframe
-            category: Category filter values
-            vendor: Vendor filter values
-            brand: Optional brand filter values
-            territory: Optional territory filter values
-            
+            df: Fact rows with an item_id column
+            cost_retail: Item-indexed frame from cost_retail_frame
+        
         Returns:
-            Filtered dataframe
+            Dataframe with unit_cost and unit_retail columns
+        """
+        item_ids = df['item_id']
+        
+        if isinstance(item_ids.dtype, pd.CategoricalDtype):
+            # Look up each distinct item once and expand by surrogate key
+            values = cost_retail.reindex(item_ids.cat.categories.astype(str))
+            codes = item_ids.cat.codes.to_numpy()
+            for source, target in (('cost', 'unit_cost'), ('retail', 'unit_retail')):
+                # Missing IDs (code -1) pick the trailing 0
+                lookup = np.append(values[source].fillna(0).to_numpy(), 0.0)
+                df[target] = lookup[codes]
+            return df
+        
+        values = cost_retail.reindex(item_ids.astype(str))
+        df['unit_cost'] = values['cost'].fillna(0).to_numpy()
+        df['unit_retail'] = values['retail'].fillna(0).to_numpy()
+        return df
+    
+    @classmethod
+    def _encode_dimensions(cls, df: pd.DataFrame) -> pd.DataFrame:
         """
-        # Category filter
-        if category and "All" not in category:
-            df = df[df['category'].isin(category)]
+        Dictionary-encode the ID and attribute columns of a fact table
         
-        # Vendor filter
-        if vendor and "All" not in vendor:
-            df = df[df['vendor'].isin(vendor)]
+        Each distinct value is stored once and rows hold small integer codes,
+        which shrinks the table several-fold and lets filters and group-bys
+        work on codes instead of Python strings.
         
-        # Brand filter (if provided)
-        if brand and "All" not in brand and 'brand' in df.columns:
-            df = df[df['brand'].isin(brand)]
+        Args:
+            df: Fact table
         
-        # Territory filter (if provided)
-        if territory and "All" not in territory and 'territory' in df.columns:
-            df = df[df['territory'].isin(territory)]
+        Returns:
+            Dataframe with categorical ID/attribute columns
+        """
+        for field in cls.CATEGORICAL_COLUMNS:
+            if field in df.columns:
+                df[field] = df[field].astype('category')
         
         return df
     
-    def get_top_40_styles(self, start_date, end_date, category: List[str], 
-                         vendor: List[str], brand: Optional[List[str]] = None) -> pd.DataFrame:
+    @staticmethod
+    def _to_cents(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        """Convert dollar columns to int64 cents"""
+        for field in columns:
+            df[field] = (df[field] * 100).round().astype(np.int64)
+        
+        return df
+    
+    @classmethod
+    def _compact_numerics(cls, df: pd.DataFrame) -> pd.DataFrame:
         """
-        Get Top 40 Styles ranked by units
+        Store fact measures in compact integer dtypes
+        
+        Units become int32 and money int64 cents, halving the measure columns
+        and making sums exact, so totals over long windows do not drift.
         
         Args:
-            start_date: Start date
-            end_date: End date
-            category: Category filter
-            vendor: Vendor filter
-            brand: Optional brand filter
-            
+            df: Fact table with float measures
+        
         Returns:
-            DataFrame with Top 40 styles
+            Dataframe with integer units, line counts and cents
         """
-        # Convert dates to strings
-        start_str = start_date.strftime("%Y-%m-%d")
-        end_str = end_date.strftime("%Y-%m-%d")
+        for field in cls.UNIT_COLUMNS:
+            df[field] = df[field].round().astype(np.int32)
         
-        # Get sales transactions from NetSuite
-        filters = {
-            'transaction_type': 'sales',
-            'category': category if "All" not in category else None,
-            'vendor': vendor if "All" not in vendor else None,
-            'brand': brand if brand and "All" not in brand else None
-        }
+        df['line_count'] = df['line_count'].astype(np.int32)
+        return cls._to_cents(df, cls.CENTS_COLUMNS)
+    
+    @staticmethod
+    def _decode_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+        """Turn categorical result columns back into plain values for callers"""
+        for field in df.columns:
+            if isinstance(df[field].dtype, pd.CategoricalDtype):
+                df[field] = df[field].astype(df[field].cat.categories.dtype)
         
-        transactions = self.ns.get_sales_transactions(start_str, end_str, filters)
+        return df
+    
+    def sync_cost_retail(self) -> bool:
+        """
+        Pick up a new cost/retail version and re-apply it to cached results
         
-        if not transactions:
-            return pd.DataFrame()
+        Version checks are throttled by the cost cache. When Merchandising
+        publishes a corrected cost file, the new unit cost/retail values are
+        re-joined onto every cached fact table in memory (no transaction
+        re-pull) and memoized views are dropped, so the next request
+        recomputes gross_profit and gm_percent from the updated facts.
         
-        # Convert to DataFrame
-        df = pd.DataFrame(transactions)
+        The cost cache is shared between sessions, so the version is applied
+        whenever it differs from the one this processor last joined, whichever
+        session's check loaded it.
         
-        # Get item master data for additional attributes
-        item_ids = df['item_id'].unique().tolist()
-        items = self.ns.get_item_master(item_ids)
-        items_df = pd.DataFrame(items)
+        Returns:
+            True if a new version was applied
+        """
+        if self.cost_cache is None:
+            return False
         
-        # Get corrected cost/retail data
-        cost_retail = self.ns.get_cost_retail_data(item_ids)
+        try:
+            self.cost_cache.check_if_due()
+        except Exception as e:
+            print(f"cost_retail version check failed, keeping cached values: {str(e)}")
         
-        # Merge item attributes
-        if not items_df.empty:
-            df = df.merge(items_df[['item_id', 'style', 'material_desc', 'color_desc', 
-                                    'category', 'vendor']], 
-                         on='item_id', how='left')
+        return self._apply_loaded_cost_version()
+    
+    def _apply_loaded_cost_version(self) -> bool:
+        """Apply the cost cache's loaded version if this processor has not joined it yet"""
+        if self.cost_cache is None or self.cost_cache.generation == self._applied_cost_generation:
+            return False
         
-        # Apply corrected cost/retail values
-        df['cost'] = df['item_id'].map(lambda x: cost_retail.get(x, {}).get('cost', 0))
-        df['retail'] = df['item_id'].map(lambda x: cost_retail.get(x, {}).get('retail', 0))
+        self.apply_cost_retail_version()
+        return True
+    
+    def apply_cost_retail_version(self):
+        """Re-apply the cached cost/retail table to every cached fact table (keeping their TTL)"""
+        generation = self.cost_cache.generation
+        cost_retail = self.cost_cache.frame()
+        
+        for key, fact in self.fact_cache.items():
+            if fact.empty:
+                continue
+            
+            fact = self._attach_cost_retail(fact.copy(), cost_retail)
+            if self.compact_dtypes:
+                fact = self._to_cents(fact, ['unit_cost', 'unit_retail'])
+            
+            self.fact_cache.replace(key, fact)
         
-        # Handle nulls
-        df = self._handle_nulls(df)
+        self._applied_cost_generation = generation
+        self.result_cache.clear()
+    
+    def _build_fact_table(self, start_str: str, end_str: str, filters: Dict) -> pd.DataFrame:
+        """
+        Build the enriched fact table for a date range
         
-        # Aggregate by style
-        agg_dict = {
-            'sales_units': 'sum',
-            'sales_dollars': 'sum',
-            'returns': 'sum',
-            'cost': 'first',  # Take first cost value (should be same for all transactions of same style)
-            'retail': 'first',
-            'material_desc': 'first',
-            'color_desc': 'first',
-            'category': 'first',
-            'vendor': 'first'
-        }
+        Item/customer partial sums are joined to item attributes, customer
+        attributes and corrected unit cost/retail, so every view for the range
+        can be answered locally.
+        
+        Args:
+            start_str: Start date (YYYY-MM-DD)
+            end_str: End date (YYYY-MM-DD)
+            filters: RESTlet filters pushed down into the transaction search
+        
+        Returns:
+            DataFrame with one row per (item_id, customer_id) pair
+        """
+        df = self._aggregate_transactions(start_str, end_str, filters)
+        
+        if df.empty:
+            return pd.DataFrame()
+        
+        # Rows arrive in first_seen order; renumber so the order is also unique
+        # and every engine resolves "first" attributes to the same row
+        df['first_seen'] = np.arange(len(df))
+        
+        # Get item master, customer master and cost/retail concurrently
+        item_ids = df['item_id'].unique().tolist()
+        customer_ids = df['customer_id'].unique().tolist()
+        items_df, customers_df, cost_retail = self._fetch_master_data(item_ids, customer_ids)
         
-        df_grouped = df.groupby('style').agg(agg_dict).reset_index()
+        # Merge item attributes
+        if not items_df.empty:
+            item_cols = ['item_id', 'style', 'material_desc', 'color_desc', 'category', 'vendor']
+            if 'brand' in items_df.columns:
+                item_cols.append('brand')
+            df = df.merge(items_df[item_cols], on='item_id', how='left')
         
-        # Calculate derived metrics
-        df_grouped = self._calculate_derived_metrics(df_grouped)
+        # Merge customer attributes
+        if not customers_df.empty:
+            df = df.merge(customers_df[['customer_id', 'customer', 'territory', 'customer_category']], 
+                         on='customer_id', how='left')
         
-        # Apply filters
-        df_grouped = self._apply_filters(df_grouped, category, vendor, brand)
+        # Apply corrected per-unit cost/retail values
+        df = self._attach_cost_retail(df, cost_retail)
         
-        # Rank by sales units (descending)
-        df_grouped = df_grouped.sort_values('sales_units', ascending=False)
+        # Handle nulls
+        df = self._handle_nulls(df)
         
-        # Take top 40
-        df_top40 = df_grouped.head(40).reset_index(drop=True)
+        # Dictionary-encode IDs and attributes
+        df = self._encode_dimensions(df)
         
-        # Add rank column
-        df_top40.insert(0, 'rank', range(1, len(df_top40) + 1))
+        if self.compact_dtypes:
+            df = self._compact_numerics(df)
         
-        return df_top40
+        return df
     
-    def get_top_40_customers(self, start_date, end_date, category: List[str], 
-                            vendor: List[str], brand: Optional[List[str]] = None,
-                            territory: Optional[List[str]] = None) -> pd.DataFrame:
+    def _get_fact_table(self, start_date, end_date, plan: FilterPlan) -> Tuple[pd.DataFrame, Dict]:
         """
-        Get Top 40 Customers ranked by units
+        Get the fact table serving a filter plan, building it on first use
+        
+        Fact tables are cached per date range and pushed-down predicates. A
+        broader fact table already cached for the range (unfiltered, or with
+        a subset of the request's predicates, such as a batched drilldown
+        holding the value) also serves the request, with every predicate
+        applied locally. Ranges held in the daily cube or
+        warehouse are always built unfiltered from them.
         
         Args:
             start_date: Start date
             end_date: End date
-            category: Category filter
-            vendor: Vendor filter
-            brand: Optional brand filter
-            territory: Optional territory filter
-            
+            plan: FilterPlan for the request
+        
         Returns:
-            DataFrame with Top 40 customers
+            Tuple of (cached fact table (treat as read-only), predicates still
+            to apply to its rows)
         """
-        # Convert dates to strings
         start_str = start_date.strftime("%Y-%m-%d")
         end_str = end_date.strftime("%Y-%m-%d")
         
-        # Get sales transactions from NetSuite
-        filters = {
-            'transaction_type': 'sales',
-            'category': category if "All" not in category else None,
-            'vendor': vendor if "All" not in vendor else None,
-            'brand': brand if brand and "All" not in brand else None,
-            'territory': territory if territory and "All" not in territory else None
-        }
+        self.sync_cost_retail()
+        self._check_cube_generation()
         
-        transactions = self.ns.get_sales_transactions(start_str, end_str, filters)
+        if self._local_source(start_str, end_str) is not None:
+            # Locally held ranges are built unfiltered and sliced locally
+            plan = FilterPlan(plan.predicates, pushdown_fields=())
         
-        if not transactions:
-            return pd.DataFrame()
+        key = (start_str, end_str, plan.pushdown_signature())
+        fact = self.fact_cache.get(key)
+        if fact is not None:
+            return fact, plan.residual
         
-        # Convert to DataFrame
-        df = pd.DataFrame(transactions)
+        if plan.predicates:
+            broader = self.fact_cache.find(
+                lambda cached: cached[:2] == (start_str, end_str) and plan.subsumed_by(cached[2]))
+            if broader is not None:
+                return broader[1], plan.predicates
         
-        # Get customer master data
-        customer_ids = df['customer_id'].unique().tolist()
-        customers = self.ns.get_customer_master(customer_ids)
-        customers_df = pd.DataFrame(customers)
+        build_key = ('fact',) + self._build_settings + key
+        fact = self.singleflight.do(build_key, self._build_fact_table, start_str, end_str, plan.restlet_filters())
+        self.fact_cache.put(key, fact)
+        return fact, plan.residual
+    
+    def _grouped_metrics(self, query: TopNQuery, plan: FilterPlan) -> pd.DataFrame:
+        """
+        Grouped metrics stage: aggregate matching fact rows and derive metrics
         
-        # Get item data for category/vendor
-        item_ids = df['item_id'].unique().tolist()
-        items = self.ns.get_item_master(item_ids)
-        items_df = pd.DataFrame(items)
+        Supported predicates are pushed down to the RESTlet search; the rest
+        are applied to fact rows by the query engine before grouping. The
+        result is cached, so queries that only differ in ranking metric or N
+        share it.
         
-        # Get cost/retail data
-        cost_retail = self.ns.get_cost_retail_data(item_ids)
+        Args:
+            query: Query being executed
+            plan: FilterPlan of the query
         
-        # Merge customer attributes
-        if not customers_df.empty:
-            df = df.merge(customers_df[['customer_id', 'customer', 'territory', 'customer_category']], 
-                         on='customer_id', how='left')
+        Returns:
+            One row per group with derived metrics (empty if nothing matches)
+        """
+        key = query.group_signature(plan)
+        grouped = self.result_cache.get(key)
+        if grouped is not None:
+            return grouped
+        
+        df, residual = self._get_fact_table(query.start_date, query.end_date, plan)
+        
+        grouped = self._decode_categoricals(self.engine.aggregate(df, residual, query.group_by, query.aggregates))
+        
+        if not grouped.empty:
+            if self.compact_dtypes:
+                # Back to display units at the edge
+                for output, (_, source) in query.aggregates.items():
+                    unit_source = LINE_TOTALS[source][0] if source in LINE_TOTALS else source
+                    if unit_source in self.CENTS_COLUMNS:
+                        grouped[output] = grouped[output] / 100
+            
+            grouped = self._calculate_derived_metrics(grouped)
         
-        # Merge item attributes for filtering
-        if not items_df.empty:
-            df = df.merge(items_df[['item_id', 'category', 'vendor']], 
-                         on='item_id', how='left')
+        self.result_cache.put(key, grouped)
+        return grouped
+    
+    @staticmethod
+    def _select_top_n(df: pd.DataFrame, n: Optional[int], metric: str, key: str) -> pd.DataFrame:
+        """
+        Select the top n rows by a metric without sorting every group
         
-        # Apply corrected cost/retail
-        df['cost'] = df['item_id'].map(lambda x: cost_retail.get(x, {}).get('cost', 0))
-        df['retail'] = df['item_id'].map(lambda x: cost_retail.get(x, {}).get('retail', 0))
+        A linear-time nlargest finds the n-th best value; only rows at or above
+        it are sorted. Ties are broken by the key column (ascending), so the
+        same data always yields the same ranking.
         
-        # Handle nulls
-        df = self._handle_nulls(df)
+        Args:
+            df: Aggregated rows
+            n: Number of rows to keep (None sorts and keeps every row)
+            metric: Column to rank by (descending)
+            key: Column used to break ties (ascending)
         
-        # Aggregate by customer
-        agg_dict = {
-            'sales_units': 'sum',
-            'sales_dollars': 'sum',
-            'returns': 'sum',
-            'cost': 'sum',  # Sum costs across all items
-            'retail': 'sum',  # Sum retail across all items
-            'territory': 'first',
-            'customer_category': 'first',
-            'category': 'first',
-            'vendor': 'first'
-        }
+        Returns:
+            Top n rows in rank order
+        """
+        if n is not None and len(df) > n:
+            threshold = df[metric].nlargest(n).iloc[-1]
+            df = df[df[metric] >= threshold]
         
-        df_grouped = df.groupby('customer').agg(agg_dict).reset_index()
+        df = df.sort_values([metric, key], ascending=[False, True], kind='stable')
+        return (df if n is None else df.head(n)).reset_index(drop=True)
+    
+    def execute(self, query: TopNQuery) -> pd.DataFrame:
+        """
+        Execute a view query through the shared, cached stages
         
-        # Calculate derived metrics
-        df_grouped = self._calculate_derived_metrics(df_grouped)
+        Stages: fact table (per date range and pushed-down filters) -> grouped
+        metrics (per filters and grouping) -> ordering, top N and rank (per
+        query). Each stage is cached, so a repeated query is a lookup and a
+        re-ranked one reuses the grouped metrics.
         
-        # Apply filters
-        df_grouped = self._apply_filters(df_grouped, category, vendor, brand, territory)
+        Args:
+            query: TopNQuery to run
         
-        # Rank by sales units (descending)
-        df_grouped = df_grouped.sort_values('sales_units', ascending=False)
+        Returns:
+            DataFrame of ordered groups (callers receive their own copy)
+        """
+        if query.metric not in self.RANK_METRICS:
+            raise ValueError(f"Unsupported ranking metric: {query.metric}")
         
-        # Take top 40
-        df_top40 = df_grouped.head(40).reset_index(drop=True)
+        if query.top_n is not None and query.top_n < 1:
+            raise ValueError("top_n must be at least 1")
         
-        # Add rank column
-        df_top40.insert(0, 'rank', range(1, len(df_top40) + 1))
+        # Another session may have synced the shared cube or loaded a new cost version
+        self._check_cube_generation()
+        self._apply_loaded_cost_version()
+        
+        plan = query.filter_plan(self.pushdown_filters)
+        
+        key = query.signature(plan)
+        result = self.result_cache.get(key)
+        
+        if result is None:
+            grouped = self._grouped_metrics(query, plan)
+            
+            if grouped.empty:
+                result = pd.DataFrame()
+            else:
+                result = self._select_top_n(grouped, query.top_n, query.metric, query.group_by)
+                if query.ranked:
+                    result.insert(0, 'rank', range(1, len(result) + 1))
+            
+            self.result_cache.put(key, result)
         
-        return df_top40
+        return result.copy()
     
-    def get_customers_by_style(self, style: str, start_date, end_date) -> pd.DataFrame:
+    def clear_cache(self):
+        """Drop all cached partitions, fact tables and memoized results"""
+        self.fact_cache.clear()
+        self.result_cache.clear()
+        self.partition_cache.clear()
+    
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
         """
-        Get all customers who purchased a specific style (drilldown)
+        Get hit/miss counters and sizes for the processor caches
         
-        Args:
-            style: Style name
-            start_date: Start date
-            end_date: End date
-            
         Returns:
-            DataFrame with customer purchase details for the style
+            Dictionary of cache name to cache statistics
         """
-        # Convert dates to strings
-        start_str = start_date.strftime("%Y-%m-%d")
-        end_str = end_date.strftime("%Y-%m-%d")
-        
-        # Get transactions filtered by style
-        filters = {
-            'transaction_type': 'sales',
-            'style': style
+        stats = {
+            'results': self.result_cache.stats(),
+            'fact_tables': self.fact_cache.stats(),
+            'partitions': self.partition_cache.stats()
         }
         
-        transactions = self.ns.get_sales_transactions(start_str, end_str, filters)
-        
-        if not transactions:
-            return pd.DataFrame()
-        
-        df = pd.DataFrame(transactions)
+        for cache in (self.item_cache, self.customer_cache, self.cost_cache, self.daily_cube,
+                      self.warehouse, self.singleflight):
+            if cache is not None:
+                stats[cache.name] = cache.stats()
         
-        # Get customer data
-        customer_ids = df['customer_id'].unique().tolist()
-        customers = self.ns.get_customer_master(customer_ids)
-        customers_df = pd.DataFrame(customers)
-        
-        # Get cost/retail
-        item_ids = df['item_id'].unique().tolist()
-        cost_retail = self.ns.get_cost_retail_data(item_ids)
-        
-        # Merge customer names
-        if not customers_df.empty:
-            df = df.merge(customers_df[['customer_id', 'customer', 'territory']], 
-                         on='customer_id', how='left')
+        return stats
+    
+    def get_top_40_styles(self, start_date, end_date, category: List[str], 
+                         vendor: List[str], brand: Optional[List[str]] = None,
+                         top_n: int = 40, rank_by: str = 'sales_units') -> pd.DataFrame:
+        """
+        Get Top 40 Styles ranked by units
         
-        # Apply cost/retail
-        df['cost'] = df['item_id'].map(lambda x: cost_retail.get(x, {}).get('cost', 0))
-        df['retail'] = df['item_id'].map(lambda x: cost_retail.get(x, {}).get('retail', 0))
+        Args:
+            start_date: Start date
+            end_date: End date
+            category: Category filter
+            vendor: Vendor filter
+            brand: Optional brand filter
+            top_n: Number of styles to return
+            rank_by: Ranking metric (see RANK_METRICS)
         
-        # Handle nulls
-        df = self._handle_nulls(df)
+        Returns:
+            DataFrame with Top 40 styles
+        """
+        return self.execute(TopNQuery(
+            'style', self.STYLE_AGGREGATES, start_date, end_date,
+            filters={'category': category, 'vendor': vendor, 'brand': brand},
+            metric=rank_by, top_n=top_n
+        ))
+    
+    def get_top_40_customers(self, start_date, end_date, category: List[str], 
+                            vendor: List[str], brand: Optional[List[str]] = None,
+                            territory: Optional[List[str]] = None,
+                            top_n: int = 40, rank_by: str = 'sales_units') -> pd.DataFrame:
+        """
+        Get Top 40 Customers ranked by units
         
-        # Aggregate by customer
-        df_grouped = df.groupby('customer').agg({
-            'sales_units': 'sum',
-            'sales_dollars': 'sum',
-            'returns': 'sum',
-            'cost': 'sum',
-            'retail': 'sum',
-            'territory': 'first'
-        }).reset_index()
+        Args:
+            start_date: Start date
+            end_date: End date
+            category: Category filter
+            vendor: Vendor filter
+            brand: Optional brand filter
+            territory: Optional territory filter
+            top_n: Number of customers to return
+            rank_by: Ranking metric (see RANK_METRICS)
         
-        # Calculate derived metrics
-        df_grouped = self._calculate_derived_metrics(df_grouped)
+        Returns:
+            DataFrame with Top 40 customers
+        """
+        return self.execute(TopNQuery(
+            'customer', self.CUSTOMER_AGGREGATES, start_date, end_date,
+            filters={'category': category, 'vendor': vendor, 'brand': brand, 'territory': territory},
+            metric=rank_by, top_n=top_n
+        ))
+    
+    def get_customers_by_style(self, style: str, start_date, end_date) -> pd.DataFrame:
+        """
+        Get all customers who purchased a specific style (drilldown)
         
-        # Sort by sales units
-        df_grouped = df_grouped.sort_values('sales_units', ascending=False).reset_index(drop=True)
+        Args:
+            style: Style name
+            start_date: Start date
+            end_date: End date
         
-        return df_grouped
+        Returns:
+            DataFrame with customer purchase details for the style
+        """
+        return self.execute(TopNQuery(
+            'customer', self.CUSTOMER_DRILLDOWN_AGGREGATES, start_date, end_date,
+            filters={'style': style}, ranked=False
+        ))
     
     def get_styles_by_customer(self, customer: str, start_date, end_date) -> pd.DataFrame:
         """
@@ -377,65 +1035,60 @@ class DataProcessor:
             customer: Customer name
             start_date: Start date
             end_date: End date
-            
+        
         Returns:
             DataFrame with style purchase details for the customer
         """
-        # Convert dates to strings
-        start_str = start_date.strftime("%Y-%m-%d")
-        end_str = end_date.strftime("%Y-%m-%d")
-        
-        # Get transactions filtered by customer
-        filters = {
-            'transaction_type': 'sales',
-            'customer': customer
-        }
-        
-        transactions = self.ns.get_sales_transactions(start_str, end_str, filters)
-        
-        if not transactions:
-            return pd.DataFrame()
+        return self.execute(TopNQuery(
+            'style', self.STYLE_AGGREGATES, start_date, end_date,
+            filters={'customer': customer}, ranked=False
+        ))
+    
+    def _load_drilldowns(self, filter_name: str, values: List[str], start_date, end_date):
+        """
+        Load the fact rows for a batch of drilldown values in one fetch
         
-        df = pd.DataFrame(transactions)
+        The drilldown values are pushed down to the RESTlet search (whatever
+        pushdown_filters says) and the batch fact table is cached, so each
+        single-value drilldown for one of the values is then answered from it
+        in memory.
         
-        # Get item master data
-        item_ids = df['item_id'].unique().tolist()
-        items = self.ns.get_item_master(item_ids)
-        items_df = pd.DataFrame(items)
-        
-        # Get cost/retail
-        cost_retail = self.ns.get_cost_retail_data(item_ids)
+        Args:
+            filter_name: 'style' or 'customer'
+            values: Drilldown values
+            start_date: Start date
+            end_date: End date
+        """
+        plan = FilterPlan.build(tuple(self.pushdown_filters) + (filter_name,), **{filter_name: list(values)})
+        if plan.predicates:
+            self._get_fact_table(start_date, end_date, plan)
+    
+    def get_customers_by_styles(self, styles: List[str], start_date, end_date) -> Dict[str, pd.DataFrame]:
+        """
+        Get the customer drilldowns for several styles (e.g. the current Top 40) in one fetch
         
-        # Merge item attributes
-        if not items_df.empty:
-            df = df.merge(items_df[['item_id', 'style', 'material_desc', 'color_desc', 
-                                    'category', 'vendor']], 
-                         on='item_id', how='left')
+        Args:
+            styles: Style names
+            start_date: Start date
+            end_date: End date
         
-        # Apply cost/retail
-        df['cost'] = df['item_id'].map(lambda x: cost_retail.get(x, {}).get('cost', 0))
-        df['retail'] = df['item_id'].map(lambda x: cost_retail.get(x, {}).get('retail', 0))
+        Returns:
+            Dictionary of style to customer purchase details
+        """
+        self._load_drilldowns('style', styles, start_date, end_date)
+        return {style: self.get_customers_by_style(style, start_date, end_date) for style in styles}
+    
+    def get_styles_by_customers(self, customers: List[str], start_date, end_date) -> Dict[str, pd.DataFrame]:
+        """
+        Get the style drilldowns for several customers (e.g. the current Top 40) in one fetch
         
-        # Handle nulls
-        df = self._handle_nulls(df)
+        Args:
+            customers: Customer names
+            start_date: Start date
+            end_date: End date
         
-        # Aggregate by style
-        df_grouped = df.groupby('style').agg({
-            'sales_units': 'sum',
-            'sales_dollars': 'sum',
-            'returns': 'sum',
-            'cost': 'first',
-            'retail': 'first',
-            'material_desc': 'first',
-            'color_desc': 'first',
-            'category': 'first',
-            'vendor': 'first'
-        }).reset_index()
-        
-        # Calculate derived metrics
-        df_grouped = self._calculate_derived_metrics(df_grouped)
-        
-        # Sort by sales units
-        df_grouped = df_grouped.sort_values('sales_units', ascending=False).reset_index(drop=True)
-        
-        return df_grouped
+        Returns:
+            Dictionary of customer to style purchase details
+        """
+        self._load_drilldowns('customer', customers, start_date, end_date)
+        return {customer: self.get_styles_by_customer(customer, start_date, end_date) for customer in customers}
@@ -0,0 +1,532 @@
+"""
+Master Data Cache
+Local, persistent copies of NetSuite master records with incremental refresh
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+
+def cost_retail_frame(cost_retail: Dict[str, Dict]) -> pd.DataFrame:
+    """
+    Turn a {item_id: {cost, retail}} mapping into an item-indexed frame
+    
+    Args:
+        cost_retail: Dictionary mapping item_id to {cost, retail}
+    
+    Returns:
+        DataFrame indexed by item_id with float cost and retail columns
+    """
+    frame = pd.DataFrame.from_dict(cost_retail, orient='index', columns=['cost', 'retail'])
+    frame.index = frame.index.astype(str)
+    return frame.astype(float)
+
+
+def account_cache_path(cache_dir: Optional[str], account_id: str, filename: str) -> Optional[str]:
+    """
+    Path of a persisted cache file, kept apart per NetSuite account
+    
+    Args:
+        cache_dir: Cache directory (None keeps the cache in memory)
+        account_id: NetSuite account the cached records belong to
+        filename: Cache file name
+    
+    Returns:
+        <cache_dir>/<account_id>/<filename>, or None without a cache directory
+    """
+    return os.path.join(cache_dir, account_id, filename) if cache_dir else None
+
+
+class MasterDataCache:
+    """
+    In-memory master data table backed by a pickle file on disk
+    
+    The cache is seeded with the full record set on first refresh and then
+    kept current by asking NetSuite only for records modified since the last
+    refresh. Lookups are served from memory; IDs that are not cached yet are
+    fetched on demand and added to the table.
+    """
+    
+    def __init__(self, name: str, key: str,
+                 fetch_by_ids: Callable[[List[str]], List[Dict]],
+                 fetch_changes: Callable[[Optional[str]], List[Dict]],
+                 path: Optional[str] = None,
+                 refresh_interval_seconds: float = 900,
+                 overlap_seconds: float = 300):
+        """
+        Initialize master data cache
+        
+        Args:
+            name: Cache name used in logs and statistics
+            key: ID column of the records (e.g. 'item_id')
+            fetch_by_ids: Function returning records for a list of IDs
+            fetch_changes: Function returning records modified since an ISO
+                           timestamp (None returns every record)
+            path: Optional pickle file used to persist the cache
+            refresh_interval_seconds: Age after which refresh_if_stale() refreshes
+            overlap_seconds: Safety margin subtracted from the watermark to
+                             absorb clock skew between us and NetSuite
+        """
+        self.name = name
+        self.key = key
+        self.fetch_by_ids = fetch_by_ids
+        self.fetch_changes = fetch_changes
+        self.path = Path(path) if path else None
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.overlap_seconds = overlap_seconds
+        
+        self._records = pd.DataFrame()
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.RLock()
+        
+        # Monitoring counters
+        self.refresh_count = 0
+        self.refresh_failures = 0
+        self.last_refresh_seconds: Optional[float] = None
+        self.last_refresh_records = 0
+        self.last_refresh_type: Optional[str] = None
+        self.lookup_hits = 0
+        self.lookup_misses = 0
+    
+    def load(self) -> bool:
+        """
+        Load the cache from disk
+        
+        Returns:
+            True if a persisted cache was loaded, False otherwise
+        """
+        if self.path is None or not self.path.exists():
+            return False
+        
+        try:
+            state = pd.read_pickle(self.path)
+        except Exception as e:
+            print(f"Could not load {self.name} cache: {str(e)}")
+            return False
+        
+        with self._lock:
+            self._records = state['records']
+            self._watermark = state['watermark']
+        return True
+    
+    def save(self):
+        """Persist the cache to disk (atomically replaces the previous file)"""
+        if self.path is None:
+            return
+        
+        with self._lock:
+            state = {'records': self._records, 'watermark': self._watermark}
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        pd.to_pickle(state, tmp_path)
+        os.replace(tmp_path, self.path)
+    
+    def _upsert(self, records: List[Dict]):
+        """Insert or replace records by key (lock must be held)"""
+        if not records:
+            return
+        
+        updates = pd.DataFrame(records)
+        updates[self.key] = updates[self.key].astype(str)
+        updates = updates.drop_duplicates(self.key, keep='last').set_index(self.key)
+        
+        if self._records.empty:
+            self._records = updates
+        else:
+            kept = self._records[~self._records.index.isin(updates.index)]
+            self._records = pd.concat([kept, updates])
+    
+    def refresh(self) -> int:
+        """
+        Pull changes from NetSuite and persist the cache
+        
+        The first refresh loads every record; later refreshes only request
+        records modified since the previous one.
+        
+        Returns:
+            Number of records received
+        """
+        started_at = datetime.now(timezone.utc)
+        timer_start = time.perf_counter()
+        
+        with self._lock:
+            watermark = self._watermark
+        
+        modified_since = None
+        if watermark is not None:
+            modified_since = (watermark - timedelta(seconds=self.overlap_seconds)).isoformat()
+        
+        try:
+            records = self.fetch_changes(modified_since)
+        except Exception:
+            self.refresh_failures += 1
+            raise
+        
+        with self._lock:
+            if watermark is None:
+                self._records = pd.DataFrame()
+            self._upsert(records)
+            self._watermark = started_at
+        
+        self.save()
+        
+        self.refresh_count += 1
+        self.last_refresh_seconds = time.perf_counter() - timer_start
+        self.last_refresh_records = len(records)
+        self.last_refresh_type = 'full' if watermark is None else 'delta'
+        return len(records)
+    
+    def is_stale(self) -> bool:
+        """Check whether the cache is older than the refresh interval"""
+        with self._lock:
+            watermark = self._watermark
+        
+        if watermark is None:
+            return True
+        
+        age = (datetime.now(timezone.utc) - watermark).total_seconds()
+        return age > self.refresh_interval_seconds
+    
+    def refresh_if_stale(self) -> bool:
+        """
+        Refresh the cache if it is older than the refresh interval
+        
+        Returns:
+            True if a refresh ran
+        """
+        if not self.is_stale():
+            return False
+        
+        self.refresh()
+        return True
+    
+    def lookup(self, ids: List[str]) -> pd.DataFrame:
+        """
+        Get records for a list of IDs from memory
+        
+        IDs missing from the cache are fetched from NetSuite in one request and
+        added to the cache.
+        
+        Args:
+            ids: Record IDs to look up
+        
+        Returns:
+            DataFrame of matching records with the key as a column
+        """
+        ids = [str(record_id) for record_id in ids]
+        
+        with self._lock:
+            missing = [record_id for record_id in ids if record_id not in self._records.index]
+            self.lookup_hits += len(ids) - len(missing)
+            self.lookup_misses += len(missing)
+        
+        if missing:
+            fetched = self.fetch_by_ids(missing)
+            with self._lock:
+                self._upsert(fetched)
+        
+        with self._lock:
+            if self._records.empty:
+                return pd.DataFrame()
+            
+            found = self._records.index.intersection(pd.Index(ids))
+            return self._records.loc[found].rename_axis(self.key).reset_index()
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def staleness_seconds(self) -> Optional[float]:
+        """Seconds since the last successful refresh (None if never refreshed)"""
+        with self._lock:
+            watermark = self._watermark
+        
+        if watermark is None:
+            return None
+        
+        return (datetime.now(timezone.utc) - watermark).total_seconds()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache metrics for monitoring
+        
+        Returns:
+            Dictionary with size, staleness, refresh and lookup counters
+        """
+        with self._lock:
+            watermark = self._watermark
+            records = len(self._records)
+        
+        return {
+            'records': records,
+            'last_refresh': watermark.isoformat() if watermark else None,
+            'staleness_seconds': self.staleness_seconds(),
+            'refresh_interval_seconds': self.refresh_interval_seconds,
+            'refresh_count': self.refresh_count,
+            'refresh_failures': self.refresh_failures,
+            'last_refresh_type': self.last_refresh_type,
+            'last_refresh_seconds': self.last_refresh_seconds,
+            'last_refresh_records': self.last_refresh_records,
+            'lookup_hits': self.lookup_hits,
+            'lookup_misses': self.lookup_misses
+        }
+
+
+def _load_and_refresh(cache: MasterDataCache) -> MasterDataCache:
+    """Load a persisted cache and delta-refresh it if stale (a failed refresh keeps the loaded records)"""
+    cache.load()
+    try:
+        cache.refresh_if_stale()
+    except Exception as e:
+        print(f"{cache.name} refresh failed, serving cached records: {str(e)}")
+    return cache
+
+
+def create_item_master_cache(connector, cache_dir: Optional[str] = None,
+                             refresh_interval_seconds: float = 900) -> MasterDataCache:
+    """
+    Create an item master cache backed by a NetSuite connector
+    
+    Args:
+        connector: NetSuiteConnector instance
+        cache_dir: Directory for the persisted cache files, one subdirectory
+                   per account (None keeps it in memory)
+        refresh_interval_seconds: Age after which the cache is delta-refreshed
+    
+    Returns:
+        MasterDataCache for item records, loaded from disk if available and
+        refreshed if stale
+    """
+    cache = MasterDataCache(
+        name='item_master',
+        key='item_id',
+        fetch_by_ids=connector.get_item_master,
+        fetch_changes=connector.get_item_master_changes,
+        path=account_cache_path(cache_dir, connector.account_id, 'item_master.pkl'),
+        refresh_interval_seconds=refresh_interval_seconds
+    )
+    return _load_and_refresh(cache)
+
+
+def create_customer_master_cache(connector, cache_dir: Optional[str] = None,
+                                 refresh_interval_seconds: float = 900) -> MasterDataCache:
+    """
+    Create a customer master cache backed by a NetSuite connector
+    
+    Args:
+        connector: NetSuiteConnector instance
+        cache_dir: Directory for the persisted cache files, one subdirectory
+                   per account (None keeps it in memory)
+        refresh_interval_seconds: Age after which the cache is delta-refreshed
+    
+    Returns:
+        MasterDataCache for customer records, loaded from disk if available and
+        refreshed if stale
+    """
+    cache = MasterDataCache(
+        name='customer_master',
+        key='customer_id',
+        fetch_by_ids=connector.get_customer_master,
+        fetch_changes=connector.get_customer_master_changes,
+        path=account_cache_path(cache_dir, connector.account_id, 'customer_master.pkl'),
+        refresh_interval_seconds=refresh_interval_seconds
+    )
+    return _load_and_refresh(cache)
+
+
+class CostRetailCache:
+    """
+    Versioned local copy of the Merchandising cost/retail master
+    
+    The full table is downloaded only when NetSuite reports a new version
+    fingerprint; in between, version checks are throttled to one per
+    check_interval_seconds and lookups are served from memory.
+    """
+    
+    def __init__(self, fetch_all: Callable[[], Dict[str, Dict]],
+                 fetch_version: Callable[[], Optional[str]],
+                 path: Optional[str] = None,
+                 check_interval_seconds: float = 300):
+        """
+        Initialize cost/retail cache
+        
+        Args:
+            fetch_all: Function returning {item_id: {cost, retail}} for every item
+            fetch_version: Function returning the current version fingerprint
+            path: Optional pickle file used to persist the cache
+            check_interval_seconds: Minimum seconds between version checks
+        """
+        self.name = 'cost_retail'
+        self.fetch_all = fetch_all
+        self.fetch_version = fetch_version
+        self.path = Path(path) if path else None
+        self.check_interval_seconds = check_interval_seconds
+        
+        self._data: Dict[str, Dict] = {}
+        self._frame: Optional[pd.DataFrame] = None
+        self.version: Optional[str] = None
+        self.loaded_at: Optional[datetime] = None
+        # Bumped on every load, so holders of derived data can tell they are
+        # behind even when NetSuite reports no version fingerprint
+        self.generation = 0
+        self._last_check: Optional[float] = None
+        self._lock = threading.RLock()
+        
+        # Monitoring counters
+        self.version_checks = 0
+        self.version_changes = 0
+        self.last_load_seconds: Optional[float] = None
+    
+    def load(self) -> bool:
+        """
+        Load the cache from disk
+        
+        Returns:
+            True if a persisted cache was loaded, False otherwise
+        """
+        if self.path is None or not self.path.exists():
+            return False
+        
+        try:
+            state = pd.read_pickle(self.path)
+        except Exception as e:
+            print(f"Could not load {self.name} cache: {str(e)}")
+            return False
+        
+        with self._lock:
+            self._data = state['data']
+            self._frame = None
+            self.version = state['version']
+            self.loaded_at = state['loaded_at']
+            self.generation += 1
+        return True
+    
+    def save(self):
+        """Persist the cache to disk (atomically replaces the previous file)"""
+        if self.path is None:
+            return
+        
+        with self._lock:
+            state = {'data': self._data, 'version': self.version, 'loaded_at': self.loaded_at}
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        pd.to_pickle(state, tmp_path)
+        os.replace(tmp_path, self.path)
+    
+    def check_version(self) -> bool:
+        """
+        Compare the cached version with NetSuite and reload if it changed
+        
+        Returns:
+            True if a new version was loaded
+        """
+        self._last_check = time.monotonic()
+        self.version_checks += 1
+        
+        remote_version = self.fetch_version()
+        if self._data and remote_version is not None and remote_version == self.version:
+            return False
+        
+        timer_start = time.perf_counter()
+        data = self.fetch_all()
+        
+        with self._lock:
+            self._data = {str(item_id): values for item_id, values in data.items()}
+            self._frame = None
+            self.version = remote_version
+            self.loaded_at = datetime.now(timezone.utc)
+            self.generation += 1
+        
+        self.save()
+        self.version_changes += 1
+        self.last_load_seconds = time.perf_counter() - timer_start
+        return True
+    
+    def check_if_due(self) -> bool:
+        """
+        Check the version if the check interval has elapsed
+        
+        Returns:
+            True if a new version was loaded
+        """
+        if self._last_check is not None and self._data:
+            if time.monotonic() - self._last_check < self.check_interval_seconds:
+                return False
+        
+        return self.check_version()
+    
+    def lookup(self, item_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Get cost/retail values for a list of items from memory
+        
+        Args:
+            item_ids: Item IDs to look up
+        
+        Returns:
+            Dictionary mapping item_id to {cost, retail}
+        """
+        with self._lock:
+            return {item_id: self._data[item_id] for item_id in map(str, item_ids) if item_id in self._data}
+    
+    def frame(self) -> pd.DataFrame:
+        """
+        Get the cost/retail table as an item-indexed frame
+        
+        Built once per version so enrichment is a single vectorized reindex.
+        
+        Returns:
+            DataFrame indexed by item_id with cost and retail columns
+        """
+        with self._lock:
+            if self._frame is None:
+                self._frame = cost_retail_frame(self._data)
+            return self._frame
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache metrics for monitoring
+        
+        Returns:
+            Dictionary with version, size and check counters
+        """
+        return {
+            'version': self.version,
+            'generation': self.generation,
+            'items': len(self._data),
+            'loaded_at': self.loaded_at.isoformat() if self.loaded_at else None,
+            'check_interval_seconds': self.check_interval_seconds,
+            'version_checks': self.version_checks,
+            'version_changes': self.version_changes,
+            'last_load_seconds': self.last_load_seconds
+        }
+
+
+def create_cost_retail_cache(connector, cache_dir: Optional[str] = None,
+                             check_interval_seconds: float = 300) -> CostRetailCache:
+    """
+    Create a versioned cost/retail cache backed by a NetSuite connector
+    
+    Args:
+        connector: NetSuiteConnector instance
+        cache_dir: Directory for the persisted cache files, one subdirectory
+                   per account (None keeps it in memory)
+        check_interval_seconds: Minimum seconds between version checks
+    
+    Returns:
+        CostRetailCache, loaded from disk if available
+    """
+    cache = CostRetailCache(
+        fetch_all=connector.get_cost_retail_data,
+        fetch_version=connector.get_cost_retail_version,
+        path=account_cache_path(cache_dir, connector.account_id, 'cost_retail.pkl'),
+        check_interval_seconds=check_interval_seconds
+    )
+    cache.load()
+    return cache
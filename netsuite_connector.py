@@ -4,6 +4,7 @@ Handles authentication and API requests to NetSuite RESTlet endpoints
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import hashlib
 import hmac
@@ -11,8 +12,12 @@ import base64
 import time
 import random
 import string
+import asyncio
+import threading
 from urllib.parse import quote
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator, Iterator
+
+from singleflight import SingleFlight
 
 
 class NetSuiteConnector:
@@ -21,7 +26,10 @@ class NetSuiteConnector:
     """
     
     def __init__(self, account_id: str, consumer_key: str, consumer_secret: str, 
-                 token_id: str, token_secret: str, restlet_url: Optional[str] = None):
+                 token_id: str, token_secret: str, restlet_url: Optional[str] = None,
+                 pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 keep_alive: bool = True, timeout: int = 60, coalesce_requests: bool = True,
+                 max_concurrency: int = 3):
         """
         Initialize NetSuite connector
         
@@ -32,7 +40,21 @@ class NetSuiteConnector:
             token_id: Token ID from token-based authentication
             token_secret: Token secret from token-based authentication
             restlet_url: Optional custom RESTlet URL (defaults to standard URL)
+            pool_connections: Number of per-host connection pools to keep
+            pool_maxsize: Maximum open connections kept per host
+            pool_block: Block when the per-host pool is exhausted instead of
+                        opening a throwaway connection
+            keep_alive: Reuse TCP/TLS connections between requests
+            timeout: Request timeout in seconds
+            coalesce_requests: Share one RESTlet call between threads issuing
+                               the identical request at the same time
+            max_concurrency: Maximum RESTlet requests in flight from this
+                             connector (keep under NetSuite's per-integration
+                             concurrency limit; share one connector per process)
         """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        
         self.account_id = account_id.upper().replace('_', '-')
         self.consumer_key = consumer_key
         self.consumer_secret = consumer_secret
@@ -43,6 +65,85 @@ class NetSuiteConnector:
         self.restlet_url = restlet_url or f"https://{self.account_id.lower()}.restlets.api.netsuite.com/app/site/hosting/restlet.nl"
         
         self.realm = account_id.upper()
+        
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        
+        # Pooled session reused by every RESTlet call so consecutive requests
+        # skip the TCP + TLS handshake
+        self.session = self._create_session()
+        # Request counters are updated by every thread sharing the connector
+        self._stats_lock = threading.Lock()
+        self._request_count = 0
+        self._request_seconds = 0.0
+        self._inflight = SingleFlight() if coalesce_requests else None
+        
+        # Thread-level limiter held around every RESTlet request (transaction
+        # pages, master data, partition fetches), so the limit holds across
+        # sessions, worker threads and event loops sharing the connector
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+    
+    def _create_session(self) -> requests.Session:
+        """
+        Create the pooled HTTP session used for all RESTlet calls
+        
+        Returns:
+            requests.Session with a sized connection pool mounted for HTTPS
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Connection'] = 'keep-alive' if self.keep_alive else 'close'
+        return session
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics for monitoring
+        
+        Returns:
+            Dictionary with request counters and per-host pool usage
+        """
+        hosts = []
+        for adapter in set(self.session.adapters.values()):
+            for pool_key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools.get(pool_key)
+                if pool is None:
+                    continue
+                hosts.append({
+                    'host': pool.host,
+                    'connections_opened': pool.num_connections,
+                    'requests_sent': pool.num_requests,
+                    'idle_connections': sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+                })
+        
+        with self._stats_lock:
+            request_count = self._request_count
+            request_seconds = self._request_seconds
+        
+        return {
+            'requests': request_count,
+            'avg_request_ms': request_seconds / request_count * 1000 if request_count else 0.0,
+            'pool_connections': self.pool_connections,
+            'pool_maxsize': self.pool_maxsize,
+            'pool_block': self.pool_block,
+            'keep_alive': self.keep_alive,
+            'max_concurrency': self.max_concurrency,
+            'coalesced_requests': self._inflight.stats()['shared'] if self._inflight is not None else 0,
+            'hosts': hosts
+        }
+    
+    def close(self):
+        """Close the pooled session and release its connections"""
+        self.session.close()
     
     def _generate_nonce(self, length: int = 11) -> str:
         """Generate random nonce for OAuth"""
@@ -128,8 +229,18 @@ class NetSuiteConnector:
             payload: Request body data
             
         Returns:
-            JSON response from NetSuite
+            JSON response from NetSuite (shared with concurrent identical
+            requests when coalescing - treat as read-only)
         """
+        if self._inflight is None:
+            return self._send_request(method, params, payload)
+        
+        key = (method.upper(), json.dumps(params, sort_keys=True, default=str),
+               json.dumps(payload, sort_keys=True, default=str))
+        return self._inflight.do(key, self._send_request, method, params, payload)
+    
+    def _send_request(self, method: str, params: Optional[Dict], payload: Optional[Dict]) -> Dict[str, Any]:
+        """Sign and send one RESTlet request"""
         url = self.restlet_url
         
         # Add query parameters to URL if GET request
@@ -146,23 +257,32 @@ class NetSuiteConnector:
             'Accept': 'application/json'
         }
         
+        method = method.upper()
+        if method not in ("GET", "POST", "PUT", "DELETE"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
+        self._slots.acquire()
+        started = time.perf_counter()
         try:
-            if method.upper() == "GET":
-                response = requests.get(url, headers=headers, timeout=60)
-            elif method.upper() == "POST":
-                response = requests.post(url, headers=headers, json=payload, timeout=60)
-            elif method.upper() == "PUT":
-                response = requests.put(url, headers=headers, json=payload, timeout=60)
-            elif method.upper() == "DELETE":
-                response = requests.delete(url, headers=headers, timeout=60)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+            response = self.session.request(
+                method,
+                url,
+                headers=headers,
+                json=payload if method in ("POST", "PUT") else None,
+                timeout=self.timeout
+            )
             
             response.raise_for_status()
             return response.json()
             
         except requests.exceptions.RequestException as e:
             raise Exception(f"NetSuite API request failed: {str(e)}")
+        finally:
+            self._slots.release()
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self._request_count += 1
+                self._request_seconds += elapsed
     
     def test_connection(self) -> bool:
         """
@@ -182,6 +302,57 @@ class NetSuiteConnector:
             print(f"Connection test failed: {str(e)}")
             return False
     
+    def _iter_pages(self, payload: Dict, page_size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        Walk a paged RESTlet action one page per request
+        
+        Args:
+            payload: Action payload (page_index/page_size are added per request)
+            page_size: Records per page (NetSuite allows 5-1000)
+            
+        Yields:
+            Lists of records, one list per page
+        """
+        page_index = 0
+        
+        while page_index is not None:
+            page_payload = dict(payload, page_index=page_index, page_size=page_size)
+            
+            response = self.make_request(method="POST", payload=page_payload)
+            page = response.get('data', [])
+            if page:
+                yield page
+            
+            page_index = response.get('next_page_index') if response.get('has_more') else None
+    
+    def iter_sales_transactions(self, start_date: str, end_date: str,
+                                filters: Optional[Dict] = None,
+                                page_size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        Stream sales transactions from NetSuite one page at a time
+        
+        Each RESTlet call returns a single search page, so neither side ever
+        holds the full result set and callers can start work on the first
+        page before the last one arrives.
+        
+        Args:
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            filters: Optional filters (category, vendor, etc.)
+            page_size: Transaction lines per page (NetSuite allows 5-1000)
+            
+        Yields:
+            Lists of transaction records, one list per page
+        """
+        payload = {
+            "action": "get_sales_transactions",
+            "start_date": start_date,
+            "end_date": end_date,
+            "filters": filters or {}
+        }
+        
+        yield from self._iter_pages(payload, page_size)
+    
     def get_sales_transactions(self, start_date: str, end_date: str, 
                               filters: Optional[Dict] = None) -> List[Dict]:
         """
@@ -195,15 +366,37 @@ class NetSuiteConnector:
         Returns:
             List of transaction records
         """
+        transactions = []
+        for page in self.iter_sales_transactions(start_date, end_date, filters):
+            transactions.extend(page)
+        return transactions
+    
+    def get_sales_summary(self, start_date: str, end_date: str,
+                          filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Get sales totals aggregated by item and customer on the NetSuite side
+        
+        Args:
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            filters: Optional filters (category, vendor, etc.)
+            
+        Returns:
+            List of {item_id, customer_id, sales_units, sales_dollars, returns,
+            line_count, first_line_id} records, one per item/customer pair
+            (first_line_id orders pairs by their first line, like the line stream)
+        """
         payload = {
-            "action": "get_sales_transactions",
+            "action": "get_sales_summary",
             "start_date": start_date,
             "end_date": end_date,
             "filters": filters or {}
         }
         
-        response = self.make_request(method="POST", payload=payload)
-        return response.get('data', [])
+        summary = []
+        for page in self._iter_pages(payload):
+            summary.extend(page)
+        return summary
     
     def get_item_master(self, item_ids: Optional[List[str]] = None) -> List[Dict]:
         """
@@ -223,6 +416,26 @@ class NetSuiteConnector:
         response = self.make_request(method="POST", payload=payload)
         return response.get('data', [])
     
+    def get_item_master_changes(self, modified_since: Optional[str] = None) -> List[Dict]:
+        """
+        Get item master records modified since a point in time
+        
+        Args:
+            modified_since: ISO-8601 timestamp (None returns the full item master)
+            
+        Returns:
+            List of item records
+        """
+        payload = {
+            "action": "get_item_master_changes",
+            "modified_since": modified_since
+        }
+        
+        items = []
+        for page in self._iter_pages(payload):
+            items.extend(page)
+        return items
+    
     def get_customer_master(self, customer_ids: Optional[List[str]] = None) -> List[Dict]:
         """
         Get customer master data
@@ -241,6 +454,26 @@ class NetSuiteConnector:
         response = self.make_request(method="POST", payload=payload)
         return response.get('data', [])
     
+    def get_customer_master_changes(self, modified_since: Optional[str] = None) -> List[Dict]:
+        """
+        Get customer master records modified since a point in time
+        
+        Args:
+            modified_since: ISO-8601 timestamp (None returns every customer)
+            
+        Returns:
+            List of customer records
+        """
+        payload = {
+            "action": "get_customer_master_changes",
+            "modified_since": modified_since
+        }
+        
+        customers = []
+        for page in self._iter_pages(payload):
+            customers.extend(page)
+        return customers
+    
     def execute_saved_search(self, search_id: str, filters: Optional[Dict] = None) -> List[Dict]:
         """
         Execute a NetSuite saved search
@@ -279,3 +512,110 @@ class NetSuiteConnector:
         
         response = self.make_request(method="POST", payload=payload)
         return response.get('data', {})
+    
+    def get_cost_retail_version(self) -> Optional[str]:
+        """
+        Get the version fingerprint of the cost/retail master
+        
+        Returns:
+            Version string that changes whenever any cost/retail value changes
+        """
+        payload = {
+            "action": "get_cost_retail_version"
+        }
+        
+        response = self.make_request(method="POST", payload=payload)
+        return response.get('version')
+
+
+class AsyncNetSuiteConnector:
+    """
+    Awaitable variant of NetSuiteConnector
+    
+    Exposes the same methods as NetSuiteConnector as coroutines, and
+    iter_sales_transactions as an async generator. Each call runs the blocking
+    RESTlet request on a worker thread and reuses the wrapped connector's pooled
+    session; the connector's own limiter caps the number of requests in flight
+    to stay under NetSuite's per-integration concurrency limit.
+    """
+    
+    def __init__(self, connector: NetSuiteConnector):
+        """
+        Initialize async connector
+        
+        Args:
+            connector: NetSuiteConnector used to issue the requests
+        """
+        self.connector = connector
+    
+    async def _call(self, func, *args, **kwargs):
+        """Run a blocking connector call on a worker thread"""
+        return await asyncio.to_thread(func, *args, **kwargs)
+    
+    async def make_request(self, method: str = "POST", params: Optional[Dict] = None,
+                           payload: Optional[Dict] = None) -> Dict[str, Any]:
+        """Awaitable NetSuiteConnector.make_request"""
+        return await self._call(self.connector.make_request, method, params, payload)
+    
+    async def test_connection(self) -> bool:
+        """Awaitable NetSuiteConnector.test_connection"""
+        return await self._call(self.connector.test_connection)
+    
+    async def get_sales_transactions(self, start_date: str, end_date: str,
+                                     filters: Optional[Dict] = None) -> List[Dict]:
+        """Awaitable NetSuiteConnector.get_sales_transactions"""
+        return await self._call(self.connector.get_sales_transactions, start_date, end_date, filters)
+    
+    async def iter_sales_transactions(self, start_date: str, end_date: str,
+                                      filters: Optional[Dict] = None,
+                                      page_size: int = 1000) -> AsyncIterator[List[Dict]]:
+        """Async-iterable NetSuiteConnector.iter_sales_transactions, one RESTlet page per step"""
+        pages = self.connector.iter_sales_transactions(start_date, end_date, filters, page_size)
+        
+        while True:
+            # Pages are never empty, so None marks the end of the walk
+            page = await self._call(next, pages, None)
+            if page is None:
+                return
+            yield page
+    
+    async def get_sales_summary(self, start_date: str, end_date: str,
+                                filters: Optional[Dict] = None) -> List[Dict]:
+        """Awaitable NetSuiteConnector.get_sales_summary"""
+        return await self._call(self.connector.get_sales_summary, start_date, end_date, filters)
+    
+    async def get_item_master(self, item_ids: Optional[List[str]] = None) -> List[Dict]:
+        """Awaitable NetSuiteConnector.get_item_master"""
+        return await self._call(self.connector.get_item_master, item_ids)
+    
+    async def get_item_master_changes(self, modified_since: Optional[str] = None) -> List[Dict]:
+        """Awaitable NetSuiteConnector.get_item_master_changes"""
+        return await self._call(self.connector.get_item_master_changes, modified_since)
+    
+    async def get_customer_master(self, customer_ids: Optional[List[str]] = None) -> List[Dict]:
+        """Awaitable NetSuiteConnector.get_customer_master"""
+        return await self._call(self.connector.get_customer_master, customer_ids)
+    
+    async def get_customer_master_changes(self, modified_since: Optional[str] = None) -> List[Dict]:
+        """Awaitable NetSuiteConnector.get_customer_master_changes"""
+        return await self._call(self.connector.get_customer_master_changes, modified_since)
+    
+    async def execute_saved_search(self, search_id: str, filters: Optional[Dict] = None) -> List[Dict]:
+        """Awaitable NetSuiteConnector.execute_saved_search"""
+        return await self._call(self.connector.execute_saved_search, search_id, filters)
+    
+    async def get_cost_retail_data(self, item_ids: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Awaitable NetSuiteConnector.get_cost_retail_data"""
+        return await self._call(self.connector.get_cost_retail_data, item_ids)
+    
+    async def get_cost_retail_version(self) -> Optional[str]:
+        """Awaitable NetSuiteConnector.get_cost_retail_version"""
+        return await self._call(self.connector.get_cost_retail_version)
+    
+    async def get_pool_stats(self) -> Dict[str, Any]:
+        """Awaitable NetSuiteConnector.get_pool_stats"""
+        return self.connector.get_pool_stats()
+    
+    async def close(self):
+        """Awaitable NetSuiteConnector.close"""
+        await self._call(self.connector.close)
@@ -31,18 +31,30 @@ define(['N/search', 'N/record', 'N/format'], function(search, record, format) {
                 case 'get_sales_transactions':
                     return getSalesTransactions(requestBody);
                     
+                case 'get_sales_summary':
+                    return getSalesSummary(requestBody);
+                    
                 case 'get_item_master':
                     return getItemMaster(requestBody);
                     
+                case 'get_item_master_changes':
+                    return getItemMasterChanges(requestBody);
+                    
                 case 'get_customer_master':
                     return getCustomerMaster(requestBody);
                     
+                case 'get_customer_master_changes':
+                    return getCustomerMasterChanges(requestBody);
+                    
                 case 'execute_saved_search':
                     return executeSavedSearch(requestBody);
                     
                 case 'get_cost_retail_data':
                     return getCostRetailData(requestBody);
                     
+                case 'get_cost_retail_version':
+                    return getCostRetailVersion(requestBody);
+                    
                 default:
                     return {
                         status: 'error',
@@ -70,9 +82,27 @@ define(['N/search', 'N/record', 'N/format'], function(search, record, format) {
     }
     
     /**
-     * Get sales transactions
+     * Line-level columns for the sales transaction search
+     * (sorted by transaction then line, a total order, so paging is stable)
      */
-    function getSalesTransactions(params) {
+    function salesTransactionColumns() {
+        return [
+            search.createColumn({ name: 'internalid', label: 'transaction_id', sort: search.Sort.ASC }),
+            search.createColumn({ name: 'line', label: 'line_id', sort: search.Sort.ASC }),
+            search.createColumn({ name: 'trandate', label: 'transaction_date' }),
+            search.createColumn({ name: 'type', label: 'transaction_type' }),
+            search.createColumn({ name: 'entity', label: 'customer_id' }),
+            search.createColumn({ name: 'item', label: 'item_id' }),
+            search.createColumn({ name: 'quantity', label: 'sales_units' }),
+            search.createColumn({ name: 'amount', label: 'sales_dollars' }),
+            search.createColumn({ name: 'quantityreturned', label: 'returns' })
+        ];
+    }
+    
+    /**
+     * Build the sales transaction search for a date range and filters
+     */
+    function buildSalesTransactionSearch(params, columns) {
         var startDate = params.start_date;
         var endDate = params.end_date;
         var filters = params.filters || {};
@@ -88,16 +118,7 @@ define(['N/search', 'N/record', 'N/format'], function(search, record, format) {
                 'AND',
                 ['taxline', 'is', 'F']
             ],
-            columns: [
-                search.createColumn({ name: 'internalid', label: 'transaction_id' }),
-                search.createColumn({ name: 'trandate', label: 'transaction_date' }),
-                search.createColumn({ name: 'type', label: 'transaction_type' }),
-                search.createColumn({ name: 'entity', label: 'customer_id' }),
-                search.createColumn({ name: 'item', label: 'item_id' }),
-                search.createColumn({ name: 'quantity', label: 'sales_units' }),
-                search.createColumn({ name: 'amount', label: 'sales_dollars' }),
-                search.createColumn({ name: 'quantityreturned', label: 'returns' })
-            ]
+            columns: columns || salesTransactionColumns()
         });
         
         // Apply additional filters if provided
@@ -111,32 +132,115 @@ define(['N/search', 'N/record', 'N/format'], function(search, record, format) {
             transactionSearch.filters.push(['item.vendor', 'anyof', filters.vendor]);
         }
         
-        if (filters.style) {
+        // Brand, territory and customer arrive as the display names the
+        // dashboard shows (master data uses getText/entityid), so they are
+        // matched by name rather than with 'anyof' internal IDs
+        if (filters.brand && filters.brand.length > 0) {
             transactionSearch.filters.push('AND');
-            transactionSearch.filters.push(['item.custitem_style', 'is', filters.style]);
+            transactionSearch.filters.push(anyTextIs('{item.custitem_brand}', filters.brand));
         }
         
-        if (filters.customer) {
+        if (filters.territory && filters.territory.length > 0) {
             transactionSearch.filters.push('AND');
-            transactionSearch.filters.push(['entity', 'is', filters.customer]);
+            transactionSearch.filters.push(anyTextIs('{customer.custentity_territory}', filters.territory));
         }
         
-        var results = [];
-        var pagedData = transactionSearch.runPaged({ pageSize: 1000 });
+        if (filters.style && filters.style.length > 0) {
+            transactionSearch.filters.push('AND');
+            transactionSearch.filters.push(anyValueIs('item.custitem_style', filters.style));
+        }
+        
+        if (filters.customer && filters.customer.length > 0) {
+            transactionSearch.filters.push('AND');
+            transactionSearch.filters.push(anyTextIs('{customer.entityid}', filters.customer));
+        }
+        
+        return transactionSearch;
+    }
+    
+    /**
+     * Filter expression matching a field against one value or any of a list
+     * ('is' only takes a single value, so lists become an OR group)
+     */
+    function anyValueIs(field, values) {
+        values = [].concat(values);
+        
+        var expression = [];
+        values.forEach(function(value, index) {
+            if (index > 0) {
+                expression.push('OR');
+            }
+            expression.push([field, 'is', value]);
+        });
+        
+        return expression.length === 1 ? expression[0] : expression;
+    }
+    
+    /**
+     * Filter expression matching the display text of a list/record field
+     * against one name or any of a list (e.g. '{item.custitem_brand}')
+     */
+    function anyTextIs(fieldFormula, names) {
+        return anyValueIs('formulatext: ' + fieldFormula, names);
+    }
+    
+    /**
+     * Map a transaction search result to the dashboard record shape
+     */
+    function mapTransactionResult(result) {
+        return {
+            transaction_id: result.getValue('internalid'),
+            transaction_date: result.getValue('trandate'),
+            transaction_type: result.getValue('type'),
+            customer_id: result.getValue('entity'),
+            item_id: result.getValue('item'),
+            sales_units: parseFloat(result.getValue('quantity')) || 0,
+            sales_dollars: parseFloat(result.getValue('amount')) || 0,
+            returns: parseFloat(result.getValue('quantityreturned')) || 0
+        };
+    }
+    
+    /**
+     * Run a search in pages and build the RESTlet response
+     * 
+     * When page_index is supplied only that page is returned, together with
+     * has_more / next_page_index so the caller can stream the result set one
+     * page per request. Without page_index every page is returned at once.
+     */
+    function runPagedSearch(searchObj, params, mapResult) {
+        var pageSize = Math.min(Math.max(parseInt(params.page_size, 10) || 1000, 5), 1000);
+        var pagedData = searchObj.runPaged({ pageSize: pageSize });
+        var pageCount = pagedData.pageRanges.length;
+        
+        if (params.page_index !== undefined && params.page_index !== null) {
+            var pageIndex = parseInt(params.page_index, 10) || 0;
+            var pageResults = [];
+            
+            if (pageIndex < pageCount) {
+                pagedData.fetch({ index: pageIndex }).data.forEach(function(result) {
+                    pageResults.push(mapResult(result));
+                });
+            }
+            
+            var hasMore = pageIndex + 1 < pageCount;
+            
+            return {
+                status: 'success',
+                data: pageResults,
+                count: pageResults.length,
+                total_count: pagedData.count,
+                page_index: pageIndex,
+                page_count: pageCount,
+                has_more: hasMore,
+                next_page_index: hasMore ? pageIndex + 1 : null
+            };
+        }
         
+        var results = [];
         pagedData.pageRanges.forEach(function(pageRange) {
             var page = pagedData.fetch({ index: pageRange.index });
             page.data.forEach(function(result) {
-                results.push({
-                    transaction_id: result.getValue('internalid'),
-                    transaction_date: result.getValue('trandate'),
-                    transaction_type: result.getValue('type'),
-                    customer_id: result.getValue('entity'),
-                    item_id: result.getValue('item'),
-                    sales_units: parseFloat(result.getValue('quantity')) || 0,
-                    sales_dollars: parseFloat(result.getValue('amount')) || 0,
-                    returns: parseFloat(result.getValue('quantityreturned')) || 0
-                });
+                results.push(mapResult(result));
             });
         });
         
@@ -147,6 +251,100 @@ define(['N/search', 'N/record', 'N/format'], function(search, record, format) {
         };
     }
     
+    /**
+     * Get sales transactions
+     */
+    function getSalesTransactions(params) {
+        var transactionSearch = buildSalesTransactionSearch(params);
+        return runPagedSearch(transactionSearch, params, mapTransactionResult);
+    }
+    
+    /**
+     * Get sales totals grouped by item and customer
+     * 
+     * Runs the same search as getSalesTransactions as a summary search, so
+     * NetSuite returns one row per item/customer pair instead of every line.
+     * line_count and first_line_id let the dashboard reproduce per-line cost
+     * sums and "first" attributes from the summary rows.
+     * 
+     * first_line_id encodes the pair's first line as transaction ID and line
+     * number, the order getSalesTransactions streams lines in, so pairs first
+     * seen on the same invoice keep their line order. The item/customer group
+     * sorts after it make the order total, so re-running the search for each
+     * page never skips or repeats a pair.
+     */
+    function getSalesSummary(params) {
+        var summaryColumns = [
+            search.createColumn({
+                name: 'formulanumeric',
+                summary: search.Summary.MIN,
+                formula: '{internalid} * 1000000 + {line}',
+                sort: search.Sort.ASC
+            }),
+            search.createColumn({ name: 'item', summary: search.Summary.GROUP, sort: search.Sort.ASC }),
+            search.createColumn({ name: 'entity', summary: search.Summary.GROUP, sort: search.Sort.ASC }),
+            search.createColumn({ name: 'quantity', summary: search.Summary.SUM }),
+            search.createColumn({ name: 'amount', summary: search.Summary.SUM }),
+            search.createColumn({ name: 'quantityreturned', summary: search.Summary.SUM }),
+            search.createColumn({ name: 'internalid', summary: search.Summary.COUNT })
+        ];
+        
+        var summarySearch = buildSalesTransactionSearch(params, summaryColumns);
+        
+        return runPagedSearch(summarySearch, params, function(result) {
+            return {
+                item_id: result.getValue({ name: 'item', summary: search.Summary.GROUP }),
+                customer_id: result.getValue({ name: 'entity', summary: search.Summary.GROUP }),
+                sales_units: parseFloat(result.getValue({ name: 'quantity', summary: search.Summary.SUM })) || 0,
+                sales_dollars: parseFloat(result.getValue({ name: 'amount', summary: search.Summary.SUM })) || 0,
+                returns: parseFloat(result.getValue({ name: 'quantityreturned', summary: search.Summary.SUM })) || 0,
+                line_count: parseInt(result.getValue({ name: 'internalid', summary: search.Summary.COUNT }), 10) || 0,
+                first_line_id: parseFloat(result.getValue({ name: 'formulanumeric', summary: search.Summary.MIN })) || 0
+            };
+        });
+    }
+    
+    /**
+     * Columns returned for item master records
+     */
+    function itemMasterColumns() {
+        return [
+            search.createColumn({ name: 'internalid', label: 'item_id', sort: search.Sort.ASC }),
+            search.createColumn({ name: 'itemid', label: 'item_name' }),
+            search.createColumn({ name: 'custitem_style', label: 'style' }),
+            search.createColumn({ name: 'custitem_material_desc', label: 'material_desc' }),
+            search.createColumn({ name: 'custitem_color_desc', label: 'color_desc' }),
+            search.createColumn({ name: 'class', label: 'category' }),
+            search.createColumn({ name: 'vendor', label: 'vendor' }),
+            search.createColumn({ name: 'custitem_brand', label: 'brand' }),
+            search.createColumn({ name: 'baseprice', label: 'retail_price' })
+        ];
+    }
+    
+    /**
+     * Map an item search result to the dashboard record shape
+     */
+    function mapItemResult(result) {
+        return {
+            item_id: result.getValue('internalid'),
+            item_name: result.getValue('itemid'),
+            style: result.getValue('custitem_style'),
+            material_desc: result.getValue('custitem_material_desc'),
+            color_desc: result.getValue('custitem_color_desc'),
+            category: result.getText('class'),
+            vendor: result.getText('vendor'),
+            brand: result.getText('custitem_brand'),
+            retail_price: parseFloat(result.getValue('baseprice')) || 0
+        };
+    }
+    
+    /**
+     * Convert an ISO-8601 timestamp to a NetSuite datetime filter value
+     */
+    function toNetSuiteDateTime(isoString) {
+        return format.format({ value: new Date(isoString), type: format.Type.DATETIME });
+    }
+    
     /**
      * Get item master data
      */
@@ -158,30 +356,12 @@ define(['N/search', 'N/record', 'N/format'], function(search, record, format) {
             filters: itemIds.length > 0 ? 
                 [['internalid', 'anyof', itemIds]] : 
                 [],
-            columns: [
-                search.createColumn({ name: 'internalid', label: 'item_id' }),
-                search.createColumn({ name: 'itemid', label: 'item_name' }),
-                search.createColumn({ name: 'custitem_style', label: 'style' }),
-                search.createColumn({ name: 'custitem_material_desc', label: 'material_desc' }),
-                search.createColumn({ name: 'custitem_color_desc', label: 'color_desc' }),
-                search.createColumn({ name: 'class', label: 'category' }),
-                search.createColumn({ name: 'vendor', label: 'vendor' }),
-                search.createColumn({ name: 'baseprice', label: 'retail_price' })
-            ]
+            columns: itemMasterColumns()
         });
         
         var results = [];
         itemSearch.run().each(function(result) {
-            results.push({
-                item_id: result.getValue('internalid'),
-                item_name: result.getValue('itemid'),
-                style: result.getValue('custitem_style'),
-                material_desc: result.getValue('custitem_material_desc'),
-                color_desc: result.getValue('custitem_color_desc'),
-                category: result.getText('class'),
-                vendor: result.getText('vendor'),
-                retail_price: parseFloat(result.getValue('baseprice')) || 0
-            });
+            results.push(mapItemResult(result));
             return true;
         });
         
@@ -192,6 +372,52 @@ define(['N/search', 'N/record', 'N/format'], function(search, record, format) {
         };
     }
     
+    /**
+     * Get item master records modified since a timestamp (paged)
+     * 
+     * Without modified_since the whole item master is returned, which is how
+     * the dashboard seeds its local item cache.
+     */
+    function getItemMasterChanges(params) {
+        var filters = [];
+        
+        if (params.modified_since) {
+            filters.push(['modified', 'onorafter', toNetSuiteDateTime(params.modified_since)]);
+        }
+        
+        var itemSearch = search.create({
+            type: search.Type.ITEM,
+            filters: filters,
+            columns: itemMasterColumns()
+        });
+        
+        return runPagedSearch(itemSearch, params, mapItemResult);
+    }
+    
+    /**
+     * Columns returned for customer master records
+     */
+    function customerMasterColumns() {
+        return [
+            search.createColumn({ name: 'internalid', label: 'customer_id', sort: search.Sort.ASC }),
+            search.createColumn({ name: 'entityid', label: 'customer' }),
+            search.createColumn({ name: 'custentity_territory', label: 'territory' }),
+            search.createColumn({ name: 'category', label: 'customer_category' })
+        ];
+    }
+    
+    /**
+     * Map a customer search result to the dashboard record shape
+     */
+    function mapCustomerResult(result) {
+        return {
+            customer_id: result.getValue('internalid'),
+            customer: result.getValue('entityid'),
+            territory: result.getText('custentity_territory'),
+            customer_category: result.getText('category')
+        };
+    }
+    
     /**
      * Get customer master data
      */
@@ -203,22 +429,12 @@ define(['N/search', 'N/record', 'N/format'], function(search, record, format) {
             filters: customerIds.length > 0 ? 
                 [['internalid', 'anyof', customerIds]] : 
                 [],
-            columns: [
-                search.createColumn({ name: 'internalid', label: 'customer_id' }),
-                search.createColumn({ name: 'entityid', label: 'customer' }),
-                search.createColumn({ name: 'custentity_territory', label: 'territory' }),
-                search.createColumn({ name: 'category', label: 'customer_category' })
-            ]
+            columns: customerMasterColumns()
         });
         
         var results = [];
         customerSearch.run().each(function(result) {
-            results.push({
-                customer_id: result.getValue('internalid'),
-                customer: result.getValue('entityid'),
-                territory: result.getText('custentity_territory'),
-                customer_category: result.getText('category')
-            });
+            results.push(mapCustomerResult(result));
             return true;
         });
         
@@ -229,6 +445,28 @@ define(['N/search', 'N/record', 'N/format'], function(search, record, format) {
         };
     }
     
+    /**
+     * Get customer master records modified since a timestamp (paged)
+     * 
+     * Without modified_since every customer is returned, which is how the
+     * dashboard seeds its local customer cache.
+     */
+    function getCustomerMasterChanges(params) {
+        var filters = [];
+        
+        if (params.modified_since) {
+            filters.push(['lastmodifieddate', 'onorafter', toNetSuiteDateTime(params.modified_since)]);
+        }
+        
+        var customerSearch = search.create({
+            type: search.Type.CUSTOMER,
+            filters: filters,
+            columns: customerMasterColumns()
+        });
+        
+        return runPagedSearch(customerSearch, params, mapCustomerResult);
+    }
+    
     /**
      * Execute saved search
      */
@@ -284,14 +522,17 @@ define(['N/search', 'N/record', 'N/format'], function(search, record, format) {
             ]
         });
         
+        // Paged so a full load (no item_ids) is not capped at 4,000 results
         var costData = {};
-        itemSearch.run().each(function(result) {
-            var itemId = result.getValue('internalid');
-            costData[itemId] = {
-                cost: parseFloat(result.getValue('custitem_corrected_cost')) || 0,
-                retail: parseFloat(result.getValue('baseprice')) || 0
-            };
-            return true;
+        var pagedData = itemSearch.runPaged({ pageSize: 1000 });
+        pagedData.pageRanges.forEach(function(pageRange) {
+            pagedData.fetch({ index: pageRange.index }).data.forEach(function(result) {
+                var itemId = result.getValue('internalid');
+                costData[itemId] = {
+                    cost: parseFloat(result.getValue('custitem_corrected_cost')) || 0,
+                    retail: parseFloat(result.getValue('baseprice')) || 0
+                };
+            });
         });
         
         return {
@@ -300,6 +541,42 @@ define(['N/search', 'N/record', 'N/format'], function(search, record, format) {
         };
     }
     
+    /**
+     * Get a cheap version fingerprint of the cost/retail master
+     * 
+     * A single summary row (record count, last modification and cost/retail
+     * totals) changes whenever any corrected cost or retail value changes, so
+     * the dashboard can poll this instead of re-downloading the table.
+     */
+    function getCostRetailVersion(params) {
+        var versionSearch = search.create({
+            type: search.Type.ITEM,
+            filters: [],
+            columns: [
+                search.createColumn({ name: 'internalid', summary: search.Summary.COUNT }),
+                search.createColumn({ name: 'modified', summary: search.Summary.MAX }),
+                search.createColumn({ name: 'custitem_corrected_cost', summary: search.Summary.SUM }),
+                search.createColumn({ name: 'baseprice', summary: search.Summary.SUM })
+            ]
+        });
+        
+        var version = null;
+        versionSearch.run().each(function(result) {
+            version = [
+                result.getValue({ name: 'internalid', summary: search.Summary.COUNT }),
+                result.getValue({ name: 'modified', summary: search.Summary.MAX }),
+                result.getValue({ name: 'custitem_corrected_cost', summary: search.Summary.SUM }),
+                result.getValue({ name: 'baseprice', summary: search.Summary.SUM })
+            ].join('|');
+            return false;
+        });
+        
+        return {
+            status: 'success',
+            version: version
+        };
+    }
+    
     return {
         post: post
     };
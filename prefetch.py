@@ -0,0 +1,192 @@
+"""
+Drilldown Prefetcher
+Warms drilldown results for the top rows of each view in the background
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+def create_prefetch_executor(max_workers: int = 2) -> ThreadPoolExecutor:
+    """
+    Create the bounded thread pool running drilldown prefetches
+    
+    Args:
+        max_workers: Maximum prefetches running at once
+    
+    Returns:
+        ThreadPoolExecutor to share between prefetchers
+    """
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='drilldown-prefetch')
+
+
+class DrilldownPrefetcher:
+    """
+    Load the drilldowns users are most likely to open while they read a view
+    
+    schedule() submits one batched drilldown fetch for the top K rows of a view
+    to a thread pool. The pool is normally one bounded executor shared by
+    every session in the process; each prefetcher only keeps its own session's
+    jobs. Scheduling a different request for the same view replaces the
+    previous one: a prefetch that has not started is cancelled, and one
+    already running is left to finish but its result is discarded (its fact
+    table still lands in the processor cache).
+    """
+    
+    name = 'prefetch'
+    
+    # View row type -> DataProcessor batched drilldown method
+    DRILLDOWNS = {
+        'style': 'get_customers_by_styles',
+        'customer': 'get_styles_by_customers'
+    }
+    
+    def __init__(self, processor, top_k: int = 5, executor: Optional[ThreadPoolExecutor] = None,
+                 max_workers: int = 2, wait_seconds: Optional[float] = 10.0):
+        """
+        Initialize prefetcher
+        
+        Args:
+            processor: DataProcessor serving the drilldowns
+            top_k: Number of leading rows prefetched per view
+            executor: Executor shared by the prefetchers of every session
+                      (None creates one owned by this prefetcher)
+            max_workers: Maximum prefetches running at once in an owned executor
+            wait_seconds: How long get() waits for an unfinished prefetch
+                          before the caller loads the drilldown itself
+                          (None waits indefinitely)
+        """
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1")
+        
+        self.processor = processor
+        self.top_k = top_k
+        self.wait_seconds = wait_seconds
+        self._owns_executor = executor is None
+        self._executor = executor if executor is not None else create_prefetch_executor(max_workers)
+        self._jobs: Dict[str, Tuple[Tuple, Future]] = {}
+        self._lock = threading.Lock()
+        self.scheduled = 0
+        self.cancelled = 0
+        self.served = 0
+        self.timed_out = 0
+    
+    def _drop(self, future: Future):
+        """Cancel a replaced prefetch that has not finished (lock must be held)"""
+        if not future.done():
+            future.cancel()
+            self.cancelled += 1
+    
+    def schedule(self, kind: str, values: List[str], start_date, end_date) -> bool:
+        """
+        Prefetch the drilldowns for the top rows of a view
+        
+        Args:
+            kind: Row type of the view ('style' or 'customer')
+            values: Row values in rank order (only the first top_k are prefetched)
+            start_date: Start date
+            end_date: End date
+        
+        Returns:
+            True if a new prefetch was submitted
+        """
+        if kind not in self.DRILLDOWNS:
+            raise ValueError(f"Unsupported drilldown: {kind}")
+        
+        values = list(values)[:self.top_k]
+        request = (tuple(values), start_date, end_date)
+        fetch = getattr(self.processor, self.DRILLDOWNS[kind])
+        
+        with self._lock:
+            current = self._jobs.get(kind)
+            if current is not None and current[0] == request and not current[1].cancelled():
+                return False
+            
+            if current is not None:
+                self._drop(current[1])
+                del self._jobs[kind]
+            
+            if not values:
+                return False
+            
+            self._jobs[kind] = (request, self._executor.submit(fetch, values, start_date, end_date))
+            self.scheduled += 1
+        
+        return True
+    
+    def get(self, kind: str, value: str, start_date, end_date) -> Optional[pd.DataFrame]:
+        """
+        Get a prefetched drilldown, waiting up to wait_seconds for its prefetch
+        
+        A prefetch still queued behind other sessions' jobs, or running past
+        the wait, is not waited on any longer; the caller falls back to an
+        on-demand load.
+        
+        Args:
+            kind: Row type of the view ('style' or 'customer')
+            value: Row value drilled into
+            start_date: Start date
+            end_date: End date
+        
+        Returns:
+            Drilldown DataFrame, or None if it was not prefetched in time
+        """
+        with self._lock:
+            job = self._jobs.get(kind)
+        
+        if job is None:
+            return None
+        
+        (values, job_start, job_end), future = job
+        if value not in values or (job_start, job_end) != (start_date, end_date) or future.cancelled():
+            return None
+        
+        try:
+            drilldowns = future.result(timeout=self.wait_seconds)
+        except FutureTimeoutError:
+            with self._lock:
+                # Drop it from the queue if it never started
+                future.cancel()
+                self.timed_out += 1
+            return None
+        except Exception as e:
+            print(f"{kind} drilldown prefetch failed: {str(e)}")
+            return None
+        
+        with self._lock:
+            self.served += 1
+        
+        return drilldowns[value].copy()
+    
+    def cancel(self):
+        """Cancel every pending prefetch (e.g. when the data is refreshed)"""
+        with self._lock:
+            for _, future in self._jobs.values():
+                self._drop(future)
+            self._jobs.clear()
+    
+    def shutdown(self):
+        """Cancel pending prefetches and stop the worker threads of an owned executor"""
+        self.cancel()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get prefetch counters for monitoring
+        
+        Returns:
+            Dictionary with scheduled, cancelled, served and in-flight counts
+        """
+        with self._lock:
+            return {
+                'top_k': self.top_k,
+                'scheduled': self.scheduled,
+                'cancelled': self.cancelled,
+                'served': self.served,
+                'timed_out': self.timed_out,
+                'in_flight': sum(1 for _, future in self._jobs.values() if not future.done())
+            }
@@ -0,0 +1,348 @@
+"""
+Query Engines
+Pluggable executors for the filter + group-by step behind DataProcessor views
+"""
+
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from query_planner import FILTER_COLUMNS, FilterPlan
+
+
+# Per-line totals derived from fact columns: name -> (per-unit column, line count column)
+LINE_TOTALS = {
+    'line_cost': ('unit_cost', 'line_count'),
+    'line_retail': ('unit_retail', 'line_count')
+}
+
+
+class ConvertedFrames:
+    """
+    Per-fact-table cache of a converted copy (Arrow table, Polars frame, ...)
+    
+    Fact tables are cached and treated as read-only, so each one is converted
+    once and the copy is reused until the pandas frame is released.
+    """
+    
+    def __init__(self, convert: Callable[[pd.DataFrame], Any]):
+        """
+        Initialize converted frame cache
+        
+        Args:
+            convert: Function converting a pandas frame
+        """
+        self.convert = convert
+        self._frames: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, df: pd.DataFrame) -> Any:
+        """Converted copy of a fact table, converted on first use"""
+        key = id(df)
+        
+        with self._lock:
+            frame = self._frames.get(key)
+        
+        if frame is None:
+            frame = self.convert(df)
+            with self._lock:
+                self._frames[key] = frame
+            weakref.finalize(df, self._release, key)
+        
+        return frame
+    
+    def _release(self, key: int):
+        """Drop the copy of a released fact table"""
+        with self._lock:
+            self._frames.pop(key, None)
+
+
+class PandasEngine:
+    """
+    Run view aggregations with pandas on the in-memory fact table
+    """
+    
+    name = 'pandas'
+    scans_parquet = False
+    
+    def aggregate(self, df: pd.DataFrame, predicates: Dict[str, Tuple], key: str,
+                  aggregates: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+        """
+        Filter fact rows and aggregate them by a key column
+        
+        Args:
+            df: Fact table (not modified)
+            predicates: Filter name -> tuple of allowed values
+            key: Column to group by
+            aggregates: Output column -> (function, source column or LINE_TOTALS name)
+        
+        Returns:
+            One row per key value, ordered by key (empty if nothing matches)
+        """
+        df = FilterPlan.apply(df, predicates)
+        
+        if df.empty or key not in df.columns:
+            return pd.DataFrame()
+        
+        columns = {key: df[key]}
+        agg_dict = {}
+        for output, (func, source) in aggregates.items():
+            if source in LINE_TOTALS:
+                unit_column, count_column = LINE_TOTALS[source]
+                columns[output] = df[unit_column] * df[count_column]
+            else:
+                columns[output] = df[source]
+            agg_dict[output] = func
+        
+        return pd.DataFrame(columns).groupby(key, observed=True).agg(agg_dict).reset_index()
+
+
+class DuckDBEngine:
+    """
+    Run view aggregations as DuckDB SQL over the fact table
+    
+    Each fact table is exposed to DuckDB as an Arrow table (converted once and
+    scanned zero-copy afterwards) and aggregated with multi-threaded hashing. With a memory_limit, large aggregations spill to disk
+    instead of failing. The engine can also fold warehouse Parquet files into
+    item/customer partial sums directly, without loading the lines in pandas.
+    """
+    
+    name = 'duckdb'
+    scans_parquet = True
+    
+    def __init__(self, threads: Optional[int] = None, memory_limit: Optional[str] = None):
+        """
+        Initialize DuckDB engine
+        
+        Args:
+            threads: Worker threads (None uses every core)
+            memory_limit: Memory cap such as '2GB' (None uses DuckDB's default)
+        """
+        import duckdb
+        import pyarrow
+        
+        config = {}
+        if threads is not None:
+            config['threads'] = threads
+        if memory_limit is not None:
+            config['memory_limit'] = memory_limit
+        
+        self._con = duckdb.connect(database=':memory:', config=config)
+        self._tables = ConvertedFrames(lambda df: pyarrow.Table.from_pandas(df, preserve_index=False))
+    
+    @staticmethod
+    def _quote(identifier: str) -> str:
+        """Quote a column name for SQL"""
+        return '"' + identifier.replace('"', '""') + '"'
+    
+    def _expression(self, source: str) -> str:
+        """SQL expression for an aggregation source"""
+        if source in LINE_TOTALS:
+            unit_column, count_column = LINE_TOTALS[source]
+            return f"{self._quote(unit_column)} * {self._quote(count_column)}"
+        return self._quote(source)
+    
+    def _query(self, sql: str, params: List, frames: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Run a query on a private cursor (safe to call from several threads)"""
+        cursor = self._con.cursor()
+        try:
+            for name, frame in (frames or {}).items():
+                cursor.register(name, frame)
+            return cursor.execute(sql, params).df()
+        finally:
+            cursor.close()
+    
+    def aggregate(self, df: pd.DataFrame, predicates: Dict[str, Tuple], key: str,
+                  aggregates: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+        """
+        Filter fact rows and aggregate them by a key column
+        
+        'first' picks the non-null value with the lowest first_seen, which is
+        the fact table order, so results match PandasEngine.
+        
+        Args:
+            df: Fact table (not modified)
+            predicates: Filter name -> tuple of allowed values
+            key: Column to group by
+            aggregates: Output column -> (function, source column or LINE_TOTALS name)
+        
+        Returns:
+            One row per key value, ordered by key (empty if nothing matches)
+        """
+        if df.empty or key not in df.columns:
+            return pd.DataFrame()
+        
+        select = [self._quote(key)]
+        for output, (func, source) in aggregates.items():
+            expression = self._expression(source)
+            if func == 'sum':
+                select.append(f"sum({expression}) AS {self._quote(output)}")
+            elif func == 'first':
+                select.append(f"arg_min({expression}, first_seen) FILTER (WHERE {expression} IS NOT NULL) "
+                              f"AS {self._quote(output)}")
+            else:
+                raise ValueError(f"Unsupported aggregation: {func}")
+        
+        where = [f"{self._quote(key)} IS NOT NULL"]
+        params = []
+        for name, values in predicates.items():
+            column = FILTER_COLUMNS[name]
+            if column not in df.columns:
+                # Attribute not available for these rows - nothing can match
+                return pd.DataFrame()
+            where.append(f"{self._quote(column)} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        
+        sql = (f"SELECT {', '.join(select)} FROM fact WHERE {' AND '.join(where)} "
+               f"GROUP BY {self._quote(key)} ORDER BY {self._quote(key)}")
+        result = self._query(sql, params, {'fact': self._tables.get(df)})
+        
+        return result if not result.empty else pd.DataFrame()
+    
+    def fold_parquet(self, files: List[str], start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Fold warehouse Parquet files into item/customer partial sums
+        
+        Args:
+            files: Month partition files to scan
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+        
+        Returns:
+            DataFrame with one row per (item_id, customer_id), ordered by
+            first_seen (the position of the pair's first line)
+        """
+        if not files:
+            return pd.DataFrame()
+        
+        # Lines are numbered in the order ParquetWarehouse.read_lines streams
+        # them: transaction ID, then month file and row within the file (the
+        # RESTlet's line order), since an invoice's lines share one ID
+        paths = ', '.join("'" + str(path).replace("'", "''") + "'" for path in files)
+        sql = f"""
+            WITH lines AS (
+                SELECT item_id, customer_id, sales_units, sales_dollars, returns,
+                       row_number() OVER (
+                           ORDER BY TRY_CAST(transaction_id AS BIGINT) NULLS LAST, filename, file_row_number
+                       ) AS line_seq
+                FROM read_parquet([{paths}], filename = true, file_row_number = true)
+                WHERE transaction_date BETWEEN CAST(? AS DATE) AND CAST(? AS DATE)
+            )
+            SELECT item_id, customer_id,
+                   sum(sales_units) AS sales_units,
+                   sum(sales_dollars) AS sales_dollars,
+                   sum(returns) AS returns,
+                   count(*) AS line_count,
+                   min(line_seq) AS first_seen
+            FROM lines
+            GROUP BY item_id, customer_id
+            ORDER BY first_seen
+        """
+        result = self._query(sql, [start_date, end_date])
+        
+        return result if not result.empty else pd.DataFrame()
+
+
+class PolarsEngine:
+    """
+    Run view aggregations as Polars lazy query plans
+    
+    Filters, per-line totals and the group-by are declared on a LazyFrame and
+    collected once, so Polars optimizes them as a single plan (predicate and
+    projection pushdown) and runs it on every core. Each fact table is
+    converted to Polars once; results come back as pandas frames.
+    
+    Only this aggregation stage runs in Polars. The master data joins stay in
+    the pandas fact table build, and derived metrics, top-N selection and
+    ranking stay in DataProcessor, because the grouped result is cached and
+    shared by queries that differ only in ranking metric or N.
+    """
+    
+    name = 'polars'
+    scans_parquet = False
+    
+    def __init__(self):
+        """Initialize Polars engine"""
+        import polars
+        
+        self._pl = polars
+        self._frames = ConvertedFrames(polars.from_pandas)
+    
+    def aggregate(self, df: pd.DataFrame, predicates: Dict[str, Tuple], key: str,
+                  aggregates: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+        """
+        Filter fact rows and aggregate them by a key column
+        
+        Args:
+            df: Fact table (not modified)
+            predicates: Filter name -> tuple of allowed values
+            key: Column to group by
+            aggregates: Output column -> (function, source column or LINE_TOTALS name)
+        
+        Returns:
+            One row per key value, ordered by key (empty if nothing matches)
+        """
+        pl = self._pl
+        
+        if df.empty or key not in df.columns:
+            return pd.DataFrame()
+        
+        condition = pl.col(key).is_not_null()
+        for name, values in predicates.items():
+            column = FILTER_COLUMNS[name]
+            if column not in df.columns:
+                # Attribute not available for these rows - nothing can match
+                return pd.DataFrame()
+            condition = condition & pl.col(column).is_in(list(values))
+        
+        expressions = []
+        for output, (func, source) in aggregates.items():
+            if source in LINE_TOTALS:
+                unit_column, count_column = LINE_TOTALS[source]
+                values = pl.col(unit_column) * pl.col(count_column)
+            else:
+                values = pl.col(source)
+            
+            if func == 'sum':
+                expressions.append(values.sum().alias(output))
+            elif func == 'first':
+                expressions.append(values.drop_nulls().first().alias(output))
+            else:
+                raise ValueError(f"Unsupported aggregation: {func}")
+        
+        plan = (
+            self._frames.get(df).lazy()
+            .filter(condition)
+            .group_by(key)
+            .agg(expressions)
+            .sort(key)
+        )
+        result = plan.collect().to_pandas()
+        
+        return result if not result.empty else pd.DataFrame()
+
+
+ENGINES = {
+    'pandas': PandasEngine,
+    'duckdb': DuckDBEngine,
+    'polars': PolarsEngine
+}
+
+
+def create_engine(name: str = 'pandas', **options):
+    """
+    Create a query engine by name
+    
+    Args:
+        name: Engine name (see ENGINES)
+        **options: Engine-specific options (e.g. threads, memory_limit for DuckDB)
+    
+    Returns:
+        Query engine instance
+    """
+    if name not in ENGINES:
+        raise ValueError(f"Unsupported query engine: {name}")
+    
+    return ENGINES[name](**options)
@@ -0,0 +1,262 @@
+"""
+Query Planner
+Declarative view queries, and which filter predicates run in NetSuite or locally
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from result_cache import normalize_filter_value
+
+
+# Filter name -> fact table column it constrains
+FILTER_COLUMNS = {
+    'category': 'category',
+    'vendor': 'vendor',
+    'brand': 'brand',
+    'territory': 'territory',
+    'style': 'style',
+    'customer': 'customer'
+}
+
+# Predicates the RESTlet transaction search can evaluate
+RESTLET_FILTERS = ('category', 'vendor', 'brand', 'territory', 'style', 'customer')
+
+# Predicates views push down by default. A single style/customer drilldown is
+# sliced from a fact table already cached for the window instead of running a
+# search per value; only batched drilldowns push their value list down
+VIEW_PUSHDOWN_FILTERS = ('category', 'vendor', 'brand', 'territory')
+
+
+def date_partitions(start_date: date, end_date: date) -> List[Tuple[date, date]]:
+    """
+    Decompose a date range into aligned calendar partitions
+    
+    Whole calendar months are kept as one partition; the remaining edges are
+    split into week blocks (a Monday-Sunday week clipped to its month) and
+    single days. Blocks are aligned to the calendar rather than to the range,
+    so overlapping or shifted ranges share every block they both fully cover.
+    
+    Args:
+        start_date: First day of the range
+        end_date: Last day of the range (inclusive)
+    
+    Returns:
+        Consecutive (start, end) partitions covering the range, oldest first
+    """
+    partitions = []
+    day = start_date
+    
+    while day <= end_date:
+        next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        month_end = next_month - timedelta(days=1)
+        week_end = min(day + timedelta(days=6 - day.weekday()), month_end)
+        
+        if day.day == 1 and month_end <= end_date:
+            block_end = month_end
+        elif (day.weekday() == 0 or day.day == 1) and week_end <= end_date:
+            block_end = week_end
+        else:
+            block_end = day
+        
+        partitions.append((day, block_end))
+        day = block_end + timedelta(days=1)
+    
+    return partitions
+
+
+class FilterPlan:
+    """
+    Split user filters into RESTlet pushdown predicates and local residual predicates
+    
+    Predicates are normalized (sorted tuples, "All"/empty dropped). Pushed-down
+    predicates shrink the NetSuite search itself; the residual is applied to
+    raw fact rows before grouping, so work stays proportional to the slice.
+    """
+    
+    def __init__(self, predicates: Dict[str, Tuple], pushdown_fields: Iterable[str] = RESTLET_FILTERS):
+        """
+        Initialize filter plan
+        
+        Args:
+            predicates: Normalized predicates, filter name -> tuple of allowed values
+            pushdown_fields: Filter names the RESTlet can evaluate
+        """
+        self.predicates = predicates
+        self.pushdown = {}
+        self.residual = {}
+        
+        pushdown_fields = set(pushdown_fields)
+        for name, values in predicates.items():
+            if name in pushdown_fields:
+                self.pushdown[name] = values
+            else:
+                self.residual[name] = values
+    
+    @classmethod
+    def build(cls, pushdown_fields: Iterable[str] = RESTLET_FILTERS, **filters) -> 'FilterPlan':
+        """
+        Build a plan from raw filter arguments
+        
+        Args:
+            pushdown_fields: Filter names the RESTlet can evaluate
+            **filters: Filter values by name (lists, single values or None)
+        
+        Returns:
+            FilterPlan
+        """
+        predicates = {}
+        for name, value in filters.items():
+            if name not in FILTER_COLUMNS:
+                raise ValueError(f"Unsupported filter: {name}")
+            
+            if isinstance(value, str):
+                value = [value]
+            
+            values = normalize_filter_value(value)
+            if values is not None:
+                predicates[name] = values
+        
+        return cls(predicates, pushdown_fields)
+    
+    def pushdown_signature(self) -> Tuple:
+        """
+        Hashable signature of the pushed-down predicates
+        
+        Returns:
+            Sorted tuple of (filter name, values) pairs
+        """
+        return tuple(sorted(self.pushdown.items()))
+    
+    def subsumed_by(self, pushdown_signature: Tuple) -> bool:
+        """
+        Whether rows fetched with other pushed-down predicates include every row this plan needs
+        
+        A fetch subsumes the plan when each of its predicates also constrains
+        the plan, to the same values or a superset of them (fewer predicates
+        means broader rows).
+        
+        Args:
+            pushdown_signature: pushdown_signature() of the fetch
+        
+        Returns:
+            True if the plan can be answered from those rows
+        """
+        for name, values in pushdown_signature:
+            if name not in self.predicates or not set(self.predicates[name]) <= set(values):
+                return False
+        return True
+    
+    def restlet_filters(self) -> Dict:
+        """
+        Build the RESTlet filters payload for the pushed-down predicates
+        
+        Returns:
+            Filters dictionary for get_sales_transactions / get_sales_summary
+        """
+        filters = {'transaction_type': 'sales'}
+        
+        for name, values in self.pushdown.items():
+            filters[name] = list(values)
+        
+        return filters
+    
+    @staticmethod
+    def apply(df: pd.DataFrame, predicates: Dict[str, Tuple]) -> pd.DataFrame:
+        """
+        Apply predicates to fact rows
+        
+        Args:
+            df: Fact rows
+            predicates: Filter name -> tuple of allowed values
+        
+        Returns:
+            Rows matching every predicate
+        """
+        if df.empty or not predicates:
+            return df
+        
+        mask = pd.Series(True, index=df.index)
+        for name, values in predicates.items():
+            column = FILTER_COLUMNS[name]
+            if column not in df.columns:
+                # Attribute not available for these rows - nothing can match
+                return df.iloc[0:0]
+            mask &= df[column].isin(values)
+        
+        return df[mask]
+
+
+class TopNQuery:
+    """
+    Declarative spec of a grouped, ranked view over the fact table
+    
+    A query names the dimension to group by, the aggregations to compute, the
+    date range and filters, and how to order the groups. DataProcessor.execute
+    runs every query through the same cached stages (fact table -> grouped
+    metrics -> ranking), so a new view is a new spec rather than a new pipeline.
+    """
+    
+    def __init__(self, group_by: str, aggregates: Dict[str, Tuple[str, str]], start_date, end_date,
+                 filters: Optional[Dict[str, Any]] = None, metric: str = 'sales_units',
+                 top_n: Optional[int] = None, ranked: bool = True):
+        """
+        Initialize query
+        
+        Args:
+            group_by: Fact column to group by (e.g. 'style', 'customer')
+            aggregates: Output column -> (function, fact column)
+            start_date: Start date
+            end_date: End date
+            filters: Filter values by name (see FILTER_COLUMNS)
+            metric: Column the groups are ordered by (descending)
+            top_n: Number of groups to keep (None keeps every group)
+            ranked: Whether to add a 1-based rank column
+        """
+        self.group_by = group_by
+        self.aggregates = aggregates
+        self.start_date = start_date
+        self.end_date = end_date
+        self.filters = dict(filters or {})
+        self.metric = metric
+        self.top_n = top_n
+        self.ranked = ranked
+    
+    def filter_plan(self, pushdown_fields: Iterable[str] = RESTLET_FILTERS) -> FilterPlan:
+        """
+        Plan the query's filters
+        
+        Args:
+            pushdown_fields: Filter names the RESTlet can evaluate
+        
+        Returns:
+            FilterPlan
+        """
+        return FilterPlan.build(pushdown_fields, **self.filters)
+    
+    def group_signature(self, plan: FilterPlan) -> Tuple:
+        """
+        Cache key of the grouped-metrics stage (shared across metric and N)
+        
+        Args:
+            plan: FilterPlan of the query
+        
+        Returns:
+            Hashable signature
+        """
+        return ('grouped', normalize_filter_value(self.start_date), normalize_filter_value(self.end_date),
+                tuple(sorted(plan.predicates.items())), self.group_by, tuple(self.aggregates.items()))
+    
+    def signature(self, plan: FilterPlan) -> Tuple:
+        """
+        Cache key of the final result
+        
+        Args:
+            plan: FilterPlan of the query
+        
+        Returns:
+            Hashable signature
+        """
+        return self.group_signature(plan)[1:] + ('ranked', self.metric, self.top_n, self.ranked)
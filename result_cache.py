@@ -0,0 +1,248 @@
+"""
+Result Cache
+Size-bounded TTL/LRU cache for DataProcessor fact tables and query results
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+def normalize_filter_value(value: Any) -> Any:
+    """
+    Normalize a filter value so equivalent selections produce the same key
+    
+    - Lists/tuples/sets are sorted and de-duplicated
+    - Empty selections and selections containing "All" collapse to None
+    - Dates and datetimes become ISO strings
+    """
+    if isinstance(value, (list, tuple, set)):
+        values = [normalize_filter_value(v) for v in value]
+        if not values or "All" in values:
+            return None
+        return tuple(sorted(set(values), key=str))
+    
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    
+    if isinstance(value, date):
+        return value.isoformat()
+    
+    return value
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the in-memory size of a cached value in bytes
+    
+    Args:
+        value: Cached value
+    
+    Returns:
+        Approximate size in bytes
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Thread-safe TTL + LRU cache bounded by total byte size
+    """
+    
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, ttl_seconds: Optional[float] = 3600):
+        """
+        Initialize result cache
+        
+        Args:
+            max_bytes: Maximum total estimated size of cached values
+            ttl_seconds: Seconds an entry stays valid (None disables expiry)
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.subsumption_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def _is_expired(self, stored_at: float) -> bool:
+        """Check whether an entry stored at the given time has expired"""
+        return self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds
+    
+    def _remove(self, key: Tuple):
+        """Remove an entry and release its bytes (lock must be held)"""
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+    
+    def get(self, key: Tuple, default: Any = None) -> Any:
+        """
+        Look up a cached value
+        
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+        
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            
+            if entry is not None and self._is_expired(entry[1]):
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return default
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def find(self, match: Callable[[Tuple], bool]) -> Optional[Tuple[Tuple, Any]]:
+        """
+        Find the smallest unexpired entry whose key satisfies a predicate
+        
+        Used after a get() miss to serve a request from a broader cached entry
+        (e.g. a fact table fetched with fewer filters); a match is counted as a
+        subsumption hit.
+        
+        Args:
+            match: Function returning True for keys that can serve the request
+        
+        Returns:
+            (key, value) of the match, or None
+        """
+        with self._lock:
+            best = None
+            for key, (value, stored_at, size) in self._entries.items():
+                if not self._is_expired(stored_at) and match(key) and (best is None or size < best[2]):
+                    best = (key, value, size)
+            
+            if best is None:
+                return None
+            
+            self._entries.move_to_end(best[0])
+            self.subsumption_hits += 1
+            return best[0], best[1]
+    
+    def replace(self, key: Tuple, value: Any) -> bool:
+        """
+        Swap the value of a cached entry without restarting its TTL
+        
+        Args:
+            key: Cache key
+            value: New value
+        
+        Returns:
+            True if the entry was present and replaced
+        """
+        size = estimate_size(value)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            
+            self._remove(key)
+            if size > self.max_bytes:
+                return False
+            
+            self._entries[key] = (value, entry[1], size)
+            self.current_bytes += size
+            
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            
+            return True
+    
+    def put(self, key: Tuple, value: Any):
+        """
+        Store a value, evicting least recently used entries to stay under max_bytes
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        size = estimate_size(value)
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            # Values larger than the whole budget are not cached
+            if size > self.max_bytes:
+                return
+            
+            self._entries[key] = (value, time.monotonic(), size)
+            self.current_bytes += size
+            
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def items(self) -> List[Tuple[Tuple, Any]]:
+        """
+        Snapshot the unexpired entries
+        
+        Returns:
+            List of (key, value) pairs, least recently used first
+        """
+        with self._lock:
+            return [(key, value) for key, (value, stored_at, _) in self._entries.items()
+                    if not self._is_expired(stored_at)]
+    
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters for monitoring
+        
+        Returns:
+            Dictionary with entry count, size and hit/miss counters
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'subsumption_hits': self.subsumption_hits,
+                'true_misses': self.misses - self.subsumption_hits,
+                'hit_rate': (self.hits + self.subsumption_hits) / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
@@ -0,0 +1,91 @@
+"""
+Singleflight
+Coalesce identical concurrent calls into one execution with a shared result
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """An in-flight call and the callers waiting on it"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers share its outcome
+    
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block until it finishes and receive the same result (or the
+    same exception). Nothing is kept once the call completes - callers that
+    arrive later start a new call, so this adds no staleness on top of the
+    caches. Shared results are returned as-is and must be treated as
+    read-only.
+    """
+    
+    name = 'singleflight'
+    
+    def __init__(self):
+        """Initialize singleflight group"""
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+    
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run func for a key, or wait for the identical call already in flight
+        
+        Args:
+            key: Hashable identity of the call
+            func: Function to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+        
+        Returns:
+            Result of the (possibly shared) call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing counters for monitoring
+        
+        Returns:
+            Dictionary with executed, shared and in-flight call counts
+        """
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'shared': self.shared,
+                'in_flight': len(self._calls)
+            }
@@ -0,0 +1,108 @@
+"""
+Synthetic Data for the Top 40 Dashboard Tests
+In-memory NetSuite stand-in and view helpers shared by the offline test scripts
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from benchmark import make_synthetic_transactions
+from data_processor import DataProcessor
+
+
+START_DATE = date(2025, 1, 1)
+END_DATE = date(2025, 6, 30)
+
+FILTER_CASES = [
+    {'category': None, 'vendor': None},
+    {'category': ['BOOTS'], 'vendor': None},
+    {'category': ['BOOTS', 'SANDALS'], 'vendor': ['DREW SHOE'], 'brand': ['DREW']},
+    {'category': None, 'vendor': None, 'territory': ['WEST']},
+    {'category': ['NO SUCH CATEGORY'], 'vendor': None}
+]
+
+
+class SyntheticConnector:
+    """In-memory stand-in for NetSuiteConnector serving synthetic data"""
+    
+    account_id = 'SYNTHETIC'
+    
+    def __init__(self, n_lines: int = 50_000, n_items: int = 600, n_customers: int = 300, seed: int = 7,
+                 lines_per_invoice: int = 25):
+        rng = np.random.default_rng(seed)
+        
+        lines = make_synthetic_transactions(n_lines, n_items, n_customers, seed)
+        # Invoices carry several lines under one internal ID, like the RESTlet search
+        lines['transaction_id'] = (np.arange(n_lines) // lines_per_invoice).astype(str)
+        # Lines come back in internal ID order, which follows the transaction date
+        days = np.sort(rng.integers(0, 365, n_lines))
+        lines['transaction_date'] = [(START_DATE + timedelta(days=int(d))).strftime("%m/%d/%Y") for d in days]
+        lines['transaction_type'] = 'CustInvc'
+        self.lines = lines
+        self._days = pd.to_datetime(lines['transaction_date'], format="%m/%d/%Y").dt.date
+        
+        self.items = pd.DataFrame({
+            'item_id': np.arange(n_items).astype(str),
+            'style': [f"STYLE-{i // 4:03d}" for i in range(n_items)],
+            'material_desc': rng.choice(['LEATHER', 'SUEDE', None], n_items),
+            'color_desc': rng.choice(['BLACK', 'BROWN', 'WHITE'], n_items),
+            'category': rng.choice(['BOOTS', 'SANDALS', 'SNEAKERS', None], n_items),
+            'vendor': rng.choice(['DREW SHOE', 'OTHER VENDOR'], n_items),
+            'brand': rng.choice(['DREW', 'BELLA', None], n_items)
+        })
+        self.customers = pd.DataFrame({
+            'customer_id': np.arange(n_customers).astype(str),
+            'customer': [f"CUSTOMER {c:03d}" for c in range(n_customers)],
+            'territory': rng.choice(['WEST', 'EAST', 'MIDWEST', None], n_customers),
+            'customer_category': rng.choice(['RETAIL', 'ONLINE', None], n_customers)
+        })
+        costs = rng.uniform(5, 60, n_items).round(2)
+        self.cost_retail = {str(i): {'cost': float(costs[i]), 'retail': round(float(costs[i]) * 2.5, 2)}
+                            for i in range(n_items) if i % 17}
+    
+    def get_sales_transactions(self, start_date: str, end_date: str, filters=None):
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date)
+        in_range = (self._days >= start) & (self._days <= end)
+        return self.lines[in_range.to_numpy()].to_dict('records')
+    
+    def iter_sales_transactions(self, start_date: str, end_date: str, filters=None, page_size: int = 1000):
+        transactions = self.get_sales_transactions(start_date, end_date, filters)
+        for offset in range(0, len(transactions), page_size):
+            yield transactions[offset:offset + page_size]
+    
+    def get_item_master(self, item_ids=None):
+        return self.items[self.items['item_id'].isin(item_ids)].to_dict('records')
+    
+    def get_customer_master(self, customer_ids=None):
+        return self.customers[self.customers['customer_id'].isin(customer_ids)].to_dict('records')
+    
+    def get_cost_retail_data(self, item_ids=None):
+        return {item_id: self.cost_retail[item_id] for item_id in item_ids if item_id in self.cost_retail}
+
+
+def run_views(processor: DataProcessor) -> dict:
+    """Run every public view for the filter cases"""
+    results = {}
+    
+    for i, filters in enumerate(FILTER_CASES):
+        results[f'styles_{i}'] = processor.get_top_40_styles(
+            START_DATE, END_DATE, filters['category'], filters['vendor'], filters.get('brand'))
+        results[f'customers_{i}'] = processor.get_top_40_customers(
+            START_DATE, END_DATE, filters['category'], filters['vendor'], filters.get('brand'),
+            filters.get('territory'))
+    
+    results['customers_by_style'] = processor.get_customers_by_style('STYLE-007', START_DATE, END_DATE)
+    results['styles_by_customer'] = processor.get_styles_by_customer('CUSTOMER 042', START_DATE, END_DATE)
+    
+    return results
+
+
+def assert_same_views(expected: dict, actual: dict):
+    """Compare view results, allowing for floating point summation order"""
+    for name, frame in expected.items():
+        pd.testing.assert_frame_equal(frame, actual[name], check_dtype=False, check_exact=False,
+                                      obj=name)
+
@@ -0,0 +1,45 @@
+"""
+Benchmark Smoke Tests for Top 40 Dashboard
+Runs every benchmark on a small synthetic table so the script keeps working
+(runs offline - no NetSuite connection needed)
+"""
+
+import sys
+
+from benchmark import run_all_benchmarks
+
+
+def test_benchmarks_run():
+    """Every benchmark runs and its correctness checks pass at a small size"""
+    print("=" * 60)
+    print("TEST 1: Benchmark Smoke Run")
+    print("=" * 60)
+    
+    run_all_benchmarks(n_lines=5_000)
+    print("✅ all benchmarks ran")
+
+
+def run_all_tests():
+    """Run all benchmark smoke tests"""
+    tests = [test_benchmarks_run]
+    failed = 0
+    
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {str(e)}")
+    
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    
+    if success:
+        print("\n✅ All benchmark smoke tests passed.")
+        sys.exit(0)
+    else:
+        print("\n❌ Some tests failed. Please review errors above.")
+        sys.exit(1)
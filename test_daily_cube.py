@@ -0,0 +1,185 @@
+"""
+Daily Cube Tests for Top 40 Dashboard
+Checks prefix-sum range totals against a plain scan of the transaction lines
+(runs offline - no NetSuite connection needed)
+"""
+
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from daily_cube import DailyCube
+
+
+HISTORY_START = date(2025, 1, 1)
+
+
+class LineStore:
+    """In-memory transaction lines served the way the RESTlet pages them"""
+    
+    def __init__(self, n_lines: int = 20_000, days: int = 120, seed: int = 3):
+        rng = np.random.default_rng(seed)
+        offsets = np.sort(rng.integers(0, days, n_lines))
+        self.lines = pd.DataFrame({
+            'transaction_id': (np.arange(n_lines) + 1000).astype(str),
+            'day': [HISTORY_START + timedelta(days=int(d)) for d in offsets],
+            'item_id': rng.integers(0, 150, n_lines).astype(str),
+            'customer_id': rng.integers(0, 60, n_lines).astype(str),
+            'sales_units': rng.integers(1, 12, n_lines).astype(float),
+            'sales_dollars': rng.uniform(5, 500, n_lines).round(2),
+            'returns': rng.choice([0.0, 0.0, 1.0], n_lines)
+        })
+        self.fetches = []
+        self.delay = 0.0
+    
+    def fetch_lines(self, start_date: str, end_date: str):
+        self.fetches.append((start_date, end_date))
+        time.sleep(self.delay)
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        lines = self.lines[(self.lines['day'] >= start) & (self.lines['day'] <= end)].copy()
+        lines['transaction_date'] = [d.strftime("%m/%d/%Y") for d in lines['day']]
+        records = lines.drop(columns=['day']).to_dict('records')
+        return [records[offset:offset + 1000] for offset in range(0, len(records), 1000)]
+    
+    def scan(self, start_date: date, end_date: date) -> pd.DataFrame:
+        """Reference totals by a plain scan of the lines in the range"""
+        lines = self.lines[(self.lines['day'] >= start_date) & (self.lines['day'] <= end_date)].copy()
+        lines['line_count'] = 1
+        lines['first_seen'] = lines['transaction_id'].astype(float)
+        totals = lines.groupby(['item_id', 'customer_id'], sort=False).agg(
+            sales_units=('sales_units', 'sum'), sales_dollars=('sales_dollars', 'sum'),
+            returns=('returns', 'sum'), line_count=('line_count', 'sum'), first_seen=('first_seen', 'min'))
+        return totals.reset_index().sort_values('first_seen', kind='stable').reset_index(drop=True)
+
+
+RANGES = [
+    (date(2025, 1, 1), date(2025, 4, 30)),
+    (date(2025, 2, 10), date(2025, 3, 17)),
+    (date(2025, 3, 3), date(2025, 3, 3)),
+    (date(2025, 4, 25), date(2025, 4, 30))
+]
+
+
+def assert_matches_scan(cube: DailyCube, store: LineStore):
+    """Compare range totals with the plain scan for every test range"""
+    for start_date, end_date in RANGES:
+        expected = store.scan(start_date, end_date)
+        actual = cube.range_totals(start_date, end_date)
+        pd.testing.assert_frame_equal(expected, actual[expected.columns], check_dtype=False,
+                                      obj=f"{start_date}..{end_date}")
+
+
+def test_range_totals_match_scan():
+    """Prefix-sum totals and first_seen match a scan of the lines"""
+    print("=" * 60)
+    print("TEST 1: Range Totals vs Line Scan")
+    print("=" * 60)
+    
+    store = LineStore()
+    cube = DailyCube(store.fetch_lines, HISTORY_START, date_format="%m/%d/%Y")
+    cube.sync(through=date(2025, 4, 30))
+    
+    assert_matches_scan(cube, store)
+    assert cube.range_totals(date(2024, 6, 1), date(2024, 6, 30)).empty
+    print(f"✅ {len(RANGES)} ranges match")
+
+
+def test_overlap_resync():
+    """An incremental sync replaces the re-pulled overlap days"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Overlap Re-sync")
+    print("=" * 60)
+    
+    store = LineStore()
+    cube = DailyCube(store.fetch_lines, HISTORY_START, overlap_days=3, date_format="%m/%d/%Y")
+    cube.sync(through=date(2025, 4, 20))
+    
+    # Late edit inside the overlap window, a deleted line, and new days after it
+    edited = store.lines['day'] == date(2025, 4, 19)
+    store.lines.loc[edited, 'sales_units'] += 5
+    store.lines = store.lines.drop(store.lines.index[store.lines['day'] == date(2025, 4, 18)][:1])
+    generation = cube.generation
+    
+    cube.sync(through=date(2025, 4, 30))
+    
+    assert store.fetches[-1] == ('2025-04-17', '2025-04-30'), store.fetches[-1]
+    assert cube.generation == generation + 1
+    assert_matches_scan(cube, store)
+    print("✅ re-pulled days replaced, totals match")
+
+
+def test_concurrent_sync_if_stale():
+    """Concurrent callers on a stale cube trigger a single pull"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Concurrent Sync")
+    print("=" * 60)
+    
+    store = LineStore(n_lines=2_000)
+    store.delay = 0.3
+    cube = DailyCube(store.fetch_lines, HISTORY_START, date_format="%m/%d/%Y")
+    
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        synced = list(executor.map(lambda _: cube.sync_if_stale(), range(6)))
+    
+    assert len(store.fetches) == 1, store.fetches
+    assert synced.count(True) == 1, synced
+    print("✅ 6 callers, 1 pull")
+
+
+def test_earlier_history_start_reseeds():
+    """A persisted cube seeded after the configured start is re-seeded, not served"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Earlier History Start")
+    print("=" * 60)
+    
+    store = LineStore()
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = f"{cache_dir}/daily_cube.pkl"
+        DailyCube(store.fetch_lines, date(2025, 3, 1), path=path, date_format="%m/%d/%Y").sync(
+            through=date(2025, 4, 30))
+        
+        # The same start (or a later one) reuses the file
+        assert DailyCube(store.fetch_lines, date(2025, 3, 1), path=path, date_format="%m/%d/%Y").load()
+        
+        # daily_cube_start moved earlier: the file lacks Jan-Feb
+        cube = DailyCube(store.fetch_lines, HISTORY_START, path=path, date_format="%m/%d/%Y")
+        assert not cube.load()
+        assert not cube.covers(date(2025, 1, 1), date(2025, 1, 31)), "served days never loaded"
+        
+        cube.sync(through=date(2025, 4, 30))
+        assert store.fetches[-1] == ('2025-01-01', '2025-04-30'), store.fetches[-1]
+        assert_matches_scan(cube, store)
+    print("✅ cube re-seeded from the earlier start")
+
+
+def run_all_tests():
+    """Run all daily cube tests"""
+    tests = [test_range_totals_match_scan, test_overlap_resync, test_concurrent_sync_if_stale,
+             test_earlier_history_start_reseeds]
+    failed = 0
+    
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {str(e)}")
+    
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    
+    if success:
+        print("\n✅ All daily cube tests passed.")
+        sys.exit(0)
+    else:
+        print("\n❌ Some tests failed. Please review errors above.")
+        sys.exit(1)
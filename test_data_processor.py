@@ -0,0 +1,386 @@
+"""
+Data Processor Tests for Top 40 Dashboard
+Checks DataProcessor caching and business rules on synthetic data
+(runs offline - no NetSuite connection needed)
+"""
+
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from daily_cube import create_daily_cube
+from data_processor import DataProcessor, TransactionAggregator
+from master_data import CostRetailCache, cost_retail_frame
+from synthetic_data import START_DATE, END_DATE, SyntheticConnector, assert_same_views, run_views
+
+
+def test_shared_cost_version():
+    """A cost version loaded by one session is applied by every session sharing the cache"""
+    print("=" * 60)
+    print("TEST 1: Shared Cost/Retail Version")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    published = {'version': 'v1', 'data': dict(connector.cost_retail)}
+    cost_cache = CostRetailCache(lambda: published['data'], lambda: published['version'],
+                                 check_interval_seconds=0)
+    cost_cache.check_version()
+    
+    first = DataProcessor(connector, cost_cache=cost_cache)
+    second = DataProcessor(connector, cost_cache=cost_cache)
+    before = second.get_top_40_styles(START_DATE, END_DATE, None, None)
+    first.get_top_40_styles(START_DATE, END_DATE, None, None)
+    expires_at = second.fact_cache._entries[next(iter(second.fact_cache._entries))][1]
+    
+    # Merchandising doubles every cost; only the first session runs the check
+    published['version'] = 'v2'
+    published['data'] = {item_id: {'cost': values['cost'] * 2, 'retail': values['retail']}
+                         for item_id, values in connector.cost_retail.items()}
+    assert first.sync_cost_retail()
+    cost_cache.check_interval_seconds = 3600
+    
+    after = second.get_top_40_styles(START_DATE, END_DATE, None, None)
+    pd.testing.assert_series_equal(before['cost'] * 2, after['cost'])
+    assert second.fact_cache.stats()['misses'] == 1, "fact table was rebuilt instead of re-costed"
+    assert second.fact_cache._entries[next(iter(second.fact_cache._entries))][1] == expires_at, \
+        "re-costing restarted the fact table TTL"
+    print("✅ second session picked up the new cost version")
+
+
+def test_shared_cube_sync():
+    """A cube sync run by one session drops the cached views of every session"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Shared Daily Cube Sync")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    cube = create_daily_cube(connector, START_DATE)
+    cube.sync(through=END_DATE)
+    
+    first = DataProcessor(connector, daily_cube=cube)
+    second = DataProcessor(connector, daily_cube=cube)
+    before = second.get_top_40_styles(START_DATE, END_DATE, None, None)
+    
+    # A late invoice lands on the last covered day; the first session re-syncs
+    late = connector.lines.iloc[[0]].copy()
+    late['transaction_id'] = str(len(connector.lines))
+    late['item_id'] = connector.items.loc[connector.items['style'] == before['style'].iloc[0], 'item_id'].iloc[0]
+    late['sales_units'] = 1000.0
+    late['transaction_date'] = END_DATE.strftime("%m/%d/%Y")
+    connector.lines = pd.concat([connector.lines, late], ignore_index=True)
+    connector._days = pd.to_datetime(connector.lines['transaction_date'], format="%m/%d/%Y").dt.date
+    
+    # The cube only covers through END_DATE, so it is stale and the first session's sync pulls
+    assert cube.is_stale()
+    assert first.sync_daily_cube(), "first session did not sync the stale cube"
+    assert not first.sync_daily_cube(), "fresh cube synced again"
+    
+    after = second.get_top_40_styles(START_DATE, END_DATE, None, None)
+    assert after['sales_units'].iloc[0] == before['sales_units'].iloc[0] + 1000, "stale view served"
+    print("✅ second session rebuilt its views from the synced cube")
+
+
+class RecordingConnector(SyntheticConnector):
+    """SyntheticConnector that records the filters of every transaction fetch"""
+    
+    def __init__(self):
+        super().__init__()
+        self.fetched_filters = []
+    
+    def iter_sales_transactions(self, start_date: str, end_date: str, filters=None, page_size: int = 1000):
+        self.fetched_filters.append(dict(filters or {}))
+        # Honour the pushed-down style list like the RESTlet would
+        transactions = pd.DataFrame(self.get_sales_transactions(start_date, end_date))
+        if filters and filters.get('style'):
+            items = self.items.loc[self.items['style'].isin(filters['style']), 'item_id']
+            transactions = transactions[transactions['item_id'].isin(items)]
+        records = transactions.to_dict('records')
+        for offset in range(0, len(records), page_size):
+            yield records[offset:offset + page_size]
+
+
+def test_drilldowns_reuse_window():
+    """Drilldowns under an active sidebar filter do not run a search per value"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Drilldown Fetches")
+    print("=" * 60)
+    
+    connector = RecordingConnector()
+    processor = DataProcessor(connector)
+    top = processor.get_top_40_styles(START_DATE, END_DATE, ['BOOTS'], None)
+    
+    drilldowns = [processor.get_customers_by_style(style, START_DATE, END_DATE) for style in top['style'][:5]]
+    processor.get_styles_by_customer(drilldowns[0]['customer'].iloc[0], START_DATE, END_DATE)
+    
+    assert [sorted(f) for f in connector.fetched_filters] == [['category', 'transaction_type'], ['transaction_type']], \
+        connector.fetched_filters
+    print("✅ 6 drilldowns served by one unfiltered window fetch")
+    
+    # The batched path pushes the style list down; its values are then served from that table
+    connector = RecordingConnector()
+    processor = DataProcessor(connector)
+    styles = list(top['style'][:5])
+    batched = processor.get_customers_by_styles(styles, START_DATE, END_DATE)
+    single = processor.get_customers_by_style(styles[2], START_DATE, END_DATE)
+    
+    assert len(connector.fetched_filters) == 1 and sorted(connector.fetched_filters[0]['style']) == sorted(styles), \
+        connector.fetched_filters
+    pd.testing.assert_frame_equal(batched[styles[2]], single)
+    pd.testing.assert_frame_equal(single, drilldowns[2])
+    print("✅ batched drilldown pushed its styles down and serves single drilldowns")
+
+
+def make_lines(n_lines: int = 30_000, seed: int = 11) -> pd.DataFrame:
+    """Transaction lines with repeated pairs, missing customers and missing amounts"""
+    rng = np.random.default_rng(seed)
+    lines = pd.DataFrame({
+        'item_id': rng.integers(0, 200, n_lines).astype(str),
+        'customer_id': rng.integers(0, 80, n_lines).astype(str),
+        'sales_units': rng.integers(1, 10, n_lines).astype(float),
+        'sales_dollars': rng.uniform(1, 300, n_lines).round(2),
+        'returns': rng.choice([0.0, 1.0, np.nan], n_lines)
+    })
+    lines.loc[rng.random(n_lines) < 0.02, 'customer_id'] = None
+    lines.loc[rng.random(n_lines) < 0.02, 'sales_dollars'] = np.nan
+    return lines
+
+
+def scan_pairs(lines: pd.DataFrame) -> pd.DataFrame:
+    """Reference pair totals from a single groupby over every line, in first-appearance order"""
+    lines = lines.fillna({field: 0 for field in TransactionAggregator.SUM_FIELDS})
+    return (lines.assign(line_count=1)
+            .groupby(TransactionAggregator.KEYS, sort=False, dropna=False)
+            .agg(sales_units=('sales_units', 'sum'), sales_dollars=('sales_dollars', 'sum'),
+                 returns=('returns', 'sum'), line_count=('line_count', 'sum'))
+            .reset_index())
+
+
+def pages(lines: pd.DataFrame, page_size: int):
+    """Split lines into RESTlet-style record pages"""
+    records = lines.to_dict('records')
+    return [records[offset:offset + page_size] for offset in range(0, len(records), page_size)]
+
+
+def test_fold_then_combine():
+    """Paged folding and combined partitions equal one groupby over the lines"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Fold Then Combine")
+    print("=" * 60)
+    
+    lines = make_lines()
+    expected = scan_pairs(lines)
+    columns = list(expected.columns)
+    
+    # Small pages and a low consolidation threshold force many partial merges
+    folded = TransactionAggregator(consolidate_rows=500).consume(pages(lines, 700)).result()
+    pd.testing.assert_frame_equal(expected, folded[columns], check_dtype=False)
+    assert folded['first_seen'].is_monotonic_increasing
+    print(f"✅ {len(lines):,} lines folded into {len(folded):,} pairs")
+    
+    # Consecutive partitions of uneven size, one of them empty
+    bounds = [0, 4_000, 4_000, 17_500, len(lines)]
+    partials = [TransactionAggregator().consume(pages(lines.iloc[start:end], 1000)).result()
+                for start, end in zip(bounds, bounds[1:])]
+    combined = TransactionAggregator.combine(partials)
+    pd.testing.assert_frame_equal(expected, combined[columns], check_dtype=False)
+    print(f"✅ {len(partials)} partitions combined into the same pairs and order")
+
+
+def test_select_top_n_ties():
+    """Top-N selection matches a full sort and breaks metric ties by key"""
+    print("\n" + "=" * 60)
+    print("TEST 5: Top-N Tie Breaking")
+    print("=" * 60)
+    
+    rng = np.random.default_rng(5)
+    # Few distinct metric values, so ties straddle every cut-off; keys arrive shuffled
+    grouped = pd.DataFrame({
+        'style': [f"STYLE-{i:03d}" for i in rng.permutation(300)],
+        'sales_units': rng.integers(0, 12, 300).astype(float)
+    })
+    
+    for n in (1, 7, 40, 299, 300, 500, None):
+        expected = grouped.sort_values(['sales_units', 'style'], ascending=[False, True])
+        expected = (expected if n is None else expected.head(n)).reset_index(drop=True)
+        actual = DataProcessor._select_top_n(grouped, n, 'sales_units', 'style')
+        pd.testing.assert_frame_equal(expected, actual, obj=f"n={n}")
+    
+    # Row order of the input never changes the ranking
+    shuffled = grouped.sample(frac=1, random_state=1)
+    pd.testing.assert_frame_equal(DataProcessor._select_top_n(grouped, 40, 'sales_units', 'style'),
+                                  DataProcessor._select_top_n(shuffled, 40, 'sales_units', 'style'))
+    print("✅ ties broken by key at every cut-off")
+
+
+class SummaryConnector(SyntheticConnector):
+    """SyntheticConnector that also answers get_sales_summary like the RESTlet summary search"""
+    
+    def get_sales_summary(self, start_date: str, end_date: str, filters=None):
+        lines = pd.DataFrame(self.get_sales_transactions(start_date, end_date))
+        if lines.empty:
+            return []
+        
+        # MIN({internalid} * 1000000 + {line}), with lines numbered within each invoice
+        line_numbers = self.lines.groupby('transaction_id', sort=False).cumcount() + 1
+        lines['first_line_id'] = (lines['transaction_id'].astype(int) * 1_000_000
+                                  + line_numbers.loc[lines.index].to_numpy())
+        lines['line_count'] = 1
+        summary = lines.groupby(['item_id', 'customer_id'], as_index=False).agg(
+            sales_units=('sales_units', 'sum'), sales_dollars=('sales_dollars', 'sum'),
+            returns=('returns', 'sum'), line_count=('line_count', 'sum'), first_line_id=('first_line_id', 'min'))
+        return summary.sort_values(['first_line_id', 'item_id', 'customer_id']).to_dict('records')
+
+
+def test_server_aggregation_parity():
+    """Server-side summary rows produce the same views as folding the lines locally"""
+    print("\n" + "=" * 60)
+    print("TEST 6: Server Aggregation Parity")
+    print("=" * 60)
+    
+    connector = SummaryConnector()
+    expected = run_views(DataProcessor(connector, aggregation='client', pushdown_filters=()))
+    actual = run_views(DataProcessor(connector, aggregation='server', pushdown_filters=()))
+    
+    assert_same_views(expected, actual)
+    print(f"✅ {len(expected)} views match, including first cost/retail on shared invoices")
+
+
+def test_cache_subsumption():
+    """Narrower filters are answered from a broader cached fact table"""
+    print("\n" + "=" * 60)
+    print("TEST 7: Cache Subsumption")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    processor = DataProcessor(connector, engine='pandas')
+    processor.get_top_40_styles(START_DATE, END_DATE, ['BOOTS', 'SANDALS'], None)
+    
+    for category, vendor in [(['BOOTS'], None), (['SANDALS'], ['DREW SHOE'])]:
+        actual = processor.get_top_40_styles(START_DATE, END_DATE, category, vendor)
+        # The synthetic connector ignores pushed-down filters, so filter locally
+        expected = DataProcessor(connector, engine='pandas', pushdown_filters=()).get_top_40_styles(
+            START_DATE, END_DATE, category, vendor)
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_exact=False)
+    
+    stats = processor.fact_cache.stats()
+    assert stats['subsumption_hits'] == 2, stats
+    assert stats['true_misses'] == 1, stats
+    
+    # A broader request is not subsumed
+    processor.get_top_40_styles(START_DATE, END_DATE, ['SNEAKERS'], None)
+    assert processor.fact_cache.stats()['true_misses'] == 2
+    print(f"✅ {stats['subsumption_hits']} subsumption hits, {stats['true_misses']} true miss")
+
+
+def test_batched_drilldowns():
+    """Batched drilldowns fetch once and match single drilldowns"""
+    print("\n" + "=" * 60)
+    print("TEST 8: Batched Drilldowns")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    styles = [f"STYLE-{i:03d}" for i in range(0, 40, 3)]
+    customers = [f"CUSTOMER {i:03d}" for i in range(0, 40, 3)]
+    
+    processor = DataProcessor(connector, engine='pandas')
+    by_style = processor.get_customers_by_styles(styles, START_DATE, END_DATE)
+    by_customer = processor.get_styles_by_customers(customers, START_DATE, END_DATE)
+    assert processor.fact_cache.stats()['true_misses'] == 2, processor.fact_cache.stats()
+    
+    # The synthetic connector ignores pushed-down filters, so filter locally
+    single = DataProcessor(connector, engine='pandas', pushdown_filters=())
+    for style in styles:
+        pd.testing.assert_frame_equal(single.get_customers_by_style(style, START_DATE, END_DATE),
+                                      by_style[style], check_dtype=False, check_exact=False, obj=style)
+    for customer in customers:
+        pd.testing.assert_frame_equal(single.get_styles_by_customer(customer, START_DATE, END_DATE),
+                                      by_customer[customer], check_dtype=False, check_exact=False, obj=customer)
+    print(f"✅ {len(styles) + len(customers)} drilldowns from 2 fetches")
+
+
+class SlowMasterConnector(SyntheticConnector):
+    """SyntheticConnector whose master data lookups take a while and record their overlap"""
+    
+    delay = 0.3
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def _slow(self, lookup, ids):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            return lookup(ids)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+    
+    def get_item_master(self, item_ids=None):
+        return self._slow(super().get_item_master, item_ids)
+    
+    def get_customer_master(self, customer_ids=None):
+        return self._slow(super().get_customer_master, customer_ids)
+    
+    def get_cost_retail_data(self, item_ids=None):
+        return self._slow(super().get_cost_retail_data, item_ids)
+
+
+def test_concurrent_master_data():
+    """Item, customer and cost/retail lookups are issued together and take as long as the slowest"""
+    print("\n" + "=" * 60)
+    print("TEST 9: Concurrent Master Data Fetch")
+    print("=" * 60)
+    
+    connector = SlowMasterConnector()
+    processor = DataProcessor(connector)
+    item_ids = connector.items['item_id'].tolist()[:100]
+    customer_ids = connector.customers['customer_id'].tolist()[:100]
+    
+    started = time.perf_counter()
+    items, customers, cost_retail = processor._fetch_master_data(item_ids, customer_ids)
+    elapsed = time.perf_counter() - started
+    
+    assert connector.peak_in_flight == 3, f"{connector.peak_in_flight} lookups overlapped"
+    assert elapsed < 2 * connector.delay, f"{elapsed:.2f}s for three {connector.delay}s lookups"
+    pd.testing.assert_frame_equal(items, pd.DataFrame(SyntheticConnector.get_item_master(connector, item_ids)))
+    pd.testing.assert_frame_equal(
+        customers, pd.DataFrame(SyntheticConnector.get_customer_master(connector, customer_ids)))
+    pd.testing.assert_frame_equal(
+        cost_retail, cost_retail_frame(SyntheticConnector.get_cost_retail_data(connector, item_ids)))
+    print(f"✅ 3 lookups overlapped, {elapsed:.2f}s total")
+
+
+def run_all_tests():
+    """Run all data processor tests"""
+    tests = [test_shared_cost_version, test_shared_cube_sync, test_drilldowns_reuse_window,
+             test_fold_then_combine, test_select_top_n_ties, test_server_aggregation_parity,
+             test_cache_subsumption, test_batched_drilldowns, test_concurrent_master_data]
+    failed = 0
+    
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {str(e)}")
+    
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    
+    if success:
+        print("\n✅ All data processor tests passed.")
+        sys.exit(0)
+    else:
+        print("\n❌ Some tests failed. Please review errors above.")
+        sys.exit(1)
@@ -0,0 +1,137 @@
+"""
+Engine Parity Tests for Top 40 Dashboard
+Checks that every query engine returns the same views as the pandas path
+(runs offline on synthetic data - no NetSuite connection needed)
+"""
+
+import sys
+import tempfile
+from datetime import timedelta
+
+import pandas as pd
+
+from data_processor import DataProcessor
+from query_planner import date_partitions
+from synthetic_data import START_DATE, END_DATE, SyntheticConnector, assert_same_views, run_views
+from warehouse import ParquetWarehouse
+
+
+# Engines compared against the pandas path
+ENGINES = ['duckdb', 'polars']
+
+
+def test_view_parity():
+    """Every engine returns the same views as pandas"""
+    print("=" * 60)
+    print("TEST 1: View Parity")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    expected = run_views(DataProcessor(connector, engine='pandas'))
+    
+    for engine in ENGINES:
+        actual = run_views(DataProcessor(connector, engine=engine))
+        assert_same_views(expected, actual)
+        print(f"✅ {engine}: {len(expected)} views match")
+
+
+def test_view_parity_local_filters():
+    """Every engine applies residual predicates the same way as pandas"""
+    print("\n" + "=" * 60)
+    print("TEST 2: View Parity With Local Filters")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    expected = run_views(DataProcessor(connector, engine='pandas', pushdown_filters=()))
+    
+    for engine in ENGINES:
+        actual = run_views(DataProcessor(connector, engine=engine, pushdown_filters=()))
+        assert_same_views(expected, actual)
+        print(f"✅ {engine}: {len(expected)} views match")
+
+
+def test_duckdb_parquet_parity():
+    """DuckDB folding warehouse Parquet files matches pandas over the same store"""
+    print("\n" + "=" * 60)
+    print("TEST 3: DuckDB Parquet Warehouse Parity")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    expected = run_views(DataProcessor(connector, engine='pandas'))
+    
+    with tempfile.TemporaryDirectory() as root:
+        warehouse = ParquetWarehouse(root)
+        warehouse.sync(connector, START_DATE, END_DATE)
+        
+        from_parquet = run_views(DataProcessor(connector, engine='duckdb', warehouse=warehouse))
+        from_pandas = run_views(DataProcessor(connector, engine='pandas', warehouse=warehouse))
+    
+    assert_same_views(expected, from_parquet)
+    assert_same_views(expected, from_pandas)
+    print(f"✅ {len(expected)} views match")
+
+
+def test_compact_dtypes_parity():
+    """Integer units and cents give the same views as float measures"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Compact Dtypes Parity")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    expected = run_views(DataProcessor(connector, engine='pandas'))
+    
+    for engine in ['pandas'] + ENGINES:
+        actual = run_views(DataProcessor(connector, engine=engine, compact_dtypes=True))
+        assert_same_views(expected, actual)
+        print(f"✅ {engine}: {len(expected)} views match")
+
+
+def test_range_partitions_parity():
+    """Ranges composed from cached calendar partitions match whole-range fetches"""
+    print("\n" + "=" * 60)
+    print("TEST 5: Range Partitions Parity")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    expected = run_views(DataProcessor(connector, engine='pandas'))
+    
+    processor = DataProcessor(connector, engine='pandas', range_partitions=True)
+    assert_same_views(expected, run_views(processor))
+    print(f"✅ {len(expected)} views match")
+    
+    # Shift the window by a week: only the new edge partitions are fetched
+    shifted_start, shifted_end = START_DATE + timedelta(days=7), END_DATE + timedelta(days=7)
+    misses = processor.partition_cache.misses
+    shifted = processor.get_top_40_styles(shifted_start, shifted_end, None, None)
+    whole = DataProcessor(connector, engine='pandas').get_top_40_styles(shifted_start, shifted_end, None, None)
+    pd.testing.assert_frame_equal(whole, shifted, check_dtype=False, check_exact=False)
+    new_partitions = set(date_partitions(shifted_start, shifted_end)) - set(date_partitions(START_DATE, END_DATE))
+    assert processor.partition_cache.misses - misses == len(new_partitions), "shifted window re-fetched shared partitions"
+    print(f"✅ shifted window fetched {len(new_partitions)} new partitions")
+
+
+def run_all_tests():
+    """Run all engine parity tests"""
+    tests = [test_view_parity, test_view_parity_local_filters, test_duckdb_parquet_parity,
+             test_compact_dtypes_parity, test_range_partitions_parity]
+    failed = 0
+    
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {str(e)}")
+    
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    
+    if success:
+        print("\n✅ All engines match the pandas path.")
+        sys.exit(0)
+    else:
+        print("\n❌ Engine results differ. Please review errors above.")
+        sys.exit(1)
@@ -0,0 +1,161 @@
+"""
+Master Data Tests for Top 40 Dashboard
+Checks the master data cache watermark and delta refresh against a fake NetSuite
+(runs offline - no NetSuite connection needed)
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from master_data import create_customer_master_cache
+
+
+class FakeCustomerMaster:
+    """Customer records with last-modified times, served like the RESTlet actions"""
+    
+    def __init__(self, n_customers: int = 50, account_id: str = '1234567'):
+        self.account_id = account_id
+        modified = datetime.now(timezone.utc) - timedelta(days=30)
+        self.records = {str(c): {'customer_id': str(c), 'customer': f"CUSTOMER {c:03d}", 'territory': 'WEST',
+                                 'modified': modified} for c in range(n_customers)}
+        self.change_requests = []
+        self.id_requests = []
+        self.fail = False
+    
+    def touch(self, customer_id: str, **fields):
+        """Create or edit a record now"""
+        record = self.records.setdefault(customer_id, {'customer_id': customer_id, 'customer': None,
+                                                       'territory': None})
+        record.update(fields, modified=datetime.now(timezone.utc))
+    
+    @staticmethod
+    def _public(record):
+        return {name: value for name, value in record.items() if name != 'modified'}
+    
+    def get_customer_master_changes(self, modified_since=None):
+        if self.fail:
+            raise Exception("NetSuite API request failed: 503")
+        self.change_requests.append(modified_since)
+        since = datetime.fromisoformat(modified_since) if modified_since else None
+        return [self._public(r) for r in self.records.values() if since is None or r['modified'] >= since]
+    
+    def get_customer_master(self, customer_ids=None):
+        self.id_requests.append(list(customer_ids))
+        return [self._public(self.records[c]) for c in customer_ids if c in self.records]
+
+
+def test_watermark_delta_refresh():
+    """The first refresh seeds every record; later ones fetch only changes since the watermark"""
+    print("=" * 60)
+    print("TEST 1: Watermark and Delta Refresh")
+    print("=" * 60)
+    
+    connector = FakeCustomerMaster()
+    cache = create_customer_master_cache(connector, refresh_interval_seconds=900)
+    
+    assert connector.change_requests == [None], connector.change_requests
+    assert len(cache) == 50 and cache.stats()['last_refresh_type'] == 'full'
+    watermark = cache._watermark
+    assert not cache.refresh_if_stale(), "fresh cache refreshed"
+    
+    connector.touch('7', territory='EAST')
+    connector.touch('50', customer='CUSTOMER 050', territory='MIDWEST')
+    
+    # Age the cache past its refresh interval
+    cache._watermark = watermark - timedelta(seconds=901)
+    assert cache.refresh_if_stale()
+    
+    since = datetime.fromisoformat(connector.change_requests[-1])
+    assert since == watermark - timedelta(seconds=901 + cache.overlap_seconds), since
+    assert cache.last_refresh_type == 'delta' and cache.last_refresh_records == 2, cache.stats()
+    assert cache._watermark > watermark
+    
+    customers = cache.lookup(['7', '50', '3']).set_index('customer_id')
+    assert customers.loc['7', 'territory'] == 'EAST'
+    assert customers.loc['50', 'customer'] == 'CUSTOMER 050'
+    assert customers.loc['3', 'territory'] == 'WEST'
+    assert connector.id_requests == [], "cached IDs fetched by ID"
+    print("✅ delta refresh applied 2 changed records")
+    
+    # IDs not cached yet are fetched on demand
+    connector.records['99'] = {'customer_id': '99', 'customer': 'CUSTOMER 099', 'territory': 'EAST',
+                               'modified': datetime.now(timezone.utc)}
+    assert sorted(cache.lookup(['99', '7'])['customer_id']) == ['7', '99']
+    assert connector.id_requests == [['99']], connector.id_requests
+    print("✅ missing ID fetched once and cached")
+
+
+def test_factory_refreshes_persisted_cache():
+    """A stale persisted cache is delta-refreshed on creation; a failed refresh keeps it"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Persisted Cache Refresh")
+    print("=" * 60)
+    
+    connector = FakeCustomerMaster()
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        create_customer_master_cache(connector, cache_dir, refresh_interval_seconds=900)
+        
+        # A restart within the refresh interval only loads the file
+        create_customer_master_cache(connector, cache_dir, refresh_interval_seconds=900)
+        assert connector.change_requests == [None], connector.change_requests
+        
+        # A restart after it delta-refreshes from the persisted watermark
+        connector.touch('12', territory='EAST')
+        cache = create_customer_master_cache(connector, cache_dir, refresh_interval_seconds=0)
+        assert connector.change_requests[-1] is not None and cache.last_refresh_records == 1, cache.stats()
+        print("✅ stale persisted cache delta-refreshed on creation")
+        
+        # NetSuite down: the persisted records are still served
+        connector.fail = True
+        cache = create_customer_master_cache(connector, cache_dir, refresh_interval_seconds=0)
+        assert len(cache) == 50 and cache.refresh_failures == 1
+        assert cache.lookup(['12'])['territory'].iloc[0] == 'EAST'
+        print("✅ failed refresh serves the persisted records")
+
+
+def test_cache_files_per_account():
+    """Two accounts sharing a cache directory never load each other's records"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Cache Files Per Account")
+    print("=" * 60)
+    
+    first = FakeCustomerMaster(account_id='1234567')
+    second = FakeCustomerMaster(n_customers=20, account_id='7654321-SB1')
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        create_customer_master_cache(first, cache_dir)
+        cache = create_customer_master_cache(second, cache_dir)
+        
+        assert second.change_requests == [None], "second account delta-refreshed the first account's file"
+        assert len(cache) == 20
+        assert len(create_customer_master_cache(first, cache_dir)) == 50
+        assert first.change_requests == [None], first.change_requests
+    print("✅ each account seeds and reloads its own file")
+
+
+def run_all_tests():
+    """Run all master data tests"""
+    tests = [test_watermark_delta_refresh, test_factory_refreshes_persisted_cache, test_cache_files_per_account]
+    failed = 0
+    
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {str(e)}")
+    
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    
+    if success:
+        print("\n✅ All master data tests passed.")
+        sys.exit(0)
+    else:
+        print("\n❌ Some tests failed. Please review errors above.")
+        sys.exit(1)
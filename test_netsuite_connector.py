@@ -0,0 +1,188 @@
+"""
+NetSuite Connector Tests for Top 40 Dashboard
+Checks request limiting, coalescing and paging against a fake HTTP session
+(runs offline - no NetSuite connection needed)
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from netsuite_connector import AsyncNetSuiteConnector, NetSuiteConnector
+
+
+class FakeResponse:
+    """Minimal requests.Response stand-in"""
+    
+    def __init__(self, body):
+        self.body = body
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """Records RESTlet payloads and answers them with a handler"""
+    
+    def __init__(self, handler, delay: float = 0.0):
+        self.adapters = {}
+        self.handler = handler
+        self.delay = delay
+        self.payloads = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.closed = False
+        self._lock = threading.Lock()
+    
+    def request(self, method, url, headers=None, json=None, timeout=None):
+        with self._lock:
+            self.payloads.append(json)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            return FakeResponse(self.handler(json))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+    
+    def close(self):
+        self.closed = True
+
+
+def make_connector(handler, delay: float = 0.0, **options) -> NetSuiteConnector:
+    """Connector whose HTTP session is a FakeSession"""
+    connector = NetSuiteConnector('1234567', 'key', 'secret', 'token', 'token_secret', **options)
+    connector.session = FakeSession(handler, delay)
+    return connector
+
+
+def test_shared_limiter():
+    """Requests from many threads never exceed the connector's max_concurrency"""
+    print("=" * 60)
+    print("TEST 1: Shared Concurrency Limiter")
+    print("=" * 60)
+    
+    connector = make_connector(lambda payload: {'status': 'success'}, delay=0.05, max_concurrency=3)
+    
+    with ThreadPoolExecutor(max_workers=12) as executor:
+        list(executor.map(lambda i: connector.make_request(payload={'action': 'ping', 'n': i}), range(36)))
+    
+    assert connector.session.peak_in_flight == 3, connector.session.peak_in_flight
+    assert connector.get_pool_stats()['requests'] == 36, "request counter lost updates"
+    print(f"✅ 36 requests from 12 threads, at most {connector.session.peak_in_flight} in flight")
+
+
+def paged_handler(records, page_size):
+    """Answer paged RESTlet actions the way runPagedSearch does"""
+    def handle(payload):
+        page_index = payload['page_index']
+        page_count = -(-len(records) // page_size)
+        has_more = page_index + 1 < page_count
+        return {
+            'status': 'success',
+            'data': records[page_index * page_size:(page_index + 1) * page_size],
+            'has_more': has_more,
+            'next_page_index': page_index + 1 if has_more else None
+        }
+    return handle
+
+
+def test_iter_pages():
+    """Paging follows next_page_index and stops when has_more is false"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Paged RESTlet Actions")
+    print("=" * 60)
+    
+    records = [{'transaction_id': str(i)} for i in range(2_345)]
+    connector = make_connector(paged_handler(records, 1000))
+    
+    pages = list(connector.iter_sales_transactions('2025-01-01', '2025-01-31', page_size=1000))
+    
+    assert [len(page) for page in pages] == [1000, 1000, 345], [len(page) for page in pages]
+    assert [record for page in pages for record in page] == records
+    assert [p['page_index'] for p in connector.session.payloads] == [0, 1, 2]
+    assert all(p['page_size'] == 1000 and p['action'] == 'get_sales_transactions'
+               for p in connector.session.payloads)
+    print("✅ 3 pages, 3 requests, every record once")
+    
+    # An empty result is one request and no pages
+    connector = make_connector(paged_handler([], 1000))
+    assert list(connector.iter_sales_transactions('2025-01-01', '2025-01-31')) == []
+    assert len(connector.session.payloads) == 1
+    print("✅ empty result stops after one request")
+    
+    # has_more=false ends the walk even if the RESTlet sends a next index,
+    # and empty pages in the middle are skipped rather than ending the walk
+    responses = {
+        0: {'data': [{'n': 0}], 'has_more': True, 'next_page_index': 2},
+        2: {'data': [], 'has_more': True, 'next_page_index': 3},
+        3: {'data': [{'n': 3}], 'has_more': False, 'next_page_index': 4}
+    }
+    connector = make_connector(lambda payload: dict(responses[payload['page_index']], status='success'))
+    pages = list(connector._iter_pages({'action': 'get_sales_transactions'}, page_size=5))
+    assert pages == [[{'n': 0}], [{'n': 3}]], pages
+    assert [p['page_index'] for p in connector.session.payloads] == [0, 2, 3]
+    print("✅ follows next_page_index and stops on has_more=false")
+
+
+def test_async_connector():
+    """The async connector mirrors the paged, delta, stats and close methods"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Async Connector")
+    print("=" * 60)
+    
+    records = [{'item_id': str(i)} for i in range(2_345)]
+    connector = make_connector(paged_handler(records, 1000))
+    async_ns = AsyncNetSuiteConnector(connector)
+    
+    async def walk():
+        pages = [page async for page in async_ns.iter_sales_transactions('2025-01-01', '2025-01-31')]
+        changes = await async_ns.get_item_master_changes('2025-01-01T00:00:00Z')
+        customers = await async_ns.get_customer_master_changes()
+        stats = await async_ns.get_pool_stats()
+        await async_ns.close()
+        return pages, changes, customers, stats
+    
+    pages, changes, customers, stats = asyncio.run(walk())
+    
+    assert [len(page) for page in pages] == [1000, 1000, 345], [len(page) for page in pages]
+    assert changes == records and customers == records
+    actions = [p['action'] for p in connector.session.payloads]
+    assert actions == ['get_sales_transactions'] * 3 + ['get_item_master_changes'] * 3 + \
+        ['get_customer_master_changes'] * 3, actions
+    assert connector.session.payloads[3]['modified_since'] == '2025-01-01T00:00:00Z'
+    assert stats['requests'] == 9, stats
+    assert connector.session.closed
+    print("✅ 9 paged requests through the async connector; session closed")
+
+
+def run_all_tests():
+    """Run all connector tests"""
+    tests = [test_shared_limiter, test_iter_pages, test_async_connector]
+    failed = 0
+    
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {str(e)}")
+    
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    
+    if success:
+        print("\n✅ All connector tests passed.")
+        sys.exit(0)
+    else:
+        print("\n❌ Some tests failed. Please review errors above.")
+        sys.exit(1)
@@ -0,0 +1,108 @@
+"""
+Prefetch Tests for Top 40 Dashboard
+Checks background drilldown prefetching and the shared prefetch pool
+(runs offline on synthetic data - no NetSuite connection needed)
+"""
+
+import sys
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+from data_processor import DataProcessor
+from prefetch import DrilldownPrefetcher, create_prefetch_executor
+from synthetic_data import START_DATE, END_DATE, SyntheticConnector
+
+
+def test_drilldown_prefetch():
+    """Prefetched drilldowns match on-demand ones; a new selection replaces the prefetch"""
+    print("=" * 60)
+    print("TEST 1: Drilldown Prefetch")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    processor = DataProcessor(connector, engine='pandas', pushdown_filters=())
+    prefetcher = DrilldownPrefetcher(processor, top_k=3)
+    
+    try:
+        top_styles = processor.get_top_40_styles(START_DATE, END_DATE, None, None)['style'].tolist()
+        assert prefetcher.schedule('style', top_styles, START_DATE, END_DATE)
+        assert not prefetcher.schedule('style', top_styles, START_DATE, END_DATE), "duplicate prefetch submitted"
+        
+        for style in top_styles[:3]:
+            pd.testing.assert_frame_equal(processor.get_customers_by_style(style, START_DATE, END_DATE),
+                                          prefetcher.get('style', style, START_DATE, END_DATE), obj=style)
+        assert prefetcher.get('style', top_styles[3], START_DATE, END_DATE) is None
+        
+        # A changed date range replaces the prefetch
+        prefetcher.schedule('style', top_styles, START_DATE, END_DATE - timedelta(days=30))
+        assert prefetcher.get('style', top_styles[0], START_DATE, END_DATE) is None
+        assert prefetcher.get('style', top_styles[0], START_DATE, END_DATE - timedelta(days=30)) is not None
+        
+        stats = prefetcher.stats()
+        assert stats['scheduled'] == 2 and stats['served'] == 4, stats
+        print(f"✅ {stats['served']} drilldowns served from prefetch")
+    finally:
+        prefetcher.shutdown()
+
+
+
+def test_prefetch_shared_executor():
+    """Sessions share one prefetch pool; a prefetch stuck in its queue falls back to on-demand"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Shared Prefetch Executor")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    executor = create_prefetch_executor(max_workers=1)
+    first = DrilldownPrefetcher(DataProcessor(connector, pushdown_filters=()), top_k=3, executor=executor)
+    second = DrilldownPrefetcher(DataProcessor(connector, pushdown_filters=()), top_k=3, executor=executor,
+                                 wait_seconds=0.2)
+    
+    try:
+        top_styles = first.processor.get_top_40_styles(START_DATE, END_DATE, None, None)['style'].tolist()
+        
+        # Occupy the only worker, so the second session's prefetch stays queued
+        release = executor.submit(time.sleep, 1.0)
+        assert second.schedule('style', top_styles, START_DATE, END_DATE)
+        assert second.get('style', top_styles[0], START_DATE, END_DATE) is None, "waited past wait_seconds"
+        assert second.stats()['timed_out'] == 1 and second.stats()['in_flight'] == 0, second.stats()
+        release.result()
+        
+        # Replacing one session's processor leaves the shared pool running
+        second.shutdown()
+        assert first.schedule('style', top_styles, START_DATE, END_DATE)
+        pd.testing.assert_frame_equal(first.processor.get_customers_by_style(top_styles[1], START_DATE, END_DATE),
+                                      first.get('style', top_styles[1], START_DATE, END_DATE))
+        print("✅ queued prefetch timed out; shared pool survived a session shutdown")
+    finally:
+        first.shutdown()
+        executor.shutdown()
+
+
+
+def run_all_tests():
+    """Run all prefetch tests"""
+    tests = [test_drilldown_prefetch, test_prefetch_shared_executor]
+    failed = 0
+    
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {str(e)}")
+    
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    
+    if success:
+        print("\n✅ All prefetch tests passed.")
+        sys.exit(0)
+    else:
+        print("\n❌ Some tests failed. Please review errors above.")
+        sys.exit(1)
@@ -0,0 +1,123 @@
+"""
+Result Cache Tests for Top 40 Dashboard
+Checks LRU eviction, TTL expiry and byte accounting of the result cache
+(runs offline - no NetSuite connection needed)
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from result_cache import ResultCache, estimate_size, normalize_filter_value
+
+
+def frame(rows: int) -> pd.DataFrame:
+    """Numeric frame of a predictable size"""
+    return pd.DataFrame({'value': np.arange(rows, dtype=float)})
+
+
+def test_lru_eviction_and_bytes():
+    """Least recently used entries go first and byte totals follow every change"""
+    print("=" * 60)
+    print("TEST 1: LRU Eviction and Byte Accounting")
+    print("=" * 60)
+    
+    size = estimate_size(frame(1000))
+    cache = ResultCache(max_bytes=3 * size, ttl_seconds=None)
+    
+    for key in ('a', 'b', 'c'):
+        cache.put((key,), frame(1000))
+    assert cache.current_bytes == 3 * size and len(cache) == 3
+    
+    # Touch 'a' so 'b' becomes the least recently used
+    assert cache.get(('a',)) is not None
+    cache.put(('d',), frame(1000))
+    assert cache.get(('b',)) is None and cache.get(('a',)) is not None
+    assert cache.stats()['evictions'] == 1 and cache.current_bytes == 3 * size
+    
+    # Overwriting a key releases the old value's bytes
+    cache.put(('a',), frame(500))
+    assert cache.current_bytes == 2 * size + estimate_size(frame(500)), cache.stats()
+    
+    # One large value evicts several entries; one over budget is not cached at all
+    cache.put(('e',), frame(2500))
+    assert [key for key, _ in cache.items()] == [('a',), ('e',)], cache.items()
+    assert cache.current_bytes == sum(estimate_size(value) for _, value in cache.items())
+    cache.put(('huge',), frame(10_000))
+    assert cache.get(('huge',)) is None
+    
+    # replace() swaps the value in place and re-accounts its bytes
+    assert cache.replace(('e',), frame(100)) and not cache.replace(('missing',), frame(100))
+    assert cache.current_bytes == sum(estimate_size(value) for _, value in cache.items())
+    
+    cache.clear()
+    assert cache.current_bytes == 0 and len(cache) == 0
+    print("✅ LRU order, overwrite, oversize and replace keep byte totals exact")
+
+
+def test_ttl_expiry():
+    """Expired entries miss, release their bytes and are skipped by find()"""
+    print("\n" + "=" * 60)
+    print("TEST 2: TTL Expiry")
+    print("=" * 60)
+    
+    cache = ResultCache(ttl_seconds=0.5)
+    cache.put(('old',), frame(100))
+    time.sleep(0.35)
+    cache.put(('new',), frame(100))
+    
+    # replace() keeps the original timestamp, so it does not extend the TTL
+    assert cache.replace(('old',), frame(200))
+    time.sleep(0.25)
+    
+    assert cache.find(lambda key: key == ('old',)) is None
+    assert cache.get(('old',)) is None and cache.get(('new',)) is not None
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['entries'] == 1, stats
+    assert cache.current_bytes == estimate_size(frame(100))
+    
+    # find() returns the smallest live match
+    cache.put(('big',), frame(1000))
+    key, _ = cache.find(lambda key: key != ('missing',))
+    assert key == ('new',) and cache.stats()['subsumption_hits'] == 1
+    print("✅ expired entries dropped, replace kept the original TTL")
+
+
+def test_normalize_filter_value():
+    """Equivalent filter selections produce the same key"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Filter Key Normalization")
+    print("=" * 60)
+    
+    assert normalize_filter_value(['B', 'A', 'B']) == normalize_filter_value(('A', 'B')) == ('A', 'B')
+    assert normalize_filter_value([]) is None and normalize_filter_value(['All', 'A']) is None
+    assert normalize_filter_value(pd.Timestamp('2025-03-01').to_pydatetime()) == '2025-03-01'
+    print("✅ selections normalized")
+
+
+def run_all_tests():
+    """Run all result cache tests"""
+    tests = [test_lru_eviction_and_bytes, test_ttl_expiry, test_normalize_filter_value]
+    failed = 0
+    
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {str(e)}")
+    
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    
+    if success:
+        print("\n✅ All result cache tests passed.")
+        sys.exit(0)
+    else:
+        print("\n❌ Some tests failed. Please review errors above.")
+        sys.exit(1)
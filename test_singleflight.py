@@ -0,0 +1,72 @@
+"""
+Singleflight Tests for Top 40 Dashboard
+Checks that concurrent sessions coalesce identical fact table builds
+(runs offline on synthetic data - no NetSuite connection needed)
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from data_processor import DataProcessor
+from singleflight import SingleFlight
+from synthetic_data import START_DATE, END_DATE, SyntheticConnector
+
+
+def test_singleflight_sessions():
+    """Concurrent sessions asking for the same view share one fact table build"""
+    print("=" * 60)
+    print("TEST 1: Singleflight Across Sessions")
+    print("=" * 60)
+    
+    class SlowConnector(SyntheticConnector):
+        fetches = 0
+        
+        def iter_sales_transactions(self, *args, **kwargs):
+            SlowConnector.fetches += 1
+            time.sleep(0.5)
+            return super().iter_sales_transactions(*args, **kwargs)
+    
+    connector = SlowConnector()
+    singleflight = SingleFlight()
+    sessions = [DataProcessor(connector, engine='pandas', singleflight=singleflight) for _ in range(8)]
+    
+    with ThreadPoolExecutor(max_workers=len(sessions)) as executor:
+        results = list(executor.map(lambda p: p.get_top_40_styles(START_DATE, END_DATE, None, None), sessions))
+    
+    for result in results[1:]:
+        pd.testing.assert_frame_equal(results[0], result)
+    assert SlowConnector.fetches == 1, f"{SlowConnector.fetches} fetches for one view"
+    
+    stats = singleflight.stats()
+    assert stats['executed'] == 1 and stats['shared'] == len(sessions) - 1, stats
+    print(f"✅ {len(sessions)} sessions served by {stats['executed']} fetch")
+
+
+
+def run_all_tests():
+    """Run all singleflight tests"""
+    tests = [test_singleflight_sessions]
+    failed = 0
+    
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {str(e)}")
+    
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    
+    if success:
+        print("\n✅ All singleflight tests passed.")
+        sys.exit(0)
+    else:
+        print("\n❌ Some tests failed. Please review errors above.")
+        sys.exit(1)
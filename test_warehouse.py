@@ -0,0 +1,68 @@
+"""
+Warehouse Tests for Top 40 Dashboard
+Checks the Parquet warehouse against months synced by another process
+(runs offline - no NetSuite connection needed)
+"""
+
+import sys
+import tempfile
+from datetime import date
+
+from synthetic_data import SyntheticConnector
+from warehouse import ParquetWarehouse
+
+
+def test_external_sync_visible():
+    """Months synced by a separate warehouse instance (the cron job) are picked up"""
+    print("=" * 60)
+    print("TEST 1: Manifest Reload")
+    print("=" * 60)
+    
+    connector = SyntheticConnector()
+    
+    with tempfile.TemporaryDirectory() as root:
+        dashboard = ParquetWarehouse(root)
+        assert not dashboard.covers(date(2025, 1, 1), date(2025, 1, 31))
+        assert dashboard.partition_files(date(2025, 1, 1), date(2025, 2, 28)) == []
+        
+        # The sync command runs in another process with its own instance
+        ParquetWarehouse(root).sync(connector, date(2025, 1, 1), date(2025, 2, 28))
+        
+        assert dashboard.covers(date(2025, 1, 1), date(2025, 2, 28)), "manifest not reloaded"
+        assert len(dashboard.partition_files(date(2025, 1, 1), date(2025, 2, 28))) == 2
+        assert dashboard.stats()['months'] == 2
+        print("✅ dashboard instance sees the externally synced months")
+        
+        # A month synced here is merged with the external entries, not written over them
+        ParquetWarehouse(root).sync(connector, date(2025, 3, 1), date(2025, 3, 31))
+        dashboard.sync(connector, date(2025, 4, 1), date(2025, 4, 30))
+        
+        assert ParquetWarehouse(root).stats()['months'] == 4
+        assert dashboard.covers(date(2025, 1, 1), date(2025, 4, 30))
+        print("✅ local sync keeps months written by the other instance")
+
+
+def run_all_tests():
+    """Run all warehouse tests"""
+    tests = [test_external_sync_visible]
+    failed = 0
+    
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {str(e)}")
+    
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    
+    if success:
+        print("\n✅ All warehouse tests passed.")
+        sys.exit(0)
+    else:
+        print("\n❌ Some tests failed. Please review errors above.")
+        sys.exit(1)
@@ -0,0 +1,396 @@
+"""
+Parquet Warehouse
+Local month-partitioned copy of NetSuite sales transaction lines
+
+Usage:
+    python warehouse.py --start 2024-01 --end 2025-12 [--root data/warehouse] [--force]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+
+def month_range(start_date: date, end_date: date) -> List[Tuple[int, int]]:
+    """
+    List the (year, month) pairs touched by a date range
+    
+    Args:
+        start_date: First day
+        end_date: Last day
+    
+    Returns:
+        (year, month) tuples in ascending order
+    """
+    months = []
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """First and last day of a month"""
+    first = date(year, month, 1)
+    next_first = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return first, next_first - timedelta(days=1)
+
+
+class ParquetWarehouse:
+    """
+    Sales transaction lines stored as one Parquet file per month
+    
+    Files live under <root>/month=YYYY-MM/ and a manifest records how far each
+    month has been synced. Reads open only the partitions a date range touches
+    (partition pruning), load only the columns the caller needs (projection)
+    and push the day filter into the Parquet scan, so multi-year lookbacks are
+    answered locally instead of through the RESTlet.
+    """
+    
+    COLUMNS = ['transaction_id', 'transaction_date', 'transaction_type', 'customer_id',
+               'item_id', 'sales_units', 'sales_dollars', 'returns']
+    READ_COLUMNS = ['transaction_id', 'item_id', 'customer_id', 'sales_units', 'sales_dollars', 'returns']
+    
+    def __init__(self, root: str, refresh_months: int = 2, date_format: Optional[str] = None):
+        """
+        Initialize warehouse
+        
+        Args:
+            root: Warehouse directory
+            refresh_months: Trailing months re-synced on every sync (late edits)
+            date_format: strftime format of transaction_date (None infers it)
+        """
+        self.name = 'warehouse'
+        self.root = Path(root)
+        self.refresh_months = refresh_months
+        self.date_format = date_format
+        self._manifest_path = self.root / '_manifest.json'
+        self._lock = threading.RLock()
+        self._manifest_mtime: Optional[Tuple[int, int]] = None
+        self._manifest = self._load_manifest()
+        
+        # Monitoring counters
+        self.reads = 0
+        self.partitions_read = 0
+        self.lines_read = 0
+        self.last_read_seconds: Optional[float] = None
+    
+    def _manifest_stamp(self) -> Optional[Tuple[int, int]]:
+        """
+        Modification time and inode of the manifest file (None if it does not exist)
+        
+        Saves replace the file, so the inode changes even when two writes land
+        within the filesystem's timestamp granularity.
+        """
+        try:
+            stat = self._manifest_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino
+    
+    def _load_manifest(self) -> Dict[str, Dict]:
+        """Read the per-month sync manifest"""
+        self._manifest_mtime = self._manifest_stamp()
+        if self._manifest_mtime is None:
+            return {}
+        
+        with open(self._manifest_path) as f:
+            return json.load(f)
+    
+    def _current_manifest(self) -> Dict[str, Dict]:
+        """
+        Get a snapshot of the manifest, reloading it if the file changed
+        
+        The sync command usually runs as a separate process (cron), so the
+        manifest on disk moves on without this instance writing it.
+        """
+        with self._lock:
+            if self._manifest_stamp() != self._manifest_mtime:
+                self._manifest = self._load_manifest()
+            return dict(self._manifest)
+    
+    def _save_manifest(self):
+        """Write the manifest (atomically replaces the previous file)"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.root / '_manifest.json.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path)
+        self._manifest_mtime = self._manifest_stamp()
+    
+    def _partition_path(self, year: int, month: int) -> Path:
+        """Parquet file holding one month of lines"""
+        return self.root / f"month={year:04d}-{month:02d}" / 'part-0.parquet'
+    
+    def sync_month(self, connector, year: int, month: int, through: Optional[date] = None) -> int:
+        """
+        Replace one month partition with fresh lines from NetSuite
+        
+        Args:
+            connector: NetSuiteConnector instance
+            year: Year
+            month: Month
+            through: Last day to load (defaults to the end of the month)
+        
+        Returns:
+            Number of lines written
+        """
+        first, last = month_bounds(year, month)
+        through = min(last, through) if through else last
+        
+        transactions = connector.get_sales_transactions(
+            first.strftime("%Y-%m-%d"),
+            through.strftime("%Y-%m-%d"),
+            {'transaction_type': 'sales'}
+        )
+        
+        df = pd.DataFrame(transactions, columns=self.COLUMNS)
+        for field in ['transaction_id', 'transaction_type', 'customer_id', 'item_id']:
+            df[field] = df[field].astype('string')
+        for field in ['sales_units', 'sales_dollars', 'returns']:
+            df[field] = pd.to_numeric(df[field]).fillna(0).astype(float)
+        df['transaction_date'] = pd.to_datetime(df['transaction_date'], format=self.date_format).dt.date
+        
+        path = self._partition_path(year, month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Dot-prefixed temp file so dataset discovery never picks it up
+        tmp_path = path.with_name('.' + path.name + '.tmp')
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        
+        with self._lock:
+            # Merge into the latest manifest so months synced elsewhere are kept
+            self._current_manifest()
+            self._manifest[f"{year:04d}-{month:02d}"] = {
+                'through': through.isoformat(),
+                'lines': len(df),
+                'synced_at': datetime.now(timezone.utc).isoformat()
+            }
+            self._save_manifest()
+        
+        return len(df)
+    
+    def sync(self, connector, start_date: date, end_date: Optional[date] = None,
+             force: bool = False) -> Dict[str, int]:
+        """
+        Fill the warehouse month by month
+        
+        Complete months already in the warehouse are skipped unless they fall
+        in the trailing refresh window (or force is set).
+        
+        Args:
+            connector: NetSuiteConnector instance
+            start_date: First day to sync
+            end_date: Last day to sync (defaults to today)
+            force: Re-sync every month in the range
+        
+        Returns:
+            Dictionary of month (YYYY-MM) to lines written, for synced months
+        """
+        today = date.today()
+        end_date = min(end_date or today, today)
+        
+        # First month of the trailing refresh window
+        refresh_from = today.replace(day=1)
+        for _ in range(self.refresh_months - 1):
+            refresh_from = (refresh_from - timedelta(days=1)).replace(day=1)
+        
+        manifest = self._current_manifest()
+        synced = {}
+        for year, month in month_range(start_date, end_date):
+            key = f"{year:04d}-{month:02d}"
+            entry = manifest.get(key)
+            complete = entry is not None and entry['through'] >= month_bounds(year, month)[1].isoformat()
+            
+            if complete and not force and date(year, month, 1) < refresh_from:
+                continue
+            
+            synced[key] = self.sync_month(connector, year, month, through=end_date)
+            print(f"Synced {key}: {synced[key]:,} lines")
+        
+        return synced
+    
+    def covers(self, start_date: date, end_date: date) -> bool:
+        """Check whether every day of a date range has been synced"""
+        manifest = self._current_manifest()
+        
+        for year, month in month_range(start_date, end_date):
+            entry = manifest.get(f"{year:04d}-{month:02d}")
+            needed = min(month_bounds(year, month)[1], end_date)
+            if entry is None or entry['through'] < needed.isoformat():
+                return False
+        
+        return True
+    
+    def partition_files(self, start_date: date, end_date: date) -> List[str]:
+        """
+        List the month partition files a date range touches (partition pruning)
+        
+        Args:
+            start_date: First day
+            end_date: Last day
+        
+        Returns:
+            Paths of the synced partition files, oldest month first
+        """
+        manifest = self._current_manifest()
+        paths = (self._partition_path(year, month) for year, month in month_range(start_date, end_date)
+                 if f"{year:04d}-{month:02d}" in manifest)
+        return [str(path) for path in paths if path.exists()]
+    
+    def read_lines(self, start_date: date, end_date: date,
+                   columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read the lines of a date range from the month partitions
+        
+        Args:
+            start_date: First day (inclusive)
+            end_date: Last day (inclusive)
+            columns: Columns to load (defaults to READ_COLUMNS)
+        
+        Returns:
+            DataFrame of lines ordered by transaction ID, like the RESTlet search
+        """
+        timer_start = time.perf_counter()
+        columns = list(columns or self.READ_COLUMNS)
+        
+        files = self.partition_files(start_date, end_date)
+        if not files:
+            return pd.DataFrame(columns=columns)
+        
+        dataset = ds.dataset(files, format='parquet')
+        in_range = ((ds.field('transaction_date') >= pa.scalar(start_date)) &
+                    (ds.field('transaction_date') <= pa.scalar(end_date)))
+        load_columns = columns if 'transaction_id' in columns else columns + ['transaction_id']
+        df = dataset.to_table(columns=load_columns, filter=in_range).to_pandas()
+        
+        # Month files are read in order, but back-dated lines can cross months
+        line_ids = pd.to_numeric(df['transaction_id'], errors='coerce').to_numpy(dtype=float)
+        df = df.iloc[np.argsort(line_ids, kind='stable')].reset_index(drop=True)[columns]
+        
+        self.reads += 1
+        self.partitions_read += len(files)
+        self.lines_read += len(df)
+        self.last_read_seconds = time.perf_counter() - timer_start
+        return df
+    
+    def iter_sales_transactions(self, start_date: str, end_date: str,
+                                filters: Optional[Dict] = None,
+                                page_size: int = 100_000) -> Iterator[pd.DataFrame]:
+        """
+        Stream warehouse lines in pages, like NetSuiteConnector.iter_sales_transactions
+        
+        Only transaction_type is honoured; item and customer attributes are not
+        stored with the lines, so other predicates are applied by the caller.
+        
+        Args:
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            filters: Optional filters (ignored, see above)
+            page_size: Lines per page
+        
+        Yields:
+            DataFrames of transaction lines, one per page
+        """
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        df = self.read_lines(start, end)
+        
+        for offset in range(0, len(df), page_size):
+            yield df.iloc[offset:offset + page_size]
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get warehouse metrics for monitoring
+        
+        Returns:
+            Dictionary with partition, line and read counters
+        """
+        manifest = self._current_manifest()
+        
+        months = sorted(manifest)
+        return {
+            'root': str(self.root),
+            'months': len(months),
+            'first_month': months[0] if months else None,
+            'last_month': months[-1] if months else None,
+            'lines': sum(entry['lines'] for entry in manifest.values()),
+            'reads': self.reads,
+            'partitions_read': self.partitions_read,
+            'lines_read': self.lines_read,
+            'last_read_seconds': self.last_read_seconds
+        }
+
+
+def load_netsuite_secrets(path: str = '.streamlit/secrets.toml') -> Dict[str, Any]:
+    """
+    Read the [netsuite] section of the Streamlit secrets file
+    
+    Args:
+        path: Path to secrets.toml
+    
+    Returns:
+        Dictionary of NetSuite connection settings
+    """
+    try:
+        import tomllib
+        with open(path, 'rb') as f:
+            secrets = tomllib.load(f)
+    except ImportError:
+        import toml
+        secrets = toml.load(path)
+    
+    return secrets['netsuite']
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Sync the warehouse from NetSuite (command line entry point)"""
+    from netsuite_connector import NetSuiteConnector
+    
+    parser = argparse.ArgumentParser(description="Fill the local Parquet warehouse from NetSuite, month by month")
+    parser.add_argument('--start', required=True, help="First month to sync (YYYY-MM)")
+    parser.add_argument('--end', help="Last month to sync (YYYY-MM, defaults to the current month)")
+    parser.add_argument('--root', default='data/warehouse', help="Warehouse directory")
+    parser.add_argument('--secrets', default='.streamlit/secrets.toml', help="Streamlit secrets file")
+    parser.add_argument('--force', action='store_true', help="Re-sync months that are already complete")
+    args = parser.parse_args(argv)
+    
+    start_date = datetime.strptime(args.start, "%Y-%m").date()
+    end_date = None
+    if args.end:
+        end_year, end_month = map(int, args.end.split('-'))
+        end_date = month_bounds(end_year, end_month)[1]
+    
+    settings = load_netsuite_secrets(args.secrets)
+    connector = NetSuiteConnector(
+        account_id=settings['account_id'],
+        consumer_key=settings['consumer_key'],
+        consumer_secret=settings['consumer_secret'],
+        token_id=settings['token_id'],
+        token_secret=settings['token_secret'],
+        restlet_url=settings.get('restlet_url')
+    )
+    
+    warehouse = ParquetWarehouse(args.root)
+    synced = warehouse.sync(connector, start_date, end_date, force=args.force)
+    print(f"Synced {len(synced)} month(s), {sum(synced.values()):,} lines")
+    
+    connector.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())